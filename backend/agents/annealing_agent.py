@@ -0,0 +1,246 @@
+"""
+Annealing Agent - Simulated annealing with a tabu list over greedy schedules
+
+The local search agent only accepts moves that do not lower the objective,
+so it stops in the first local optimum around the best greedy schedule.
+This agent runs the same neighbourhoods (SequenceState.propose, delta
+evaluated with try_change) under simulated annealing: worse schedules are
+accepted with probability exp(delta / T) while the temperature cools from
+T0 to T0 * FINAL_TEMPERATURE_RATIO over the time budget. A short tabu list
+keeps recently moved jobs in place so the search does not undo its last
+moves, unless the move would beat the best schedule found (aspiration).
+
+Key Features:
+    - Warm start from the best greedy schedule (or the orchestrator's plan)
+    - Same selection objective as the supervisor (KPI score minus 100 per
+      violation), maintained incrementally
+    - T0 calibrated from sampled worsening moves (INITIAL_ACCEPTANCE)
+    - Best schedule snapshotted only when the search walks away from it
+    - Improvement trajectory (best objective over time) in the result
+"""
+
+import math
+import random
+import time
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+
+from models.schemas import Job, MachineDowntime, ShiftConstraints, AgentResult, TrajectoryPoint
+from models.problem_instance import ProblemInstance, Plan
+from config import settings
+from utils.lower_bounds import early_stop_target, prepare_lower_bounds
+from .base_agent import BaseAgent, run_schedule
+from .local_search_agent import SequenceState, best_greedy_plan, selection_objective
+
+# Probability of accepting a median worsening move at the start
+INITIAL_ACCEPTANCE = 0.01
+# Final temperature relative to T0 (geometric cooling)
+FINAL_TEMPERATURE_RATIO = 1e-3
+# Proposals sampled to calibrate T0
+CALIBRATION_SAMPLES = 200
+# Accepted moves during which a moved job stays tabu (capped by job count / 10)
+TABU_TENURE = 25
+# Minimum time between two trajectory points (seconds)
+TRAJECTORY_INTERVAL = 0.01
+
+
+def initial_temperature(state: SequenceState, rng: random.Random, movable: List[int]) -> float:
+    """T0 at which a median worsening move is accepted with INITIAL_ACCEPTANCE."""
+    current = state.objective()
+    worse = []
+    for _ in range(CALIBRATION_SAMPLES):
+        proposal = state.propose(rng, movable)
+        if proposal is None:
+            continue
+        _, _, changes, assigned_delta = proposal
+        value, _ = state.try_change(changes, assigned_delta)
+        if value < current - 1e-9:
+            worse.append(current - value)
+    if not worse:
+        return 1.0
+    # Median, not mean: a few moves that add violations (-100 each) would dominate
+    worse.sort()
+    return worse[len(worse) // 2] / -math.log(INITIAL_ACCEPTANCE)
+
+
+def schedule_annealing(
+    instance: ProblemInstance,
+    start_plan: Optional[Plan] = None,
+    time_budget: float = 1.0,
+    seed: int = 0,
+    max_moves: Optional[int] = None,
+    stop_at: Optional[float] = None
+) -> Tuple[Plan, List[str], Dict[str, Any]]:
+    """
+    SIMULATED ANNEALING with a tabu list, starting from `start_plan`
+    (default: the best greedy schedule).
+
+    Cooling follows the elapsed share of `time_budget` (or of `max_moves`
+    when given), so the search always ends cold, whatever the budget. The
+    search ends early once the best objective reaches `stop_at`.
+    """
+    started = time.perf_counter()
+    if start_plan is None:
+        start_plan = best_greedy_plan(instance)
+
+    state = SequenceState(instance, start_plan)
+    rng = random.Random(seed)
+    movable = [j for j in range(state.n_jobs) if state.options[j]]
+    current = best = start_objective = state.objective()
+    t0 = initial_temperature(state, rng, movable) if movable else 1.0
+    log_ratio = math.log(FINAL_TEMPERATURE_RATIO)
+    temperature = t0
+
+    tenure = max(1, min(TABU_TENURE, len(movable) // 10))
+    tabu_until = [0] * state.n_jobs  # Accepted-move count until which a job stays put
+    best_seq: Optional[List[List[int]]] = None  # Snapshot once the search leaves the best
+    at_best = True
+
+    trajectory = [TrajectoryPoint(elapsed_ms=0.0, iteration=0, best_objective=round(best, 2), temperature=round(t0, 4))]
+    last_point = started
+    tried = accepted = improved = uphill = tabu_rejected = 0
+    deadline = started + time_budget
+    limit = max_moves if max_moves is not None else float("inf")
+    exp, rand = math.exp, rng.random
+    stopped_early = stop_at is not None and best >= stop_at - 1e-9
+
+    while movable and tried < limit and not stopped_early:
+        if tried & 255 == 0:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            progress = max((now - started) / time_budget if time_budget > 0 else 1.0, tried / limit)
+            temperature = t0 * exp(log_ratio * min(progress, 1.0))
+        tried += 1
+
+        proposal = state.propose(rng, movable)
+        if proposal is None:
+            continue
+        move, j, changes, assigned_delta = proposal
+
+        value, patch = state.try_change(changes, assigned_delta)
+        delta = value - current
+        if tabu_until[j] > accepted and value <= best + 1e-9:
+            tabu_rejected += 1
+            continue
+        if delta < -1e-9:
+            if rand() >= exp(delta / temperature):
+                continue
+            uphill += 1
+            if at_best:
+                best_seq = [list(seq) for seq in state.seq]
+                at_best = False
+
+        state.apply(move, j, patch, assigned_delta)
+        accepted += 1
+        tabu_until[j] = accepted + tenure
+        current = value
+        if current > best + 1e-9:
+            best = current
+            at_best = True
+            best_seq = None
+            improved += 1
+            stopped_early = stop_at is not None and best >= stop_at - 1e-9
+            now = time.perf_counter()
+            if now - last_point >= TRAJECTORY_INTERVAL:
+                last_point = now
+                trajectory.append(TrajectoryPoint(
+                    elapsed_ms=round((now - started) * 1000, 1), iteration=tried,
+                    best_objective=round(best, 2), temperature=round(temperature, 4)
+                ))
+
+    if not at_best:
+        state.seq = best_seq
+    plan = state.to_plan()
+    # Decoding may shift the start plan; never return anything worse than it
+    if selection_objective(instance, plan) < selection_objective(instance, start_plan):
+        plan = start_plan
+
+    elapsed = time.perf_counter() - started
+    trajectory.append(TrajectoryPoint(
+        elapsed_ms=round(elapsed * 1000, 1), iteration=tried,
+        best_objective=round(best, 2), temperature=round(temperature, 4)
+    ))
+    assigned = {slot.job for slots in plan.values() for slot in slots}
+    unassigned = [job_id for j, job_id in enumerate(instance.job_ids) if j not in assigned]
+    violations = [f"Job {job_id} could not be assigned in Annealing optim." for job_id in unassigned]
+    details = {
+        "moves_tried": tried,
+        "moves_accepted": accepted,
+        "uphill_moves": uphill,
+        "tabu_rejected": tabu_rejected,
+        "improvements": improved,
+        "moves_per_second": round(tried / elapsed) if elapsed > 0 else 0,
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "initial_temperature": round(t0, 4),
+        "start_objective": round(start_objective, 2),
+        "final_objective": round(best, 2),
+        "stopped_early": stopped_early,
+        "unassigned_count": len(unassigned),
+        "trajectory": trajectory
+    }
+    return plan, violations, details
+
+
+class AnnealingAgent(BaseAgent):
+    """
+    ANNEALING AGENT:
+    - Improves the best greedy schedule with simulated annealing
+    - Tabu list on recently moved jobs, with aspiration on new bests
+    - Bounded by a wall-clock budget (ANNEALING_TIME_BUDGET seconds)
+    - Reports the best objective over time (trajectory)
+    """
+    def __init__(self, time_budget: Optional[float] = None, seed: int = 0):
+        super().__init__("Annealing Agent")
+        self.time_budget = time_budget if time_budget is not None else settings.ANNEALING_TIME_BUDGET
+        self.seed = seed
+
+    async def optimize(
+        self,
+        jobs: List[Job],
+        downtimes: List[MachineDowntime],
+        constraints: ShiftConstraints,
+        validate: bool = True,
+        instance: Optional[ProblemInstance] = None,
+        start_plan: Optional[Plan] = None,
+        time_budget: Optional[float] = None
+    ) -> AgentResult:
+        self.log("Improving schedule with simulated annealing...")
+        if instance is None:
+            instance = ProblemInstance(jobs, downtimes, constraints)
+        budget = time_budget if time_budget is not None else self.time_budget
+
+        stop_at = early_stop_target(await prepare_lower_bounds(instance))
+        scheduler = partial(
+            schedule_annealing, start_plan=start_plan, time_budget=budget, seed=self.seed,
+            stop_at=stop_at
+        )
+        plan, kpis, violations, details = await run_schedule(scheduler, instance, validate)
+        self.log(
+            f"{details['moves_tried']} moves ({details['moves_per_second']}/s), {details['uphill_moves']} uphill, "
+            f"objective {details['start_objective']} -> {details['final_objective']}"
+        )
+
+        explanation = f"""**Simulated Annealing Strategy**
+
+Starting from the best greedy schedule, the agent tried {details['moves_tried']:,} swap, insert and
+inter-machine moves in {details['elapsed_ms'] / 1000:.1f}s ({details['moves_per_second']:,} moves/s).
+It accepted {details['uphill_moves']:,} temporarily worse schedules to escape local optima and
+found {details['improvements']} new best schedules.
+
+- Selection objective: {details['start_objective']} -> {details['final_objective']}
+- Setup time: {kpis.total_setup_time} min, tardiness: {kpis.total_tardiness} min
+- Jobs completed: {kpis.completed_jobs}/{kpis.total_jobs}
+"""
+
+        result = AgentResult(
+            agent_name=self.name,
+            schedules=instance.to_schedules(plan, setup_notes=True),
+            kpis=kpis,
+            explanation=explanation,
+            violations=violations,
+            violation_counts=details.get("violation_counts", {}),
+            trajectory=details["trajectory"]
+        )
+        result._plan = plan
+        return result
@@ -1,6 +1,54 @@
 from abc import ABC, abstractmethod
-from typing import List
-from models.schemas import Job, MachineDowntime, ShiftConstraints, AgentResult
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple
+from models.schemas import Job, MachineDowntime, ShiftConstraints, AgentResult, KPIResult
+from models.problem_instance import ProblemInstance, Plan
+from models.setup_matrix import plant_setup_config
+from utils.kpi_calculator import calculate_plan_kpis
+from utils.executor import run_cpu_bound
+
+# A scheduling core: pure, synchronous and picklable so it can run in a
+# worker process. Returns (plan, assignment violations, strategy details).
+Scheduler = Callable[[ProblemInstance], Tuple[Plan, List[str], Dict[str, Any]]]
+
+class ScheduleOutcome(NamedTuple):
+    plan: Plan
+    kpis: KPIResult
+    violations: List[str]
+    details: Dict[str, Any]
+
+def calculate_setup_time(last_product: str, current_product: str) -> int:
+    """Plant changeover minutes between two products by name (0 on an idle machine)."""
+    if not last_product:
+        return 0
+    config = plant_setup_config()
+    default = config.same_product_time if last_product == current_product else config.different_product_time
+    return config.changeovers.get(last_product, {}).get(current_product, default)
+
+def evaluate_schedule(scheduler: Scheduler, instance: ProblemInstance, validate: bool = True) -> ScheduleOutcome:
+    """
+    Run a scheduling core and score (and optionally validate) its plan.
+    This is the CPU-bound part of every agent and runs off the event loop.
+    """
+    plan, violations, details = scheduler(instance)
+    kpis = calculate_plan_kpis(instance, plan)
+    if validate:
+        rendered, details["violation_counts"] = validate_schedule(instance, plan)
+        violations.extend(rendered)
+    return ScheduleOutcome(plan, kpis, violations, details)
+
+def validate_schedule(instance: ProblemInstance, plan: Plan) -> Tuple[List[str], Dict[str, int]]:
+    """
+    Check a plan against every constraint: rendered violations and counts per kind.
+    CPU-bound like evaluate_schedule; await it through run_cpu_bound.
+    """
+    from .constraint_agent import ConstraintAgent
+
+    report = ConstraintAgent().check_plan(instance, plan)
+    return report.render(), report.counts()
+
+async def run_schedule(scheduler: Scheduler, instance: ProblemInstance, validate: bool = True) -> ScheduleOutcome:
+    """Run evaluate_schedule on the configured scheduler executor."""
+    return await run_cpu_bound(evaluate_schedule, scheduler, instance, validate)
 
 class BaseAgent(ABC):
     def __init__(self, name: str):
@@ -11,18 +59,18 @@ class BaseAgent(ABC):
         self, 
         jobs: List[Job], 
         downtimes: List[MachineDowntime], 
-        constraints: ShiftConstraints
+        constraints: ShiftConstraints,
+        validate: bool = True
     ) -> AgentResult:
         """
         Run the optimization logic.
+        With validate=False the caller is responsible for constraint validation.
         """
         pass
         
     def calculate_setup_time(self, last_product: str, current_product: str) -> int:
-        """Standard setup logic: 10 mins if product types differ."""
-        if last_product and last_product != current_product:
-            return 10
-        return 0
+        """Plant changeover minutes between two products by name."""
+        return calculate_setup_time(last_product, current_product)
         
     def log(self, message: str):
         print(f"[{self.name}] {message}")
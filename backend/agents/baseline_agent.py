@@ -1,9 +1,68 @@
-from typing import List, Dict
-from datetime import datetime, timedelta
-from models.schemas import Job, MachineDowntime, ShiftConstraints, AgentResult, ScheduledJob
-from utils.kpi_calculator import calculate_kpis, parse_time
-from .base_agent import BaseAgent
-from .constraint_agent import ConstraintAgent
+from typing import Any, List, Dict, Optional, Tuple
+from models.schemas import Job, MachineDowntime, ShiftConstraints, AgentResult
+from models.problem_instance import ProblemInstance, Plan, Slot
+from .base_agent import BaseAgent, run_schedule
+
+def schedule_fcfs(instance: ProblemInstance) -> Tuple[Plan, List[str], Dict[str, Any]]:
+    """
+    BASELINE ALGORITHM (from architecture):
+    Sort: Rush jobs first, then by job_id (arrival order)
+    Simple FIFO with NO optimization
+    """
+    table = instance.table
+    machine_ids = table.machine_ids
+    candidates = table.candidate_lists  # Compatible machine indices per job
+    products = instance.product_codes
+    setup_rows = instance.setup.rows  # Changeover minutes [previous product][product]
+    processing = instance.processing
+    earliest_fit = instance.downtimes.earliest_fit
+    down_machines = set(instance.downtimes.machines())
+    has_downtime = [mid in down_machines for mid in machine_ids]
+    
+    # Machine timelines by machine index: end minute and last product code
+    machine_time = [instance.shift_start] * len(machine_ids)
+    machine_product: List[Optional[int]] = [None] * len(machine_ids)
+    
+    plan: Plan = {}
+    
+    violations = []
+    unassigned_count = 0
+    
+    for idx in table.order_rush_arrival.tolist():
+        job_duration = processing[idx]
+        product = products[idx]
+        # Find best machine: available earliest
+        best_machine = None
+        earliest_start = None
+        
+        for m in candidates[idx]:
+            # Setup
+            last_prod = machine_product[m]
+            setup_minutes = setup_rows[last_prod][product] if last_prod is not None else 0
+            
+            # Find the earliest time this job fits on this machine
+            # around its downtime windows
+            start_candidate = machine_time[m] + setup_minutes
+            if has_downtime[m]:
+                start_candidate = earliest_fit(machine_ids[m], start_candidate, job_duration)
+            
+            if best_machine is None or start_candidate < earliest_start:
+                best_machine = m
+                earliest_start = start_candidate
+        
+        if best_machine is not None:
+            # Assign
+            end_time = earliest_start + job_duration
+            
+            plan.setdefault(machine_ids[best_machine], []).append(Slot(idx, earliest_start, end_time))
+            
+            machine_time[best_machine] = end_time
+            machine_product[best_machine] = product
+        else:
+            unassigned_count += 1
+            violations.append(f"Job {instance.job_ids[idx]} could not be assigned (No valid slot found).")
+    
+    return plan, violations, {"unassigned_count": unassigned_count}
 
 class BaselineAgent(BaseAgent):
     def __init__(self):
@@ -13,102 +72,16 @@ class BaselineAgent(BaseAgent):
         self, 
         jobs: List[Job], 
         downtimes: List[MachineDowntime], 
-        constraints: ShiftConstraints
+        constraints: ShiftConstraints,
+        validate: bool = True,
+        instance: Optional[ProblemInstance] = None
     ) -> AgentResult:
         self.log("Starting FCFS optimization...")
+        instance = instance or ProblemInstance(jobs, downtimes, constraints)
         
-        # BASELINE ALGORITHM (from architecture):
-        # Sort: Rush jobs first, then by job_id (arrival order)
-        # Simple FIFO with NO optimization
-        sorted_jobs = sorted(jobs, key=lambda x: (
-            0 if x.priority == "Rush" else 1,  # Rush first
-            x.job_id  # Then by arrival order
-        ))
-        
-        machine_timelines = {} # Machine ID -> current end time (datetime)
-        
-        # Initialize timelines to shift start
-        shift_start_dt = parse_time(constraints.start_time)
-        
-        schedules: Dict[str, List[ScheduledJob]] = {}
-        
-        violations = []
-        unassigned_count = 0
-        
-        for job in sorted_jobs:
-            # ... (existing loop logic)
-            # Find best machine: available earliest
-            best_machine = None
-            earliest_start = None
-            
-            # Filter valid machines for this job
-            valid_machines = job.machine_options
-            
-            for m_id in valid_machines:
-                timelines_for_comparison = machine_timelines.get(m_id, {"time": shift_start_dt, "product": None})
-                current_time = timelines_for_comparison["time"]
-                last_prod = timelines_for_comparison["product"]
-                
-                # Setup
-                setup_minutes = self.calculate_setup_time(last_prod, job.product_type)
-                
-                # Check for downtime overlap (Simplified: if current_time is in downtime, jump to end)
-                # In a real scheduler, we'd look ahead. Here: just check if we start now, do we overlap?
-                # Actually, simply find the earliest time this job can start on this machine
-                
-                # Apply downtime check loop
-                start_candidate = current_time + timedelta(minutes=setup_minutes)
-                job_duration = timedelta(minutes=job.processing_time)
-                
-                # Check against all downtimes for this machine
-                machine_downtimes = [d for d in downtimes if d.machine_id == m_id]
-                machine_downtimes.sort(key=lambda x: parse_time(x.start_time))
-                
-                for dt in machine_downtimes:
-                    dt_start = parse_time(dt.start_time)
-                    dt_end = parse_time(dt.end_time)
-                    
-                    # If candidate start is during downtime, push it
-                    if dt_start <= start_candidate < dt_end:
-                        start_candidate = dt_end
-                    # If job interval overlaps downtime
-                    elif start_candidate < dt_start < (start_candidate + job_duration):
-                        start_candidate = dt_end
-                
-                if best_machine is None or start_candidate < earliest_start:
-                    best_machine = m_id
-                    earliest_start = start_candidate
-            
-            if best_machine:
-                # Assign
-                end_time = earliest_start + timedelta(minutes=job.processing_time)
-                
-                scheduled_job = ScheduledJob(
-                    job_id=job.job_id,
-                    machine_id=best_machine,
-                    start_time=earliest_start.strftime("%H:%M"),
-                    end_time=end_time.strftime("%H:%M"),
-                    product_type=job.product_type
-                )
-                
-                if best_machine not in schedules:
-                    schedules[best_machine] = []
-                schedules[best_machine].append(scheduled_job)
-                
-                machine_timelines[best_machine] = {
-                    "time": end_time,
-                    "product": job.product_type
-                }
-            else:
-                unassigned_count += 1
-                violations.append(f"Job {job.job_id} could not be assigned (No valid slot found).")
-        
-        kpis = calculate_kpis(schedules, jobs)
-        
-        # Validate constraints
-        constraint_agent = ConstraintAgent()
-        constraint_violations = constraint_agent.validate(schedules, jobs, downtimes, constraints)
-        violations.extend(constraint_violations)
+        # Scheduling, KPIs and validation run on the scheduler executor
+        plan, kpis, violations, details = await run_schedule(schedule_fcfs, instance, validate)
+        unassigned_count = details["unassigned_count"]
         
         explanation = f"""
 BASELINE AGENT (FCFS - Pharmaceutical Production):
@@ -120,7 +93,7 @@ Strategy:
 - No advanced optimization applied
 
 Results:
-- Scheduled: {kpis.completed_jobs}/{len(jobs)} jobs
+- Scheduled: {kpis.completed_jobs}/{instance.num_jobs} jobs
 - Makespan: {kpis.makespan} minutes
 - Total Tardiness: {kpis.total_tardiness} minutes
 - Setup Time: {kpis.total_setup_time} minutes
@@ -129,15 +102,18 @@ Performance:
 - Violations: {len(violations)} issues
 - Unassigned jobs: {unassigned_count}
 - Simple priority-based FCFS approach
-- Equipment setup/cleaning penalty (10 min) applied for pharmaceutical product changes
+- Equipment setup/cleaning time from the plant changeover matrix applied for pharmaceutical product changes
 
 This baseline provides a reference point for AI optimization strategies in pharmaceutical manufacturing.
 """
         
-        return AgentResult(
+        result = AgentResult(
             agent_name=self.name,
-            schedules=schedules,
+            schedules=instance.to_schedules(plan),
             kpis=kpis,
             explanation=explanation,
-            violations=violations
+            violations=violations,
+            violation_counts=details.get("violation_counts", {})
         )
+        result._plan = plan
+        return result
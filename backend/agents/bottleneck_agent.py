@@ -1,11 +1,159 @@
 import os
-from datetime import datetime, timedelta
 from collections import defaultdict
+from heapq import heapify, heappop, heappush, heapreplace
 from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
-from models.schemas import Job, MachineDowntime, ShiftConstraints, AgentResult, ScheduledJob
-from utils.kpi_calculator import calculate_kpis, parse_time
-from .constraint_agent import ConstraintAgent
+from typing import Any, Dict, List, Optional, Tuple
+from models.schemas import AgentResult
+from models.problem_instance import ProblemInstance, Plan, Slot
+from utils.explanation_service import resolve_explanation
+from .base_agent import run_schedule
+
+def schedule_least_loaded(instance: ProblemInstance) -> Tuple[Plan, List[str], Dict[str, Any]]:
+    """
+    BOTTLENECK ALGORITHM: rush/deadline order, each job goes to the
+    least-loaded compatible machine on which it still fits in the shift.
+
+    Candidates come from one min-heap of (load, set rank, machine) per
+    distinct compatibility set instead of a sort per job. Loads only grow,
+    so entries go stale lazily: a popped entry whose load is out of date is
+    pushed back with the current load, and the first up-to-date entry is
+    the least-loaded machine (ties in machine-set order, as before).
+    Machines that cannot fit even the shortest job are dropped for good.
+    A second heap per set, on earliest availability (machine end time),
+    rejects a job that cannot fit on any candidate without probing them.
+    """
+    table = instance.table
+    machine_ids = table.machine_ids
+    candidate_lists = table.candidate_lists
+    masks, mask_group = table.mask_groups
+    setup_rows = instance.setup.rows  # Changeover minutes [previous product][product]
+    processing = instance.processing
+    earliest_fit = instance.downtimes.earliest_fit
+    down_machines = set(instance.downtimes.machines())
+    has_downtime = [mid in down_machines for mid in machine_ids]
+
+    # All unique machine IDs from jobs. Equal-load ties are broken by this
+    # set's iteration order, so it is built exactly as before (first-seen order).
+    all_machine_ids = set(machine_ids)
+    set_rank = {mid: pos for pos, mid in enumerate(all_machine_ids)}
+    rank = [set_rank[mid] for mid in machine_ids]
+    # Per distinct compatibility bitset: heaps of (load, rank, machine) and (end time, machine)
+    load_heaps: List[Optional[List[Tuple[int, int, int]]]] = [None] * len(masks)
+    end_heaps: List[Optional[List[Tuple[int, int]]]] = [None] * len(masks)
+
+    # Per machine index: accumulated load, actual end time, last product code
+    machine_loads = [0] * len(machine_ids)
+    machine_end_times = [instance.shift_start] * len(machine_ids)
+    machine_last_product: List[Optional[int]] = [None] * len(machine_ids)
+    # Per machine, since its last assignment: product -> shortest job that overran the
+    # shift there (any longer job of that product overruns too)
+    overran: List[Dict[int, int]] = [{} for _ in machine_ids]
+    plan = defaultdict(list)
+    unassigned_count = 0
+    violations = []
+
+    shift_end = instance.shift_end
+    # A machine ending after this cannot fit any job any more
+    full_after = shift_end - int(instance.setup.matrix.min(initial=0)) - min(processing, default=0)
+    # Least setup any machine can need before each product (0 after an idle machine)
+    setup_floor = instance.setup.matrix.min(axis=0, initial=0).tolist()
+
+    def start_on(m: int, product: int, job_duration: int) -> Tuple[int, int]:
+        """(job start, setup minutes) for the job after machine m's current last job."""
+        last_product = machine_last_product[m]
+
+        # Setup penalty from the plant's changeover matrix
+        setup_time = setup_rows[last_product][product] if last_product is not None else 0
+
+        # Job starts AFTER setup time (setup is a gap, not part of job),
+        # at the machine's ACTUAL end time, then skips downtime
+        job_start = machine_end_times[m] + setup_time
+        if has_downtime[m]:
+            job_start = earliest_fit(machine_ids[m], job_start, job_duration)
+        return job_start, setup_time
+
+    # Per-job columns gathered in dispatch order once, not looked up per job
+    order = table.order_rush_due
+    dispatch = zip(
+        order.tolist(), mask_group[order].tolist(),
+        table.product_code[order].tolist(), table.processing_time[order].tolist()
+    )
+    for idx, group, product, job_duration in dispatch:
+        if not masks[group]:
+            unassigned_count += 1
+            violations.append(f"Job {instance.job_ids[idx]} has no compatible machines.")
+            continue
+
+        heap = load_heaps[group]
+        if heap is None:
+            heap = load_heaps[group] = [(machine_loads[m], rank[m], m) for m in candidate_lists[idx]]
+            heapify(heap)
+            end_heaps[group] = [(machine_end_times[m], m) for m in candidate_lists[idx]]
+            heapify(end_heaps[group])
+
+        # Earliest available candidates first: stop at the first one the job
+        # fits on, or once even the setup floor would overrun the shift
+        ends = end_heaps[group]
+        latest_end = shift_end - setup_floor[product] - job_duration
+        fits = False
+        passed = []
+        while ends:
+            end, m = ends[0]
+            if end != machine_end_times[m]:
+                heapreplace(ends, (machine_end_times[m], m))  # Stale: refresh lazily
+                continue
+            if end > latest_end:
+                break
+            if job_duration < overran[m].get(product, job_duration + 1):
+                if start_on(m, product, job_duration)[0] + job_duration <= shift_end:
+                    fits = True
+                    break
+                overran[m][product] = job_duration
+            passed.append(heappop(ends))
+        for entry in passed:
+            heappush(ends, entry)
+        if not fits:
+            unassigned_count += 1
+            violations.append(f"Job {instance.job_ids[idx]} could not be assigned in Bottleneck optim.")
+            continue
+
+        # Least-loaded candidate the job fits on (ties in machine-set order)
+        too_late = []  # Up-to-date entries the job does not fit on (restored below)
+        while heap:
+            load, r, m = heap[0]
+            if load != machine_loads[m]:
+                heapreplace(heap, (machine_loads[m], r, m))  # Stale: refresh lazily
+                continue
+            if machine_end_times[m] > full_after:
+                heappop(heap)
+                continue
+
+            job_start, setup_time = start_on(m, product, job_duration)
+            job_end = job_start + job_duration
+
+            # Check shift boundary
+            if job_end > shift_end:
+                too_late.append(heappop(heap))
+                continue
+
+            # Assign job
+            plan[machine_ids[m]].append(Slot(idx, job_start, job_end, setup_time))
+
+            machine_end_times[m] = job_end
+            # Update load tracking for bottleneck calculation
+            machine_loads[m] += setup_time + job_duration
+            machine_last_product[m] = product
+            overran[m] = {}
+            heapreplace(heap, (machine_loads[m], r, m))
+            break
+
+        for entry in too_late:
+            heappush(heap, entry)
+
+    machine_index = {mid: m for m, mid in enumerate(machine_ids)}
+    loads = {mid: machine_loads[machine_index[mid]] for mid in all_machine_ids}
+    return dict(plan), violations, {"machine_loads": loads, "unassigned_count": unassigned_count}
 
 class BottleneckAgent:
     def __init__(self):
@@ -16,7 +164,7 @@ class BottleneckAgent:
             api_key=os.getenv("GROQ_API_KEY")
         )
 
-    async def optimize(self, jobs, downtimes, constraints):
+    async def optimize(self, jobs, downtimes, constraints, validate=True, instance=None, wait_explanation=True):
         """
         BOTTLENECK AGENT (from architecture):
         - Detects machines with excessive load
@@ -25,128 +173,41 @@ class BottleneckAgent:
         - Prioritizes Rush jobs always
         """
         print("[Bottleneck Agent] Optimizing for bottleneck relief...")
+        instance = instance or ProblemInstance(jobs, downtimes, constraints)
         
-        # Get all unique machine IDs from jobs
-        all_machine_ids = set()
-        for job in jobs:
-            all_machine_ids.update(job.machine_options)
-        
-        machine_loads = {mid: 0 for mid in all_machine_ids}
-        schedules = defaultdict(list)
-        unassigned_count = 0
-        violations = []
-
-        shift_start = parse_time(constraints.start_time)
-        shift_end = parse_time(constraints.end_time)
-
-        sorted_jobs = sorted(jobs, key=lambda j: (
-            0 if j.priority.lower() == 'rush' else 1,
-            j.due_time or "23:59"
-        ))
-
-        machine_last_product = {mid: None for mid in all_machine_ids}
-        machine_end_times = {mid: shift_start for mid in all_machine_ids}  # Track actual end time, not just load
-
-        for job in sorted_jobs:
-            candidates = [mid for mid in all_machine_ids if mid in job.machine_options]
-            if not candidates:
-                unassigned_count += 1
-                violations.append(f"Job {job.job_id} has no compatible machines.")
-                continue
-
-            # Sort by current load (least-loaded first)
-            candidates.sort(key=lambda mid: machine_loads[mid])
-
-            assigned = False
-            for mid in candidates:
-                last_product = machine_last_product[mid]
-
-                # Setup penalty - 10 min if product types differ
-                setup_time = 0
-                if last_product and last_product != job.product_type:
-                    setup_time = 10
-
-                # Current end time for this machine (ACTUAL end time, not accumulated load)
-                current_end = machine_end_times[mid]
-                
-                # Job starts AFTER setup time (setup is a gap, not part of job)
-                job_start = current_end + timedelta(minutes=setup_time)
-                job_duration = timedelta(minutes=job.processing_time)
-
-                # Check downtime - job must fit after setup
-                job_start = self.skip_downtime(mid, job_start, job_duration, downtimes)
-
-                job_end = job_start + job_duration
-
-                # Check shift boundary
-                if job_end > shift_end:
-                    continue
-
-                # Assign job
-                scheduled_job = ScheduledJob(
-                    job_id=job.job_id,
-                    machine_id=mid,
-                    start_time=job_start.strftime("%H:%M"),
-                    end_time=job_end.strftime("%H:%M"),
-                    product_type=job.product_type,
-                    is_setup=False,
-                    notes=f"Setup: {setup_time}min" if setup_time > 0 else None
-                )
-                schedules[mid].append(scheduled_job)
-
-                # Update machine end time to ACTUAL end of this job
-                machine_end_times[mid] = job_end
-                
-                # Update load tracking for bottleneck calculation
-                total_time_used = setup_time + job.processing_time
-                machine_loads[mid] = machine_loads[mid] + total_time_used
-                
-                machine_last_product[mid] = job.product_type
-                assigned = True
-                break
-
-            if not assigned:
-                unassigned_count += 1
-                violations.append(f"Job {job.job_id} could not be assigned in Bottleneck optim.")
-
-        # Calculate KPIs
-        kpis = calculate_kpis(schedules, jobs)
-        
-        # Validate constraints
-        constraint_agent = ConstraintAgent()
-        constraint_violations = constraint_agent.validate(schedules, jobs, downtimes, constraints)
-        violations.extend(constraint_violations)
+        # Scheduling, KPIs and validation run on the scheduler executor
+        plan, kpis, violations, details = await run_schedule(schedule_least_loaded, instance, validate)
         
-        explanation = await self._generate_explanation(kpis, machine_loads)
+        # Explanation inputs are exactly the prompt values (memoized by fingerprint)
+        loads = details["machine_loads"]
+        explanation_inputs = {
+            "makespan": kpis.makespan,
+            "load_str": ", ".join([f"{k}: {loads[k]} min" for k in sorted(loads)]),
+            "bottleneck": kpis.bottleneck_machine
+        }
+        explanation, explanation_id, explanation_status = await resolve_explanation(
+            "bottleneck", explanation_inputs,
+            lambda: self._generate_explanation(explanation_inputs),
+            lambda e: f"Error generating explanation: {str(e)}",
+            wait_explanation
+        )
 
-        return AgentResult(
+        result = AgentResult(
             agent_name=self.name,
-            schedules=schedules,
+            schedules=instance.to_schedules(plan, setup_notes=True),
             kpis=kpis,
             explanation=explanation,
-            violations=violations
+            violations=violations,
+            violation_counts=details.get("violation_counts", {}),
+            explanation_id=explanation_id,
+            explanation_status=explanation_status
         )
+        result._plan = plan
+        return result
 
-    def skip_downtime(self, mid, start, dur_td, downtimes):
-        """Push start time past any downtimes on this machine."""
-        def parse_time(t_str):
-            return datetime.strptime(t_str, "%H:%M").replace(
-                year=start.year, month=start.month, day=start.day
-            )
-
-        dts = sorted([d for d in downtimes if d.machine_id == mid], key=lambda x: x.start_time)
-        for dt in dts:
-            dt_s = parse_time(dt.start_time)
-            dt_e = parse_time(dt.end_time)
-            if dt_s <= start < dt_e: start = dt_e
-            elif start < dt_s < (start + dur_td): start = dt_e
-        return start
-
-    async def _generate_explanation(self, kpis, loads):
-        try:
-            load_str = ", ".join([f"{k}: {v} min" for k,v in loads.items()])
-            prompt = ChatPromptTemplate.from_template(
-                """
+    async def _generate_explanation(self, inputs):
+        prompt = ChatPromptTemplate.from_template(
+            """
 You are a Bottleneck Analysis & Load Balancing Agent for pharmaceutical production. Provide a DETAILED explanation:
 
 BOTTLENECK AGENT ANALYSIS:
@@ -171,14 +232,8 @@ IMPLEMENTATION:
 RESULT:
 - Load balanced across pharmaceutical production lines
 - Bottlenecks minimized
-                """
-            )
-            chain = prompt | self.llm
-            res = await chain.ainvoke({
-                "makespan": kpis.makespan,
-                "load_str": load_str,
-                "bottleneck": kpis.bottleneck_machine
-            })
-            return res.content
-        except Exception as e:
-            return f"Error generating explanation: {str(e)}"
+            """
+        )
+        chain = prompt | self.llm
+        res = await chain.ainvoke(inputs)
+        return res.content
@@ -1,7 +1,14 @@
+from itertools import chain
 from typing import List, Dict
-from datetime import datetime
+
+import numpy as np
+
 from models.schemas import Job, MachineDowntime, ShiftConstraints, AgentResult, ScheduledJob
-from utils.kpi_calculator import parse_time
+from models.problem_instance import ProblemInstance, Plan
+from models.violation_report import (
+    ViolationReport, UNASSIGNED, SHIFT_OVERRUN, INCOMPATIBLE_MACHINE,
+    DOWNTIME_CONFLICT, OVERLAP, RUSH_LATE, SETUP_GAP
+)
 from .base_agent import BaseAgent
 
 class ConstraintAgent(BaseAgent):
@@ -16,7 +23,7 @@ class ConstraintAgent(BaseAgent):
     def __init__(self):
         super().__init__("Constraint Agent")
 
-    async def optimize(self, jobs, downtimes, constraints):
+    async def optimize(self, jobs, downtimes, constraints, validate=True):
         # Constraint agent doesn't optimize, it validates
         return AgentResult(
             agent_name=self.name,
@@ -33,6 +40,15 @@ class ConstraintAgent(BaseAgent):
         downtimes: List[MachineDowntime],
         constraints: ShiftConstraints
     ) -> List[str]:
+        """
+        Validate API schedules.
+        Compiles a ProblemInstance and delegates to validate_plan; callers that
+        already hold a compiled instance should call that directly.
+        """
+        instance = ProblemInstance(jobs, downtimes, constraints)
+        return self.validate_plan(instance, instance.plan_from_schedules(schedules))
+
+    def validate_plan(self, instance: ProblemInstance, plan: Plan) -> List[str]:
         """
         COMPREHENSIVE VALIDATION (from architecture):
         1. Job Assignment Check - all jobs assigned
@@ -41,65 +57,92 @@ class ConstraintAgent(BaseAgent):
         4. Downtime Conflict Check
         5. Time Overlap Check (same machine)
         6. Rush Job Deadline Check (CRITICAL)
+
+        Returns the violation messages; callers that only need counts
+        should use check_plan and skip the rendering.
+        """
+        return self.check_plan(instance, plan).render()
+
+    def check_plan(self, instance: ProblemInstance, plan: Plan) -> ViolationReport:
         """
-        violations = []
-        shift_end = parse_time(constraints.end_time)
-        shift_start = parse_time(constraints.start_time)
-        
-        job_map = {j.job_id: j for j in jobs}
-        
-        # 1. CHECK: All jobs assigned
-        scheduled_job_ids = set()
-        for job_list in schedules.values():
-            for s_job in job_list:
-                scheduled_job_ids.add(s_job.job_id)
-        
-        unassigned_jobs = [j.job_id for j in jobs if j.job_id not in scheduled_job_ids]
-        if unassigned_jobs:
-            violations.append(f"Not all jobs assigned. Missing: {', '.join(unassigned_jobs)}")
-        
-        # 2-6: Per-job checks
-        for m_id, job_list in schedules.items():
-            # Sort by start time for overlap detection
-            sorted_jobs = sorted(job_list, key=lambda x: parse_time(x.start_time))
-            
-            for idx, s_job in enumerate(sorted_jobs):
-                j_start = parse_time(s_job.start_time)
-                j_end = parse_time(s_job.end_time)
-                
-                original_job = job_map.get(s_job.job_id)
-                
-                # 2. CHECK: Shift boundary (no overtime in this version)
-                if j_end > shift_end:
-                    overtime_min = int((j_end - shift_end).total_seconds() / 60)
-                    violations.append(f"Job {s_job.job_id} on {m_id} ends at {s_job.end_time}, exceeds shift end by {overtime_min} min.")
-                
-                # 3. CHECK: Machine compatibility
-                if original_job and m_id not in original_job.machine_options:
-                    violations.append(f"Job {s_job.job_id} assigned to incompatible machine {m_id}.")
-
-                # 4. CHECK: Downtime conflicts
-                machine_downtimes = [dt for dt in downtimes if dt.machine_id == m_id]
-                for dt in machine_downtimes:
-                    dt_start = parse_time(dt.start_time)
-                    dt_end = parse_time(dt.end_time)
-                    
-                    if j_start < dt_end and j_end > dt_start:
-                        violations.append(f"Job {s_job.job_id} on {m_id} overlaps with downtime {dt.start_time}-{dt.end_time}.")
-                
-                # 5. CHECK: Time overlaps on same machine
-                if idx < len(sorted_jobs) - 1:
-                    next_job = sorted_jobs[idx + 1]
-                    next_start = parse_time(next_job.start_time)
-                    if j_end > next_start:
-                        overlap_min = int((j_end - next_start).total_seconds() / 60)
-                        violations.append(f"Job {s_job.job_id} overlaps with {next_job.job_id} on {m_id} by {overlap_min} min.")
-                
-                # 6. CHECK: Rush job deadlines (CRITICAL)
-                if original_job and original_job.priority == "Rush" and original_job.due_time:
-                    due = parse_time(original_job.due_time)
-                    if j_end > due:
-                        tardiness_min = int((j_end - due).total_seconds() / 60)
-                        violations.append(f"CRITICAL: Rush job {s_job.job_id} is {tardiness_min} min late (due {original_job.due_time}, ends {s_job.end_time})")
-                        
-        return violations
+        Run every check with array operations over all slots at once and
+        return structured violation records (see ViolationReport).
+        """
+        table = instance.table
+        machines = list(plan)
+        sizes = np.fromiter((len(plan[m_id]) for m_id in machines), dtype=np.int64, count=len(machines))
+        total = int(sizes.sum())
+        records: List[Dict[str, np.ndarray]] = []
+
+        # Slots as columns, sorted by (machine, start); the stable sort keeps
+        # plan order for equal starts, as the per-machine sorted() did
+        flat = np.fromiter(
+            chain.from_iterable(chain.from_iterable(plan[m_id] for m_id in machines)),
+            dtype=np.int64, count=4 * total
+        ).reshape(total, 4)
+        machine = np.repeat(np.arange(len(machines), dtype=np.int64), sizes)
+        order = np.lexsort((flat[:, 1], machine))
+        job, start, end = flat[order, 0], flat[order, 1], flat[order, 2]
+        machine = machine[order]
+        first_slot = np.cumsum(sizes) - sizes
+        pos = np.arange(total) - first_slot[machine]
+
+        def add(kind: int, rows: np.ndarray, **values):
+            if len(rows):
+                records.append(dict(
+                    kind=np.full(len(rows), kind), machine=machine[rows], pos=pos[rows],
+                    job=job[rows], end=end[rows], **values
+                ))
+
+        # 1. CHECK: All jobs assigned (by job ID, like the original set check)
+        scheduled = np.zeros(len(table), dtype=bool)
+        scheduled[table.job_rank[job]] = True
+        missing = np.flatnonzero(~scheduled[table.job_rank])
+        if len(missing):
+            records.append(dict(kind=np.full(len(missing), UNASSIGNED), job=missing))
+
+        # 2. CHECK: Shift boundary (no overtime in this version)
+        rows = np.flatnonzero(end > instance.shift_end)
+        add(SHIFT_OVERRUN, rows, value=end[rows] - instance.shift_end)
+
+        # 3. CHECK: Machine compatibility (bitset lookup)
+        machine_index = table.machine_index
+        table_machine = np.array([machine_index.get(m_id, -1) for m_id in machines], dtype=np.int64)
+        add(INCOMPATIBLE_MACHINE, np.flatnonzero(~table.compatible_pairs(job, table_machine[machine])))
+
+        # 4. CHECK: Downtime conflicts (searchsorted against merged windows)
+        for k in np.flatnonzero(sizes).tolist():
+            window_starts, window_ends = instance.downtimes.window_arrays(machines[k])
+            if not len(window_starts):
+                continue
+            segment = slice(first_slot[k], first_slot[k] + sizes[k])
+            first = np.searchsorted(window_ends, start[segment], side="right")
+            hits = np.maximum(np.searchsorted(window_starts, end[segment], side="left") - first, 0)
+            if not hits.any():
+                continue
+            rows = np.repeat(np.arange(sizes[k]), hits)
+            window = first[rows] + np.arange(len(rows)) - np.repeat(np.cumsum(hits) - hits, hits)
+            add(DOWNTIME_CONFLICT, rows + first_slot[k],
+                window_start=window_starts[window], window_end=window_ends[window])
+
+        # 5. CHECK: Time overlaps on same machine (with the next slot)
+        rows = np.flatnonzero((machine[:-1] == machine[1:]) & (end[:-1] > start[1:]))
+        add(OVERLAP, rows, value=end[rows] - start[rows + 1], other=job[rows + 1])
+
+        # 6. CHECK: Rush job deadlines (CRITICAL)
+        due = instance.due_offsets[job]
+        rows = np.flatnonzero(table.rush[job] & instance.has_due[job] & (end > due))
+        add(RUSH_LATE, rows, value=end[rows] - due[rows])
+
+        # 7. CHECK: Changeover time before each slot (plant setup matrix)
+        codes = table.product_code[job]
+        gap = start[1:] - end[:-1]
+        required = instance.setup.matrix[codes[:-1], codes[1:]]
+        rows = np.flatnonzero((machine[:-1] == machine[1:]) & (gap >= 0) & (gap < required)) + 1
+        add(SETUP_GAP, rows, value=gap[rows - 1], other=job[rows - 1], required=required[rows - 1])
+
+        columns = {
+            name: np.concatenate([r.get(name, np.full(len(r["kind"]), -1)) for r in records])
+            for name in ViolationReport.COLUMNS
+        } if records else None
+        return ViolationReport(instance, machines, columns)
@@ -0,0 +1,509 @@
+"""
+Genetic Agent - Island-model genetic algorithm with population-wide decoding
+
+The other agents build one schedule with a Python loop over jobs. A genetic
+algorithm needs thousands of schedules, so this agent encodes a schedule as
+a priority permutation (random keys, one float per job) plus a machine
+choice per job, and decodes a whole population at once: the decoder walks
+the dispatch positions once and advances every individual's machine clocks
+with NumPy array operations of shape (population,).
+
+Decoding is a serial schedule generation scheme matching the greedy agents
+(plant setup matrix gap after the previous job, then the earliest
+downtime-free start). A job that would end after the shift or make a rush
+job late is left unassigned instead, so every decoded schedule only pays
+the single "jobs left unassigned" violation of the selection objective.
+
+Key Features:
+    - Fitness = the supervisor's selection objective (KPI score minus 100
+      per violation), computed for the population from array totals
+    - Warm start: the best greedy schedule (or the orchestrator's plan) is
+      encoded as a seed individual; the result is never worse than it
+    - Biased uniform crossover, key noise and machine-reset mutation, elitism
+    - Islands evolve independently between ring migrations; on multi-core
+      hosts islands run in parallel worker processes (GENETIC_WORKERS) of a
+      long-lived pool, each receiving a run's decoder once
+    - Generation limit and wall-clock budget; trajectory of the best objective
+"""
+
+import os
+import time
+import uuid
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.schemas import Job, MachineDowntime, ShiftConstraints, AgentResult, TrajectoryPoint
+from models.problem_instance import ProblemInstance, Plan, Slot
+from config import settings
+from utils.executor import get_process_pool
+from utils.lower_bounds import early_stop_target, prepare_lower_bounds
+from .base_agent import BaseAgent, run_schedule
+from .local_search_agent import best_greedy_plan, selection_objective
+
+# Generations an island evolves between two migrations
+MIGRATION_INTERVAL = 5
+# Best individuals copied unchanged into the next generation (per island)
+ELITE = 2
+# Probability that a child gene comes from the fitter parent
+CROSSOVER_BIAS = 0.7
+# Expected mutated genes per child (keys and machine choices each)
+MUTATION_GENES = 4.0
+# Standard deviation of the noise added to a mutated key
+KEY_NOISE = 0.1
+# Share of each initial island made of perturbed copies of the seed
+SEED_SHARE = 0.5
+# Dispatch positions decoded between two deadline checks
+DEADLINE_CHECK_STEPS = 256
+# Decoders a worker process keeps (one per concurrent run)
+WORKER_DECODERS = 2
+
+_NEVER = np.iinfo(np.int64).max // 4  # Padding for missing due times and windows
+
+# Worker process side: run token -> decoder, oldest first
+_worker_decoders: Dict[str, "PopulationDecoder"] = {}
+
+
+class PopulationDecoder:
+    """
+    Instance columns as arrays for decoding populations of (keys, choices).
+
+    A population is `keys` (P, n) float64, whose argsort per row is the
+    dispatch order, and `choices` (P, n) int64, an index into each job's
+    machine options.
+    """
+
+    def __init__(self, instance: ProblemInstance):
+        table = instance.table
+        self.n_jobs = instance.num_jobs
+        self.machine_ids = sorted(table.machine_ids)
+        m_index = {mid: m for m, mid in enumerate(self.machine_ids)}
+        to_local = np.asarray([m_index[mid] for mid in table.machine_ids], dtype=np.int64)
+
+        self.shift_start = instance.shift_start
+        self.shift_end = instance.shift_end
+        self.product = np.asarray(instance.product_codes, dtype=np.int64)
+        self.duration = np.asarray(instance.processing, dtype=np.int64)
+        self.span = np.maximum(self.duration, 1)  # Zero-length jobs still may not start in a window
+        self.has_due = np.asarray(instance.has_due, dtype=bool)
+        self.due = np.where(self.has_due, instance.due_offsets, _NEVER).astype(np.int64)
+        self.rush_due = np.where(np.asarray(instance.rush, dtype=bool), self.due, _NEVER)
+        self.setup = instance.setup.matrix
+
+        # Machine options padded to the longest list
+        ptr, machines = table.option_ptr, to_local[table.option_machines]
+        self.n_options = np.diff(ptr)
+        width = max(1, int(self.n_options.max(initial=0)))
+        self.options = np.zeros((self.n_jobs, width), dtype=np.int64)
+        rows = np.repeat(np.arange(self.n_jobs), self.n_options)
+        self.options[rows, np.arange(len(machines)) - np.repeat(ptr[:-1], self.n_options)] = machines
+        self.placeable = self.n_options > 0
+
+        # Downtime windows per machine, padded with never-reached windows
+        windows = [instance.downtimes.window_arrays(mid) for mid in self.machine_ids]
+        width = max((len(starts) for starts, _ in windows), default=0)
+        self.window_start = np.full((len(self.machine_ids), width), _NEVER, dtype=np.int64)
+        self.window_end = np.full((len(self.machine_ids), width), _NEVER, dtype=np.int64)
+        for m, (starts, ends) in enumerate(windows):
+            self.window_start[m, :len(starts)] = starts
+            self.window_end[m, :len(ends)] = ends
+
+    def machines(self, choices: np.ndarray) -> np.ndarray:
+        """Local machine index of every job for (P, n) or (n,) choices (unplaceable jobs: 0)."""
+        return self.options[np.arange(self.n_jobs), choices]
+
+    def random_choices(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        return (rng.random((size, self.n_jobs)) * np.maximum(self.n_options, 1)).astype(np.int64)
+
+    def fitness(self, keys: np.ndarray, choices: np.ndarray, deadline: float = float("inf")) -> Optional[np.ndarray]:
+        """
+        Selection objective of every individual, or None if the deadline
+        passed while decoding.
+        """
+        size, n = keys.shape
+        rows = np.arange(size)
+        order = np.argsort(keys, axis=1, kind="stable")
+        machine_of = self.machines(choices)
+        n_machines = len(self.machine_ids)
+
+        end = np.full((size, n_machines), self.shift_start, dtype=np.int64)
+        last = np.full((size, n_machines), -1, dtype=np.int64)
+        setup_total = np.zeros(size, dtype=np.int64)
+        tardiness = np.zeros(size, dtype=np.int64)
+        assigned = np.zeros(size, dtype=np.int64)
+        setup_matrix, windows = self.setup, self.window_start.shape[1]
+
+        for t in range(n):
+            if t % DEADLINE_CHECK_STEPS == 0 and time.perf_counter() >= deadline:
+                return None
+            j = order[:, t]
+            m = machine_of[rows, j]
+            p = self.product[j]
+            prev = last[rows, m]
+            setup = np.where(prev >= 0, setup_matrix[prev, p], 0)
+            start = end[rows, m] + setup
+            for w in range(windows):
+                window_start, window_end = self.window_start[m, w], self.window_end[m, w]
+                start = np.where((window_start < start + self.span[j]) & (window_end > start), window_end, start)
+            finish = start + self.duration[j]
+            ok = self.placeable[j] & (finish <= self.shift_end) & (finish <= self.rush_due[j])
+
+            placed = rows[ok]
+            end[placed, m[ok]] = finish[ok]
+            last[placed, m[ok]] = p[ok]
+            setup_total += np.where(ok, setup, 0)
+            tardiness += np.where(ok, np.maximum(finish - self.due[j], 0), 0)
+            assigned += ok
+
+        # Same formula as SequenceState.objective / calculate_plan_kpis
+        loaded = last >= 0
+        counts = loaded.sum(axis=1)
+        loads = np.where(loaded, end - self.shift_start, 0).astype(np.float64)
+        safe = np.maximum(counts, 1)
+        mean = loads.sum(axis=1) / safe
+        variance = np.where(counts > 1, (loads * loads).sum(axis=1) / safe - mean * mean, 0.0)
+        completion_bonus = assigned / n * 40 if n > 0 else np.zeros(size)
+        score = np.maximum(
+            0.0,
+            completion_bonus + 60
+            - np.minimum(tardiness * 0.3, 30)
+            - np.minimum(setup_total * 0.2, 20)
+            - np.minimum(variance * 0.01, 10)
+        )
+        return score - 100 * (assigned < n)
+
+    def to_plan(self, instance: ProblemInstance, keys: np.ndarray, choices: np.ndarray) -> Plan:
+        """Decode one individual into a minute plan (same rules as fitness)."""
+        machine_of = self.machines(choices).tolist()
+        rows = instance.setup.rows
+        due, rush_due = self.due.tolist(), self.rush_due.tolist()
+        end = [self.shift_start] * len(self.machine_ids)
+        last: List[Optional[int]] = [None] * len(self.machine_ids)
+        plan: Plan = {}
+        for j in np.argsort(keys, kind="stable").tolist():
+            if not self.placeable[j]:
+                continue
+            m = machine_of[j]
+            mid = self.machine_ids[m]
+            p, duration = instance.product_codes[j], instance.processing[j]
+            setup = rows[last[m]][p] if last[m] is not None else 0
+            start = instance.downtimes.earliest_fit(mid, end[m] + setup, duration)
+            finish = start + duration
+            if finish > self.shift_end or finish > rush_due[j]:
+                continue
+            plan.setdefault(mid, []).append(Slot(j, start, finish, setup))
+            end[m], last[m] = finish, p
+        return plan
+
+    def encode(self, plan: Plan) -> Tuple[np.ndarray, np.ndarray]:
+        """Keys and choices that dispatch a plan's jobs in start order on the same machines."""
+        keys = np.full(self.n_jobs, 2.0)
+        choices = np.zeros(self.n_jobs, dtype=np.int64)
+        slots = sorted(
+            ((slot.start, slot.job, mid) for mid, machine_slots in plan.items() for slot in machine_slots)
+        )
+        m_index = {mid: m for m, mid in enumerate(self.machine_ids)}
+        for rank, (_, j, mid) in enumerate(slots):
+            keys[j] = rank / max(len(slots), 1)
+            matches = np.flatnonzero(self.options[j, :self.n_options[j]] == m_index.get(mid, -1))
+            if len(matches):
+                choices[j] = matches[0]
+        # Unassigned jobs go last, in job order
+        unassigned = np.flatnonzero(keys == 2.0)
+        keys[unassigned] = 1.0 + np.arange(len(unassigned)) / max(len(unassigned), 1)
+        return keys, choices
+
+
+def _evolve(
+    decoder: PopulationDecoder,
+    keys: np.ndarray,
+    choices: np.ndarray,
+    fitness: np.ndarray,
+    generations: int,
+    time_left: float,
+    seed: int,
+    stop_at: Optional[float] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """
+    Evolve a stack of islands, (I, S, n) keys and choices and (I, S)
+    fitness, for up to `generations` generations or until a child reaches
+    `stop_at`. Selection stays within each island, but the children of all
+    islands are decoded in one pass. Module-level so it can run in a worker
+    process.
+
+    Returns:
+        (keys, choices, fitness, completed generations)
+    """
+    deadline = time.perf_counter() + time_left
+    rng = np.random.default_rng(seed)
+    islands, size, n = keys.shape
+    children = size - ELITE
+    rate = min(1.0, MUTATION_GENES / max(n, 1))
+    island = np.arange(islands)[:, None]
+    done = 0
+
+    for _ in range(generations):
+        elite = np.argsort(-fitness, axis=1, kind="stable")[:, :ELITE]
+
+        # Binary tournaments inside each island; the fitter parent is `first`
+        def tournament() -> np.ndarray:
+            a, b = rng.integers(size, size=(2, islands, children))
+            return np.where(fitness[island, a] >= fitness[island, b], a, b)
+
+        first, second = tournament(), tournament()
+        inherit = rng.random((islands, children, n)) < CROSSOVER_BIAS
+        child_keys = np.where(inherit, keys[island, first], keys[island, second])
+        child_choices = np.where(inherit, choices[island, first], choices[island, second])
+
+        mutate = rng.random((islands, children, n)) < rate
+        child_keys = child_keys + mutate * rng.normal(0.0, KEY_NOISE, (islands, children, n))
+        reset = rng.random((islands, children, n)) < rate
+        child_choices = np.where(
+            reset, decoder.random_choices(rng, islands * children).reshape(islands, children, n), child_choices
+        )
+
+        child_fitness = decoder.fitness(
+            child_keys.reshape(-1, n), child_choices.reshape(-1, n), deadline
+        )
+        if child_fitness is None:
+            break
+        keys = np.concatenate([keys[island, elite], child_keys], axis=1)
+        choices = np.concatenate([choices[island, elite], child_choices], axis=1)
+        fitness = np.concatenate([fitness[island, elite], child_fitness.reshape(islands, children)], axis=1)
+        done += 1
+        if time.perf_counter() >= deadline or (stop_at is not None and child_fitness.max() >= stop_at - 1e-9):
+            break
+    return keys, choices, fitness, done
+
+
+def _evolve_in_worker(
+    token: str,
+    decoder: Optional[PopulationDecoder],
+    *args
+) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, int]]:
+    """
+    _evolve in a pool worker, with the run's decoder cached per process
+    under `token`. Without `decoder`, the cached one is used; returns None
+    if this worker has none yet (the caller resubmits with the decoder).
+    """
+    if decoder is None:
+        decoder = _worker_decoders.get(token)
+        if decoder is None:
+            return None
+    elif token not in _worker_decoders:
+        _worker_decoders[token] = decoder
+        while len(_worker_decoders) > WORKER_DECODERS:
+            del _worker_decoders[next(iter(_worker_decoders))]
+    return _evolve(decoder, *args)
+
+
+def schedule_genetic(
+    instance: ProblemInstance,
+    start_plan: Optional[Plan] = None,
+    time_budget: float = 2.0,
+    max_generations: int = 200,
+    population: int = 64,
+    islands: int = 4,
+    workers: int = 0,
+    seed: int = 0,
+    stop_at: Optional[float] = None
+) -> Tuple[Plan, List[str], Dict[str, Any]]:
+    """
+    GENETIC ALGORITHM over (priority keys, machine choices), seeded with
+    `start_plan` (default: the best greedy schedule).
+
+    Args:
+        time_budget: Wall-clock seconds for the whole search
+        max_generations: Generation limit
+        population: Individuals over all islands
+        islands: Independent sub-populations (ring migration every MIGRATION_INTERVAL generations)
+        workers: Worker processes sharing the islands (0 = up to one per island and CPU; 1 = in-process)
+        stop_at: Objective at which the search ends early (see utils.lower_bounds)
+    """
+    started = time.perf_counter()
+    deadline = started + time_budget
+    if start_plan is None:
+        start_plan = best_greedy_plan(instance)
+
+    decoder = PopulationDecoder(instance)
+    n = decoder.n_jobs
+    rng = np.random.default_rng(seed)
+    islands = max(1, min(islands, population // (ELITE + 2)))
+    size = max(ELITE + 2, population // islands)
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    workers = min(workers, islands)
+
+    # Initial islands: the seed, perturbed copies of it, and random individuals
+    seed_keys, seed_choices = decoder.encode(start_plan)
+    copies = max(1, int(size * SEED_SHARE))
+    keys = rng.random((islands, size, n))
+    choices = decoder.random_choices(rng, islands * size).reshape(islands, size, n)
+    keys[:, :copies] = seed_keys + rng.normal(0.0, KEY_NOISE / 10, (islands, copies, n))
+    keys[:, 0] = seed_keys
+    choices[:, :copies] = seed_choices
+
+    fitness = decoder.fitness(keys.reshape(-1, n), choices.reshape(-1, n), deadline)
+    generations = 0
+    start_objective = selection_objective(instance, start_plan)
+    best = start_objective
+    trajectory = [TrajectoryPoint(elapsed_ms=0.0, iteration=0, best_objective=round(best, 2))]
+    stopped_early = stop_at is not None and best >= stop_at - 1e-9
+
+    if fitness is not None and not stopped_early:
+        fitness = fitness.reshape(islands, size)
+        # Each worker evolves a contiguous group of islands
+        groups = np.array_split(np.arange(islands), workers)
+        # Worker processes get the decoder once per run (then only island arrays)
+        pool = get_process_pool(workers) if workers > 1 else None
+        token = uuid.uuid4().hex
+        sent = False
+        while generations < max_generations:
+            time_left = deadline - time.perf_counter()
+            if time_left <= 0:
+                break
+            epoch = min(MIGRATION_INTERVAL, max_generations - generations)
+            seeds = rng.integers(2 ** 32, size=len(groups)).tolist()
+            tasks = [
+                (keys[group], choices[group], fitness[group], epoch, time_left, s, stop_at)
+                for group, s in zip(groups, seeds)
+            ]
+            if pool is not None:
+                futures = [pool.submit(_evolve_in_worker, token, None if sent else decoder, *task) for task in tasks]
+                results = [future.result() for future in futures]
+                sent = True
+                for i, result in enumerate(results):
+                    if result is None:  # Ran on a worker without the decoder: resend it
+                        retry = tasks[i][:4] + (deadline - time.perf_counter(),) + tasks[i][5:]
+                        results[i] = pool.submit(_evolve_in_worker, token, decoder, *retry).result()
+            else:
+                results = [_evolve(decoder, *tasks[0])]
+            keys = np.concatenate([result[0] for result in results])
+            choices = np.concatenate([result[1] for result in results])
+            fitness = np.concatenate([result[2] for result in results])
+            done = min(result[3] for result in results)
+            generations += done
+
+            # Ring migration: each island's best replaces the next island's worst
+            if islands > 1:
+                rows = np.arange(islands)
+                best_idx, worst_idx = fitness.argmax(axis=1), fitness.argmin(axis=1)
+                source = np.roll(rows, 1)
+                keys[rows, worst_idx] = keys[source, best_idx[source]]
+                choices[rows, worst_idx] = choices[source, best_idx[source]]
+                fitness[rows, worst_idx] = fitness[source, best_idx[source]]
+
+            if fitness.max() > best + 1e-9:
+                best = float(fitness.max())
+                trajectory.append(TrajectoryPoint(
+                    elapsed_ms=round((time.perf_counter() - started) * 1000, 1),
+                    iteration=generations, best_objective=round(best, 2)
+                ))
+            stopped_early = stop_at is not None and best >= stop_at - 1e-9
+            if done < epoch or stopped_early:
+                break
+
+        winner, position = np.unravel_index(int(fitness.argmax()), fitness.shape)
+        plan = decoder.to_plan(instance, keys[winner, position], choices[winner, position])
+    else:
+        plan = start_plan
+
+    # Decoding may drop or shift jobs of the start plan; never return anything worse than it
+    final_objective = selection_objective(instance, plan)
+    if final_objective < start_objective:
+        plan, final_objective = start_plan, start_objective
+
+    elapsed = time.perf_counter() - started
+    trajectory.append(TrajectoryPoint(
+        elapsed_ms=round(elapsed * 1000, 1), iteration=generations, best_objective=round(final_objective, 2)
+    ))
+    assigned = {slot.job for slots in plan.values() for slot in slots}
+    unassigned = [job_id for j, job_id in enumerate(instance.job_ids) if j not in assigned]
+    violations = [f"Job {job_id} could not be assigned in Genetic optim." for job_id in unassigned]
+    details = {
+        "generations": generations,
+        "islands": islands,
+        "island_size": size,
+        "workers": workers,
+        "evaluations": islands * (size + generations * (size - ELITE)),
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "start_objective": round(start_objective, 2),
+        "final_objective": round(final_objective, 2),
+        "stopped_early": stopped_early,
+        "unassigned_count": len(unassigned),
+        "trajectory": trajectory
+    }
+    return plan, violations, details
+
+
+class GeneticAgent(BaseAgent):
+    """
+    GENETIC AGENT:
+    - Evolves priority permutations + machine choices in islands
+    - Decodes and scores whole populations with array operations
+    - Seeded with the best greedy schedule; never returns a worse one
+    - Bounded by GENETIC_TIME_BUDGET seconds and GENETIC_MAX_GENERATIONS
+    """
+    def __init__(self, time_budget: Optional[float] = None, max_generations: Optional[int] = None, seed: int = 0):
+        super().__init__("Genetic Agent")
+        self.time_budget = time_budget if time_budget is not None else settings.GENETIC_TIME_BUDGET
+        self.max_generations = max_generations if max_generations is not None else settings.GENETIC_MAX_GENERATIONS
+        self.seed = seed
+
+    async def optimize(
+        self,
+        jobs: List[Job],
+        downtimes: List[MachineDowntime],
+        constraints: ShiftConstraints,
+        validate: bool = True,
+        instance: Optional[ProblemInstance] = None,
+        start_plan: Optional[Plan] = None,
+        time_budget: Optional[float] = None
+    ) -> AgentResult:
+        self.log("Evolving schedules with the genetic algorithm...")
+        if instance is None:
+            instance = ProblemInstance(jobs, downtimes, constraints)
+        budget = time_budget if time_budget is not None else self.time_budget
+
+        stop_at = early_stop_target(await prepare_lower_bounds(instance))
+        scheduler = partial(
+            schedule_genetic,
+            start_plan=start_plan,
+            time_budget=budget,
+            max_generations=self.max_generations,
+            population=settings.GENETIC_POPULATION,
+            islands=settings.GENETIC_ISLANDS,
+            workers=settings.GENETIC_WORKERS,
+            seed=self.seed,
+            stop_at=stop_at
+        )
+        plan, kpis, violations, details = await run_schedule(scheduler, instance, validate)
+        self.log(
+            f"{details['generations']} generations x {details['islands']} islands on {details['workers']} worker(s), "
+            f"objective {details['start_objective']} -> {details['final_objective']}"
+        )
+
+        explanation = f"""**Genetic Algorithm Strategy**
+
+The agent evolved {details['islands']} islands of {details['island_size']} schedules for
+{details['generations']} generations in {details['elapsed_ms'] / 1000:.1f}s ({details['evaluations']:,} schedules scored).
+Each schedule is a job priority order plus a machine choice per job; jobs that would overrun the
+shift or make a rush job late are left unassigned.
+
+- Selection objective: {details['start_objective']} -> {details['final_objective']}
+- Setup time: {kpis.total_setup_time} min, tardiness: {kpis.total_tardiness} min
+- Jobs completed: {kpis.completed_jobs}/{kpis.total_jobs}
+"""
+
+        result = AgentResult(
+            agent_name=self.name,
+            schedules=instance.to_schedules(plan, setup_notes=True),
+            kpis=kpis,
+            explanation=explanation,
+            violations=violations,
+            violation_counts=details.get("violation_counts", {}),
+            trajectory=details["trajectory"]
+        )
+        result._plan = plan
+        return result
@@ -0,0 +1,425 @@
+import random
+import time
+from bisect import bisect_right
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+from models.schemas import Job, MachineDowntime, ShiftConstraints, AgentResult
+from models.problem_instance import ProblemInstance, Plan, Slot
+from utils.kpi_calculator import calculate_plan_kpis
+from utils.lower_bounds import early_stop_target, prepare_lower_bounds
+from config import settings
+from .base_agent import BaseAgent, run_schedule
+from .baseline_agent import schedule_fcfs
+from .batching_agent import schedule_batches
+from .bottleneck_agent import schedule_least_loaded
+
+# Neighbourhoods and their cumulative selection probabilities
+MOVES = ("insert", "swap", "move", "exchange", "unassign")
+MOVE_THRESHOLDS = (0.30, 0.50, 0.85, 0.95, 1.0)
+
+def selection_objective(instance: ProblemInstance, plan: Plan) -> float:
+    """The supervisor's selection score: KPI score minus 100 per violation."""
+    from .constraint_agent import ConstraintAgent
+
+    score = calculate_plan_kpis(instance, plan).score
+    return score - 100 * len(ConstraintAgent().check_plan(instance, plan))
+
+def best_greedy_plan(instance: ProblemInstance) -> Plan:
+    """Best of the three greedy constructors under the selection objective."""
+    plans = [scheduler(instance)[0] for scheduler in (schedule_fcfs, schedule_batches, schedule_least_loaded)]
+    return max(plans, key=lambda plan: selection_objective(instance, plan))
+
+class SequenceState:
+    """
+    Per-machine job sequences with incremental (delta) evaluation.
+
+    Every machine keeps, per position, the running state after that job:
+    (end, setup minutes, tardiness, shift overruns, late rush jobs). Changing a
+    sequence from position k only re-decodes the suffix from k, and the
+    plan-level totals (including the load variance, via integer sum and sum
+    of squares of machine loads) are updated by difference, so a move costs
+    O(suffix) instead of a full calculate_kpis pass.
+
+    Decoding matches the greedy agents: the plant setup matrix gap after
+    the previous job, then the earliest downtime-free start.
+    """
+
+    def __init__(self, instance: ProblemInstance, plan: Plan):
+        self.instance = instance
+        self.n_jobs = instance.num_jobs
+
+        self.machine_ids = sorted(instance.table.machine_ids)
+        m_index = {mid: m for m, mid in enumerate(self.machine_ids)}
+
+        # Interned per-job columns
+        self.product = instance.product_codes
+        self.setup_rows = instance.setup.rows
+        self.duration = instance.processing
+        self.due = instance.due
+        self.rush_due = [d if r else None for d, r in zip(instance.due, instance.rush)]
+        # Table machine index -> this state's (sorted) machine index
+        to_local = [m_index[mid] for mid in instance.table.machine_ids]
+        self.options = [[to_local[m] for m in options] for options in instance.table.option_lists]
+        self.has_downtime = [bool(instance.downtimes.windows(mid)) for mid in self.machine_ids]
+
+        # Sequences from the start plan (ordered by start time)
+        self.seq: List[List[int]] = [[] for _ in self.machine_ids]
+        self.loc = [-1] * self.n_jobs  # machine index, -1 = unassigned
+        for mid, slots in plan.items():
+            m = m_index.get(mid)
+            if m is None:
+                continue
+            for slot in sorted(slots, key=lambda s: s.start):
+                self.seq[m].append(slot.job)
+                self.loc[slot.job] = m
+
+        self.states: List[List[Tuple[int, int, int, int, int]]] = [
+            self.decode(m, seq, 0) for m, seq in enumerate(self.seq)
+        ]
+
+        # Plan-level totals
+        self.setup_time = self.tardiness = self.overruns = self.late_rush = 0
+        self.loaded = self.load_sum = self.load_sq = 0
+        self.assigned = sum(len(seq) for seq in self.seq)
+        for states in self.states:
+            self._add(states, 1)
+
+    def decode(self, m: int, seq: List[int], k: int) -> List[Tuple[int, int, int, int, int]]:
+        """Running states for positions k.. of `seq` on machine m (prefix < k unchanged)."""
+        instance = self.instance
+        if k > 0:
+            t, su, tard, over, late = self.states[m][k - 1]
+            prev = self.product[seq[k - 1]]
+        else:
+            t, su, tard, over, late = instance.shift_start, 0, 0, 0, 0
+            prev = None
+
+        product, duration, due, rush_due = self.product, self.duration, self.due, self.rush_due
+        setup_rows = self.setup_rows
+        shift_end = instance.shift_end
+        fit = partial(instance.downtimes.earliest_fit, self.machine_ids[m]) if self.has_downtime[m] else None
+
+        out = []
+        for i in range(k, len(seq)):
+            j = seq[i]
+            p = product[j]
+            start = t
+            if prev is not None:
+                setup = setup_rows[prev][p]
+                start += setup
+                su += setup
+            if fit is not None:
+                start = fit(start, duration[j])
+            t = start + duration[j]
+            d = due[j]
+            if d is not None and t > d:
+                tard += t - d
+            if t > shift_end:
+                over += 1
+            d = rush_due[j]
+            if d is not None and t > d:
+                late += 1
+            out.append((t, su, tard, over, late))
+            prev = p
+        return out
+
+    def _add(self, states, sign: int):
+        """Add (sign=1) or remove (sign=-1) one machine's totals."""
+        if not states:
+            return
+        end, su, tard, over, late = states[-1]
+        load = end - self.instance.shift_start
+        self.setup_time += sign * su
+        self.tardiness += sign * tard
+        self.overruns += sign * over
+        self.late_rush += sign * late
+        self.loaded += sign
+        self.load_sum += sign * load
+        self.load_sq += sign * load * load
+
+    def _totals(self) -> Tuple[int, ...]:
+        return (
+            self.setup_time, self.tardiness, self.overruns, self.late_rush,
+            self.loaded, self.load_sum, self.load_sq, self.assigned
+        )
+
+    def objective(self) -> float:
+        """Selection objective from the running totals (same formula as calculate_plan_kpis)."""
+        n = self.n_jobs
+        completion_bonus = (self.assigned / n) * 40 if n > 0 else 0
+        tardiness_penalty = min(self.tardiness * 0.3, 30)
+        setup_penalty = min(self.setup_time * 0.2, 20)
+        variance = 0.0
+        if self.loaded > 1:
+            mean = self.load_sum / self.loaded
+            variance = self.load_sq / self.loaded - mean * mean
+        balance_penalty = min(variance * 0.01, 10)
+        score = max(0.0, completion_bonus + 60 - tardiness_penalty - setup_penalty - balance_penalty)
+        violations = (1 if self.assigned < n else 0) + self.overruns + self.late_rush
+        return score - 100 * violations
+
+    def try_change(self, changes: List[Tuple[int, List[int], int]], assigned_delta: int = 0) -> Tuple[float, list]:
+        """
+        Objective after replacing machine sequences, without committing.
+
+        Args:
+            changes: (machine, new sequence, first changed position)
+            assigned_delta: Change in the number of assigned jobs
+
+        Returns:
+            (objective, undo-able patch to pass to commit)
+        """
+        saved = self._totals()
+        patch = []
+        for m, seq, k in changes:
+            new_states = self.states[m][:k] + self.decode(m, seq, k)
+            self._add(self.states[m], -1)
+            self._add(new_states, 1)
+            patch.append((m, seq, new_states, self.states[m]))
+        self.assigned += assigned_delta
+        value = self.objective()
+        # Roll the totals back; commit re-applies them
+        (
+            self.setup_time, self.tardiness, self.overruns, self.late_rush,
+            self.loaded, self.load_sum, self.load_sq, self.assigned
+        ) = saved
+        return value, patch
+
+    def commit(self, patch: list, assigned_delta: int = 0):
+        for m, seq, new_states, old_states in patch:
+            self._add(old_states, -1)
+            self._add(new_states, 1)
+            self.seq[m] = seq
+            self.states[m] = new_states
+            for j in seq:
+                self.loc[j] = m
+        self.assigned += assigned_delta
+
+    def propose(self, rng: random.Random, movable: List[int]) -> Optional[Tuple[str, int, list, int]]:
+        """
+        Sample one random neighbour (see MOVES) without evaluating it.
+
+        Returns:
+            (move, job, changes for try_change, assigned delta), or None
+            when the sampled move does not apply
+        """
+        seq, loc, options = self.seq, self.loc, self.options
+        r = rng.random()
+        move = MOVES[bisect_right(MOVE_THRESHOLDS, r)]
+        j = movable[rng.randrange(len(movable))]
+        m1 = loc[j]
+        assigned_delta = 0
+
+        if move in ("insert", "swap"):
+            if m1 < 0 or len(seq[m1]) < 2:
+                return None
+            s = seq[m1]
+            i = s.index(j)
+            target = rng.randrange(len(s) - 1)
+            if target >= i:
+                target += 1
+            new = list(s)
+            if move == "insert":
+                new.insert(target, new.pop(i))
+            else:
+                new[i], new[target] = new[target], new[i]
+            changes = [(m1, new, min(i, target))]
+
+        elif move == "move":
+            # Relocate to another compatible machine (or assign an unassigned job)
+            m2 = options[j][rng.randrange(len(options[j]))]
+            if m2 == m1:
+                return None
+            target = rng.randrange(len(seq[m2]) + 1)
+            new2 = list(seq[m2])
+            new2.insert(target, j)
+            changes = [(m2, new2, target)]
+            if m1 >= 0:
+                i = seq[m1].index(j)
+                changes.append((m1, seq[m1][:i] + seq[m1][i + 1:], i))
+            else:
+                assigned_delta = 1
+
+        elif move == "exchange":
+            # Swap two jobs between machines that both can run
+            if m1 < 0:
+                return None
+            m2 = options[j][rng.randrange(len(options[j]))]
+            if m2 == m1 or not seq[m2]:
+                return None
+            i2 = rng.randrange(len(seq[m2]))
+            other = seq[m2][i2]
+            if m1 not in options[other]:
+                return None
+            i1 = seq[m1].index(j)
+            new1, new2 = list(seq[m1]), list(seq[m2])
+            new1[i1], new2[i2] = other, j
+            changes = [(m1, new1, i1), (m2, new2, i2)]
+
+        else:  # unassign: drop a job that only causes violations
+            if m1 < 0:
+                return None
+            i = seq[m1].index(j)
+            changes = [(m1, seq[m1][:i] + seq[m1][i + 1:], i)]
+            assigned_delta = -1
+
+        return move, j, changes, assigned_delta
+
+    def apply(self, move: str, j: int, patch: list, assigned_delta: int = 0):
+        """Commit a proposed move evaluated with try_change."""
+        self.commit(patch, assigned_delta)
+        if move == "unassign":
+            self.loc[j] = -1
+
+    def to_plan(self) -> Plan:
+        """Decode the sequences into a minute plan with setup annotations."""
+        instance = self.instance
+        plan: Plan = {}
+        for m, seq in enumerate(self.seq):
+            if not seq:
+                continue
+            mid = self.machine_ids[m]
+            slots = []
+            t, prev = instance.shift_start, None
+            for j in seq:
+                setup = self.setup_rows[prev][self.product[j]] if prev is not None else 0
+                start = instance.downtimes.earliest_fit(mid, t + setup, self.duration[j])
+                t = start + self.duration[j]
+                slots.append(Slot(j, start, t, setup))
+                prev = self.product[j]
+            plan[mid] = slots
+        return plan
+
+def schedule_local_search(
+    instance: ProblemInstance,
+    start_plan: Optional[Plan] = None,
+    time_budget: float = 1.0,
+    seed: int = 0,
+    max_moves: Optional[int] = None,
+    stop_at: Optional[float] = None
+) -> Tuple[Plan, List[str], Dict[str, Any]]:
+    """
+    LOCAL SEARCH: hill climbing over swap, insert and inter-machine moves,
+    starting from `start_plan` (default: the best greedy schedule).
+
+    Moves are sampled at random and accepted when they do not lower the
+    selection objective (sideways moves let the search cross plateaus).
+    Stops after `time_budget` seconds or `max_moves` attempted moves, or
+    once the objective reaches `stop_at` (see utils.lower_bounds).
+    """
+    started = time.perf_counter()
+    if start_plan is None:
+        start_plan = best_greedy_plan(instance)
+
+    state = SequenceState(instance, start_plan)
+    rng = random.Random(seed)
+    movable = [j for j in range(state.n_jobs) if state.options[j]]
+    current = state.objective()
+    start_objective = current
+
+    tried = accepted = improved = 0
+    deadline = started + time_budget
+    limit = max_moves if max_moves is not None else float("inf")
+    stopped_early = stop_at is not None and current >= stop_at - 1e-9
+
+    while movable and tried < limit and not stopped_early:
+        if tried & 255 == 0 and time.perf_counter() >= deadline:
+            break
+        tried += 1
+
+        proposal = state.propose(rng, movable)
+        if proposal is None:
+            continue
+        move, j, changes, assigned_delta = proposal
+
+        value, patch = state.try_change(changes, assigned_delta)
+        if value >= current - 1e-9:
+            state.apply(move, j, patch, assigned_delta)
+            accepted += 1
+            if value > current + 1e-9:
+                improved += 1
+                stopped_early = stop_at is not None and value >= stop_at - 1e-9
+            current = value
+
+    plan = state.to_plan()
+    # Decoding may shift the start plan; never return anything worse than it
+    if selection_objective(instance, plan) < selection_objective(instance, start_plan):
+        plan = start_plan
+
+    elapsed = time.perf_counter() - started
+    assigned = {slot.job for slots in plan.values() for slot in slots}
+    unassigned = [job_id for j, job_id in enumerate(instance.job_ids) if j not in assigned]
+    violations = [f"Job {job_id} could not be assigned in Local Search optim." for job_id in unassigned]
+    details = {
+        "moves_tried": tried,
+        "moves_accepted": accepted,
+        "improvements": improved,
+        "moves_per_second": round(tried / elapsed) if elapsed > 0 else 0,
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "start_objective": round(start_objective, 2),
+        "final_objective": round(current, 2),
+        "stopped_early": stopped_early,
+        "unassigned_count": len(unassigned)
+    }
+    return plan, violations, details
+
+class LocalSearchAgent(BaseAgent):
+    """
+    LOCAL SEARCH AGENT:
+    - Improves a greedy schedule instead of constructing one
+    - Swap / insert within a machine, move / exchange between compatible machines
+    - Delta evaluation of every move (see SequenceState)
+    - Bounded by a wall-clock budget (LOCAL_SEARCH_TIME_BUDGET seconds)
+    """
+    def __init__(self, time_budget: Optional[float] = None, seed: int = 0):
+        super().__init__("Local Search Agent")
+        self.time_budget = time_budget if time_budget is not None else settings.LOCAL_SEARCH_TIME_BUDGET
+        self.seed = seed
+
+    async def optimize(
+        self,
+        jobs: List[Job],
+        downtimes: List[MachineDowntime],
+        constraints: ShiftConstraints,
+        validate: bool = True,
+        instance: Optional[ProblemInstance] = None,
+        start_plan: Optional[Plan] = None,
+        time_budget: Optional[float] = None
+    ) -> AgentResult:
+        self.log("Improving schedule with local search...")
+        if instance is None:
+            instance = ProblemInstance(jobs, downtimes, constraints)
+        budget = time_budget if time_budget is not None else self.time_budget
+
+        stop_at = early_stop_target(await prepare_lower_bounds(instance))
+        scheduler = partial(
+            schedule_local_search, start_plan=start_plan, time_budget=budget, seed=self.seed,
+            stop_at=stop_at
+        )
+        plan, kpis, violations, details = await run_schedule(scheduler, instance, validate)
+        self.log(
+            f"{details['moves_tried']} moves ({details['moves_per_second']}/s), "
+            f"{details['improvements']} improvements, objective {details['start_objective']} -> {details['final_objective']}"
+        )
+
+        explanation = f"""**Local Search Strategy**
+
+Starting from the best greedy schedule, the agent tried {details['moves_tried']:,} swap, insert and
+inter-machine moves in {details['elapsed_ms'] / 1000:.1f}s ({details['moves_per_second']:,} moves/s) and kept
+{details['improvements']} improvements.
+
+- Selection objective: {details['start_objective']} -> {details['final_objective']}
+- Setup time: {kpis.total_setup_time} min, tardiness: {kpis.total_tardiness} min
+- Jobs completed: {kpis.completed_jobs}/{kpis.total_jobs}
+"""
+
+        result = AgentResult(
+            agent_name=self.name,
+            schedules=instance.to_schedules(plan, setup_notes=True),
+            kpis=kpis,
+            explanation=explanation,
+            violations=violations,
+            violation_counts=details.get("violation_counts", {})
+        )
+        result._plan = plan
+        return result
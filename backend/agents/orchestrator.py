@@ -1,15 +1,67 @@
 import asyncio
-from typing import List, Dict
+from typing import Any, List, Dict, Optional, Tuple, Union
 from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
 
-from models.schemas import Job, MachineDowntime, ShiftConstraints, AgentResult, ComparisonResponse
-from .base_agent import BaseAgent
+from models.schemas import (
+    Job, MachineDowntime, ShiftConstraints, AgentResult, ComparisonResponse, PortfolioReport, StrategyRun
+)
+from models.job_table import JobTable
+from models.problem_instance import ProblemInstance
+from .base_agent import BaseAgent, validate_schedule
 from .baseline_agent import BaselineAgent
 from .batching_agent import BatchingAgent
 from .bottleneck_agent import BottleneckAgent
 from .constraint_agent import ConstraintAgent
+from .local_search_agent import LocalSearchAgent
+from .annealing_agent import AnnealingAgent
+from .genetic_agent import GeneticAgent
+from .exact_agent import ExactAgent
 from config import settings
+from utils.job_manager import ProgressCallback
+from utils.explanation_service import explanation_service, resolve_explanation
+from utils.result_cache import result_cache, request_fingerprint
+from utils.lower_bounds import candidate_bound, prepare_lower_bounds
+from utils.executor import run_cpu_bound
+
+# Share of the remaining portfolio time given to anytime strategies
+ANYTIME_BUDGET_SHARE = 0.8
+
+def summarize_candidate(res: AgentResult) -> Dict[str, Any]:
+    """Compact progress payload for a finished candidate schedule."""
+    return {
+        "agent": res.agent_name,
+        "score": res.kpis.score,
+        "completed_jobs": res.kpis.completed_jobs,
+        "total_jobs": res.kpis.total_jobs,
+        "violations": len(res.violations)
+    }
+
+async def settle_explanations(results: List[AgentResult], progress: Optional[ProgressCallback] = None):
+    """
+    Wait for the background explanations of `results`, fill in their text
+    and report each one through `progress` as soon as it arrives.
+    """
+    by_id: Dict[str, List[AgentResult]] = {}
+    for res in results:
+        if res.explanation_id:
+            by_id.setdefault(res.explanation_id, []).append(res)
+    async for explanation_id, status, text in explanation_service.as_completed(by_id):
+        for res in by_id[explanation_id]:
+            if text is not None:
+                res.explanation = text
+            res.explanation_status = status
+            if progress:
+                progress("explanation", {
+                    "agent": res.agent_name,
+                    "explanation_id": explanation_id,
+                    "status": status,
+                    "text": res.explanation
+                })
+
+def selection_score(res: AgentResult) -> float:
+    """Supervisor Rule: weighted KPI score, minus 100 per constraint violation."""
+    return res.kpis.score - len(res.violations) * 100
 
 class OrchestratorAgent(BaseAgent):
     def __init__(self):
@@ -19,37 +71,277 @@ class OrchestratorAgent(BaseAgent):
         self.bottleneck = BottleneckAgent()
         self.constraint = ConstraintAgent()
         
+        # Additional candidates: key -> (agent, warm_start, anytime). Warm-started
+        # agents receive the best greedy plan as `start_plan`; anytime agents
+        # receive the remaining portfolio time as `time_budget`.
+        self.extra_candidates: Dict[str, Tuple[BaseAgent, bool, bool]] = {}
+        if settings.LOCAL_SEARCH_ENABLED:
+            self.register_candidate("local_search", LocalSearchAgent(), warm_start=True, anytime=True)
+        if settings.ANNEALING_ENABLED:
+            self.register_candidate("annealing", AnnealingAgent(), warm_start=True, anytime=True)
+        if settings.GENETIC_ENABLED:
+            self.register_candidate("genetic", GeneticAgent(), warm_start=True, anytime=True)
+        if settings.EXACT_ENABLED:
+            self.register_candidate("exact", ExactAgent(), warm_start=True, anytime=True)
+        
         self.llm = ChatGroq(
             api_key=settings.GROQ_API_KEY,
             model_name=settings.MODEL_NAME
         )
 
+    def register_candidate(self, key: str, agent: BaseAgent, warm_start: bool = False, anytime: bool = False):
+        """
+        Add a candidate strategy next to the three greedy agents.
+        
+        Args:
+            key: Name of the candidate in compare-all `extra_candidates`
+            agent: Agent whose optimize() accepts validate and instance
+            warm_start: Pass the best greedy plan as `start_plan`
+            anytime: Under a portfolio deadline, pass the remaining time as `time_budget`
+        """
+        self.extra_candidates[key] = (agent, warm_start, anytime)
+
     async def optimize(
         self, 
-        jobs: List[Job], 
+        jobs: Union[List[Job], JobTable], 
         downtimes: List[MachineDowntime], 
-        constraints: ShiftConstraints
+        constraints: ShiftConstraints,
+        progress: Optional[ProgressCallback] = None,
+        wait_explanations: bool = True,
+        time_budget: Optional[float] = None
     ) -> AgentResult:
         self.log("Orchestrating all agents...")
+        candidates, report = await self._evaluate_candidates(jobs, downtimes, constraints, progress, time_budget)
+        best_res = await self._supervise([res for res in candidates.values() if res is not None], progress)
+        best_res.portfolio = report
+        if wait_explanations:
+            await settle_explanations([best_res])
+        return best_res
+
+    async def compare_all(self, jobs, downtimes, constraints, progress=None, wait_explanations=True, time_budget=None) -> ComparisonResponse:
+        self.log("Comparing all agents...")
+        candidates, report = await self._evaluate_candidates(jobs, downtimes, constraints, progress, time_budget)
+        finished = [res for res in candidates.values() if res is not None]
+        best_res = await self._supervise(finished, progress)
+        best_res.portfolio = report
+        if wait_explanations:
+            await settle_explanations(finished + [best_res])
         
-        # Run all agents in parallel
-        results = await asyncio.gather(
-            self.baseline.optimize(jobs, downtimes, constraints),
-            self.batching.optimize(jobs, downtimes, constraints),
-            self.bottleneck.optimize(jobs, downtimes, constraints)
+        return ComparisonResponse(
+            baseline=candidates["baseline"],
+            batching=candidates["batching"],
+            bottleneck=candidates["bottleneck"],
+            orchestrated=best_res,
+            summary=best_res.explanation,
+            extra_candidates={key: candidates[key] for key in self.extra_candidates if candidates[key] is not None},
+            portfolio=report
         )
+
+    async def _evaluate_candidates(
+        self,
+        jobs: Union[List[Job], JobTable],
+        downtimes: List[MachineDowntime],
+        constraints: ShiftConstraints,
+        progress: Optional[ProgressCallback] = None,
+        time_budget: Optional[float] = None
+    ) -> Tuple[Dict[str, Optional[AgentResult]], PortfolioReport]:
+        """
+        Single evaluation stage: every specialist agent runs exactly once and
+        each schedule is validated exactly once. The same result objects feed
+        both the supervisor selection and the comparison response.
         
-        baseline_res, batching_res, bottleneck_res = results
+        Registered extra candidates run after the greedy agents; warm-started
+        ones improve the best greedy schedule.
         
-        # Validate all schedules
-        for res in results:
-            res.violations = self.constraint.validate(res.schedules, jobs, downtimes, constraints)
-            
+        With a time budget (argument, else PORTFOLIO_TIME_BUDGET) the
+        strategies race against a deadline: unfinished ones are cancelled
+        and come back as None (see _race).
+        
+        Candidates are cached by request content, so orchestrated and
+        compare-all calls for the same payload share one evaluation. Only
+        complete evaluations are cached, and only if no anytime strategy
+        was cut below its configured budget by the deadline: such weaker
+        results must not be served to requests without a budget.
+        
+        Returns:
+            (candidate key -> result or None, portfolio report)
+        """
+        if time_budget is None and settings.PORTFOLIO_TIME_BUDGET > 0:
+            time_budget = settings.PORTFOLIO_TIME_BUDGET
+        keys = ["baseline", "batching", "bottleneck"] + list(self.extra_candidates)
+        cache_key = ("candidates", request_fingerprint(jobs, downtimes, constraints), tuple(self.extra_candidates))
+        computed = False
+        
+        async def compute():
+            nonlocal computed
+            computed = True
+            # Compile the request once; every agent and the validator share it
+            instance = ProblemInstance(jobs, downtimes, constraints)
+            return await self._race(instance, progress, time_budget)
+        
+        if time_budget is None:
+            results, report = await result_cache.get_or_compute(cache_key, compute)
+        else:
+            cached = result_cache.get(cache_key)
+            if cached is not None:
+                results, report = cached
+            else:
+                results, report = await compute()
+                if all(res is not None for res in results) and not any(run.truncated for run in report.strategies):
+                    result_cache.put(cache_key, (results, report))
+        
+        if not computed:
+            self.log("Reusing cached candidate evaluation.")
+            report = report.model_copy(update={"cached": True, "time_budget": time_budget})
+            if progress:
+                for res in results:
+                    progress("candidate_done", dict(summarize_candidate(res), cached=True))
+                    progress("validation_done", {"agent": res.agent_name, "violations": len(res.violations)})
+        # Cached results are shared; hand out copies
+        return {key: res.model_copy() if res is not None else None for key, res in zip(keys, results)}, report
+
+    async def _race(
+        self,
+        instance: ProblemInstance,
+        progress: Optional[ProgressCallback],
+        time_budget: Optional[float]
+    ) -> Tuple[List[Optional[AgentResult]], PortfolioReport]:
+        """
+        Run the portfolio: the greedy agents concurrently, then the extra
+        candidates (warm-started from the best finished greedy schedule).
+        
+        Without a budget every strategy runs to completion and a failure
+        propagates. With one, whatever has not finished at the deadline is
+        cancelled; failures are reported instead of raised, and if nothing
+        has finished by then the first strategy to finish is awaited.
+        Cancelling stops waiting: a strategy already running on the thread
+        or process executor completes in the background and is discarded
+        (in "inline" executor mode strategies cannot be pre-empted at all).
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + time_budget if time_budget is not None else None
+        runs: Dict[str, StrategyRun] = {}
+        results: Dict[str, AgentResult] = {}
+        truncated = set()  # Anytime strategies given less than their configured budget
+        
+        async def timed(key: str, agent, **kwargs) -> AgentResult:
+            begun = loop.time()
+            status, error = "failed", None
+            try:
+                res = await self._run_candidate(agent, instance, progress, **kwargs)
+                status = "finished"
+                return res
+            except asyncio.CancelledError:
+                status = "cancelled"
+                raise
+            except Exception as e:
+                error = str(e)
+                raise
+            finally:
+                runs[key] = StrategyRun(
+                    candidate=key, status=status, elapsed_ms=round((loop.time() - begun) * 1000, 1), error=error,
+                    truncated=key in truncated
+                )
+        
+        async def stage(entries: Dict[str, Tuple[BaseAgent, Dict[str, Any]]]):
+            tasks = {asyncio.ensure_future(timed(key, agent, **kwargs)): key for key, (agent, kwargs) in entries.items()}
+            if deadline is None:
+                # Every strategy to completion; the first failure propagates
+                for task, res in zip(tasks, await asyncio.gather(*tasks)):
+                    results[tasks[task]] = res
+                return
+            done, pending = await asyncio.wait(tasks, timeout=max(0.0, deadline - loop.time()))
+            if pending and not results and not any(task.exception() is None for task in done):
+                # Nothing to choose from yet: the first strategy to finish wins
+                self.log("Portfolio: deadline passed without a finished strategy, waiting for the first one.")
+                while pending and not any(task.exception() is None for task in done):
+                    newly_done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    done |= newly_done
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for task in done:
+                if task.exception() is None:
+                    results[tasks[task]] = task.result()
+        
+        await stage({
+            "baseline": (self.baseline, {}),
+            "batching": (self.batching, {}),
+            "bottleneck": (self.bottleneck, {})
+        })
+        if not results:
+            raise RuntimeError("No scheduling strategy finished successfully.")
+        
+        if self.extra_candidates:
+            best_greedy = max(results.values(), key=selection_score)
+            extras = {}
+            for key, (agent, warm_start, anytime) in self.extra_candidates.items():
+                if deadline is not None and loop.time() >= deadline:
+                    runs[key] = StrategyRun(candidate=key, status="skipped")
+                    continue
+                kwargs: Dict[str, Any] = {}
+                if warm_start:
+                    kwargs["start_plan"] = best_greedy._plan
+                if anytime and deadline is not None:
+                    # Leave part of the remaining time for decoding and validation
+                    kwargs["time_budget"] = (deadline - loop.time()) * ANYTIME_BUDGET_SHARE
+                    configured = getattr(agent, "time_budget", None)
+                    if configured is None or kwargs["time_budget"] < configured:
+                        truncated.add(key)
+                extras[key] = (agent, kwargs)
+            if extras:
+                await stage(extras)
+        
+        keys = ["baseline", "batching", "bottleneck"] + list(self.extra_candidates)
+        report = PortfolioReport(
+            time_budget=time_budget,
+            deadline_hit=any(run.status in ("cancelled", "skipped") for run in runs.values()),
+            elapsed_ms=round((loop.time() - started) * 1000, 1),
+            strategies=[runs[key] for key in keys if key in runs]
+        )
+        if progress:
+            progress("portfolio_done", report.model_dump())
+        return [results.get(key) for key in keys], report
+
+    async def _run_candidate(
+        self,
+        agent,
+        instance: ProblemInstance,
+        progress: Optional[ProgressCallback],
+        **options
+    ) -> AgentResult:
+        """Run one agent (options: start_plan, time_budget), validate its plan centrally and report progress."""
+        # Candidate explanations are not needed for selection; never wait for them here
+        kwargs = {"wait_explanation": False} if agent in (self.batching, self.bottleneck) else {}
+        kwargs.update(options)
+        # The table, not instance.jobs: agents given an instance never need Job objects
+        res = await agent.optimize(
+            instance.table, instance.downtime_list, instance.constraints,
+            validate=False, instance=instance, **kwargs
+        )
+        if progress:
+            progress("candidate_done", summarize_candidate(res))
+        
+        # Validate (once, centrally)
+        res.violations, res.violation_counts = await run_cpu_bound(validate_schedule, instance, res._plan)
+        # Gap to the instance's lower bounds (or the agent's own, tighter bound)
+        res.bound = candidate_bound(await prepare_lower_bounds(instance), selection_score(res), res.bound)
+        if not res.bound.valid:
+            self.log(
+                f"{res.agent_name} scores {res.bound.objective}, above the {res.bound.source} bound "
+                f"{res.bound.bound}: bound marked invalid"
+            )
+        if progress:
+            progress("validation_done", {
+                "agent": res.agent_name, "violations": len(res.violations), "gap_pct": res.bound.gap_pct
+            })
+        return res
+
+    async def _supervise(self, candidates: List[AgentResult], progress: Optional[ProgressCallback] = None) -> AgentResult:
         # --- SUPERVISOR AGENT LOGIC ---
         # "Consolidates candidate schedules and chooses the best one using KPI-driven scoring."
         
-        candidates = [baseline_res, batching_res, bottleneck_res]
-        
         # 1. Scoring & Selection (Supervisor Rules)
         best_agent = None
         best_score = -float('inf')
@@ -58,11 +350,11 @@ class OrchestratorAgent(BaseAgent):
         
         for cand in candidates:
             # Supervisor Rule: Prioritize Zero Violations
-            violation_penalty = len(cand.violations) * 100 
-             # Supervisor Rule: Weighted KPI Formula (handled in kpi_calculator, but we adjust for decision)
-            final_score = cand.kpis.score - violation_penalty
+            # Supervisor Rule: Weighted KPI Formula (handled in kpi_calculator, but we adjust for decision)
+            final_score = selection_score(cand)
             
-            self.log(f"Candidate {cand.agent_name}: KPI Score={cand.kpis.score:.2f}, Violations={len(cand.violations)}, Final Selection Score={final_score:.2f}")
+            gap = f", Gap={cand.bound.gap_pct}%" if cand.bound is not None else ""
+            self.log(f"Candidate {cand.agent_name}: KPI Score={cand.kpis.score:.2f}, Violations={len(cand.violations)}, Final Selection Score={final_score:.2f}{gap}")
             
             if final_score > best_score:
                 best_score = final_score
@@ -72,71 +364,57 @@ class OrchestratorAgent(BaseAgent):
         # "Generates clear, non-technical explanations for plant managers"
         
         self.log(f"Supervisor: Selected {best_agent.agent_name} as optimal strategy.")
+        if progress:
+            progress("supervisor_selected", {"agent": best_agent.agent_name, "final_score": round(best_score, 2)})
         
-        supervisor_explanation = await self._generate_supervisor_explanation(best_agent, candidates)
-        
-        best_agent.explanation = supervisor_explanation
-        return best_agent
-
-    async def compare_all(self, jobs, downtimes, constraints) -> ComparisonResponse:
-        results = await asyncio.gather(
-            self.baseline.optimize(jobs, downtimes, constraints),
-            self.batching.optimize(jobs, downtimes, constraints),
-            self.bottleneck.optimize(jobs, downtimes, constraints)
+        # Explanation inputs are exactly the prompt values (memoized by fingerprint)
+        explanation_inputs = {
+            "summary": "\n".join([
+                f"- {c.agent_name}: Score {c.kpis.score:.1f}, Violations {len(c.violations)}, Setup {c.kpis.total_setup_time}m, Tardiness {c.kpis.total_tardiness}m" 
+                for c in candidates
+            ]),
+            "winner": best_agent.agent_name
+        }
+        explanation, explanation_id, explanation_status = await resolve_explanation(
+            "supervisor", explanation_inputs,
+            lambda: self._generate_supervisor_explanation(explanation_inputs),
+            lambda e: f"Supervisor Selection: {best_agent.agent_name} was chosen based on the highest weighted score ({best_agent.kpis.score:.2f}) and lowest violations ({len(best_agent.violations)}).",
+            wait=False
         )
         
-        # Validate
-        for res in results:
-            res.violations = self.constraint.validate(res.schedules, jobs, downtimes, constraints)
-            
-        # Run Supervisor Selection logic
-        best_res = await self.optimize(jobs, downtimes, constraints)
-        
-        return ComparisonResponse(
-            baseline=results[0],
-            batching=results[1],
-            bottleneck=results[2],
-            orchestrated=best_res,
-            summary=best_res.explanation
-        )
+        # Copy so the candidate keeps its own explanation in comparison views
+        return best_agent.model_copy(update={
+            "explanation": explanation,
+            "explanation_id": explanation_id,
+            "explanation_status": explanation_status
+        })
 
-    async def _generate_supervisor_explanation(self, best, candidates):
-        try:
-            summary = "\n".join([
-                f"- {c.agent_name}: Score {c.kpis.score:.1f}, Violations {len(c.violations)}, Setup {c.kpis.total_setup_time}m, Tardiness {c.kpis.total_tardiness}m" 
-                for c in candidates
-            ])
+    async def _generate_supervisor_explanation(self, inputs):
+        # Supervisor System Prompt from Architecture Doc
+        prompt = ChatPromptTemplate.from_template(
+            """
+            You are the **Supervisor Agent** for a Pharmaceutical Production Facility.
+            Your role is to coordinate specialist agents and select the best schedule for the plant managers.
             
-            # Supervisor System Prompt from Architecture Doc
-            prompt = ChatPromptTemplate.from_template(
-                """
-                You are the **Supervisor Agent** for a Pharmaceutical Production Facility.
-                Your role is to coordinate specialist agents and select the best schedule for the plant managers.
-                
-                **Candidates Evaluated:**
-                {summary}
-                
-                **Selected Winner:** {winner} (Reason: Highest Efficiency Score & Lowest Constraint Violations)
-                
-                **Your Task:**
-                Generate a clear, executive-level explanation for why this schedule was chosen.
-                
-                **Guidelines:**
-                1. Start with "As the Supervisor Agent, I have selected..."
-                2. Highlight the key benefits (e.g., "Reduced setup time by...", "Zero compliance violations").
-                3. Explain why the others were rejected (e.g., "Batching Agent had fewer setups but missed deadlines").
-                4. Maintain a professional, reassuring tone ensuring production goals are met.
-                5. Mention if any critical constraints (like rush orders or downtime) were handled effectively.
-                
-                Keep it under 200 words.
-                """
-            )
-            chain = prompt | self.llm
-            res = await chain.ainvoke({
-                "summary": summary,
-                "winner": best.agent_name
-            })
-            return res.content
-        except Exception as e:
-            return f"Supervisor Selection: {best.agent_name} was chosen based on the highest weighted score ({best.kpis.score:.2f}) and lowest violations ({len(best.violations)})."
+            **Candidates Evaluated:**
+            {summary}
+            
+            **Selected Winner:** {winner} (Reason: Highest Efficiency Score & Lowest Constraint Violations)
+            
+            **Your Task:**
+            Generate a clear, executive-level explanation for why this schedule was chosen.
+            
+            **Guidelines:**
+            1. Start with "As the Supervisor Agent, I have selected..."
+            2. Highlight the key benefits (e.g., "Reduced setup time by...", "Zero compliance violations").
+            3. Explain why the others were rejected (e.g., "Batching Agent had fewer setups but missed deadlines").
+            4. Maintain a professional, reassuring tone ensuring production goals are met.
+            5. Mention if any critical constraints (like rush orders or downtime) were handled effectively.
+            
+            Keep it under 200 words.
+            """
+        )
+        chain = prompt | self.llm
+        res = await chain.ainvoke(inputs)
+        return res.content
 
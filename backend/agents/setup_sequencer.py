@@ -0,0 +1,271 @@
+"""
+Setup Sequencer - Changeover-minimizing job order on each machine
+
+The Batching Agent groups jobs by product and sends each one to the
+earliest machine, but the order of the product groups on a machine is
+just the product name order, so on lines with many products most of the
+shift can go into changeovers. This stage re-orders every machine's jobs
+as a sequence-dependent setup problem over the plant's setup matrix,
+without changing which machine a job runs on.
+
+Jobs of one machine are grouped into batches (product, rush) in their
+dispatch order, so a rush batch can run early while the rest of its
+product follows later. Batches are sequenced by nearest neighbour on the
+setup matrix and then improved with 2-opt (segment reversal) and Or-opt
+(moving 1-3 consecutive batches). Sequences are compared lexicographically
+by (late rush jobs, shift overruns, setup minutes, machine end), so a
+shorter changeover chain is never bought with a missed rush due time.
+
+Key Features:
+    - O(1) setup deltas per move (prefix sums of forward/backward setups)
+    - Only setup-improving moves are decoded (suffix re-decode with
+      downtime-aware starts, like the greedy agents)
+    - Time budget shared fairly: each machine gets an equal part of what
+      is left; every machine gets at least the better of its dispatch
+      order and the nearest-neighbour order
+"""
+
+import time
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+
+from models.problem_instance import ProblemInstance, Plan, Slot
+
+# Longest run of consecutive batches an Or-opt move relocates
+OR_OPT_MAX_SEGMENT = 3
+
+
+class _MachineSequence:
+    """Batch sequence of one machine with per-batch running decode states."""
+
+    def __init__(self, instance: ProblemInstance, machine_id: str, jobs: List[int]):
+        self.instance = instance
+        self.machine_id = machine_id
+        self.rows = instance.setup.rows
+        self.duration = instance.processing
+        self.fit = partial(instance.downtimes.earliest_fit, machine_id) if instance.downtimes.windows(machine_id) else None
+
+        products, rush = instance.product_codes, instance.rush
+        due = instance.due
+        self.rush_due = {j: due[j] for j in jobs if rush[j]}
+
+        # Batches (product, rush) in order of first appearance, jobs in dispatch order
+        keys: Dict[Tuple[int, bool], int] = {}
+        self.batches: List[List[int]] = []
+        for j in jobs:
+            b = keys.setdefault((products[j], rush[j]), len(keys))
+            if b == len(self.batches):
+                self.batches.append([])
+            self.batches[b].append(j)
+        self.product = [products[batch[0]] for batch in self.batches]
+        # Setup inside batches does not depend on the batch order
+        self.internal = sum(self.rows[p][p] * (len(batch) - 1) for p, batch in zip(self.product, self.batches))
+
+    def cost(self, a: Optional[int], b: Optional[int]) -> int:
+        """Setup between consecutive batches (none before the first or after the last)."""
+        if a is None or b is None:
+            return 0
+        return self.rows[self.product[a]][self.product[b]]
+
+    def setup_total(self, order: List[int]) -> int:
+        return self.internal + sum(self.cost(a, b) for a, b in zip(order, order[1:]))
+
+    def decode(self, order: List[int], k: int, states: List[Tuple[int, int, int]]) -> List[Tuple[int, int, int]]:
+        """Running (end, late rush, overruns) after each batch, re-decoded from position k."""
+        instance = self.instance
+        if k > 0:
+            t, late, over = states[k - 1]
+            prev = self.product[order[k - 1]]
+        else:
+            t, late, over = instance.shift_start, 0, 0
+            prev = None
+
+        rows, duration, fit, rush_due = self.rows, self.duration, self.fit, self.rush_due
+        shift_end = instance.shift_end
+        out = states[:k]
+        for b in order[k:]:
+            p = self.product[b]
+            for j in self.batches[b]:
+                start = t + rows[prev][p] if prev is not None else t
+                if fit is not None:
+                    start = fit(start, duration[j])
+                t = start + duration[j]
+                d = rush_due.get(j)
+                if d is not None and t > d:
+                    late += 1
+                if t > shift_end:
+                    over += 1
+                prev = p
+            out.append((t, late, over))
+        return out
+
+    def key(self, states: List[Tuple[int, int, int]], setup: int) -> Tuple[int, int, int, int]:
+        end, late, over = states[-1]
+        return late, over, setup, end
+
+    def nearest_neighbour(self) -> List[int]:
+        """Cheapest next changeover first; ties go to rush batches with the earliest due time."""
+        rush_due = self.rush_due
+
+        def urgency(b: int) -> Tuple[int, int, int]:
+            dues = [rush_due[j] for j in self.batches[b] if rush_due.get(j) is not None]
+            return (0, min(dues), b) if dues else (1, 0, b)
+
+        remaining = set(range(len(self.batches)))
+        order: List[int] = []
+        prev = None
+        while remaining:
+            b = min(remaining, key=lambda c: (self.cost(prev, c),) + urgency(c))
+            order.append(b)
+            remaining.discard(b)
+            prev = b
+        return order
+
+    def slots(self, order: List[int]) -> List[Slot]:
+        """Decode a batch order into slots (setup recorded as the gap before each job)."""
+        instance = self.instance
+        rows, duration, fit = self.rows, self.duration, self.fit
+        slots: List[Slot] = []
+        t, prev = instance.shift_start, None
+        for b in order:
+            p = self.product[b]
+            for j in self.batches[b]:
+                setup = rows[prev][p] if prev is not None else 0
+                start = t + setup
+                if fit is not None:
+                    start = fit(start, duration[j])
+                t = start + duration[j]
+                slots.append(Slot(j, start, t, setup))
+                prev = p
+        return slots
+
+
+def _improve(seq: _MachineSequence, order: List[int], deadline: float) -> Tuple[List[int], int]:
+    """2-opt / Or-opt first improvement until a local optimum or the deadline. Returns (order, moves)."""
+    states = seq.decode(order, 0, [])
+    setup = seq.setup_total(order)
+    current = seq.key(states, setup)
+    cost = seq.cost
+    n = len(order)
+    moves = 0
+    checks = 0
+
+    while True:
+        # Prefix sums of setups along the order (forward) and against it (backward)
+        fwd = [0] * n
+        bwd = [0] * n
+        for k in range(n - 1):
+            fwd[k + 1] = fwd[k] + cost(order[k], order[k + 1])
+            bwd[k + 1] = bwd[k] + cost(order[k + 1], order[k])
+
+        candidate = None
+        for i in range(n - 1):
+            a = order[i - 1] if i > 0 else None
+            # 2-opt: reverse order[i..j]
+            for j in range(i + 1, n):
+                b = order[j + 1] if j + 1 < n else None
+                delta = (
+                    cost(a, order[j]) + cost(order[i], b) - cost(a, order[i]) - cost(order[j], b)
+                    + (bwd[j] - bwd[i]) - (fwd[j] - fwd[i])
+                )
+                if delta < 0 or (delta == 0 and current[0] > 0):
+                    new = order[:i] + order[i:j + 1][::-1] + order[j + 1:]
+                    candidate = _try(seq, new, i, states, setup + delta, current)
+                    if candidate:
+                        break
+                checks += 1
+                if checks & 63 == 0 and time.perf_counter() >= deadline:
+                    return order, moves
+            if candidate:
+                break
+
+        if not candidate:
+            # Or-opt: move order[i:i + size] between two other batches
+            for size in range(1, min(OR_OPT_MAX_SEGMENT, n - 1) + 1):
+                for i in range(n - size + 1):
+                    segment = order[i:i + size]
+                    rest = order[:i] + order[i + size:]
+                    prev = order[i - 1] if i > 0 else None
+                    nxt = order[i + size] if i + size < n else None
+                    removed = cost(prev, segment[0]) + cost(segment[-1], nxt) - cost(prev, nxt)
+                    for q in range(len(rest) + 1):
+                        if q == i:
+                            continue
+                        left = rest[q - 1] if q > 0 else None
+                        right = rest[q] if q < len(rest) else None
+                        delta = cost(left, segment[0]) + cost(segment[-1], right) - cost(left, right) - removed
+                        if delta < 0 or (delta == 0 and current[0] > 0):
+                            new = rest[:q] + segment + rest[q:]
+                            candidate = _try(seq, new, min(i, q), states, setup + delta, current)
+                            if candidate:
+                                break
+                        checks += 1
+                        if checks & 63 == 0 and time.perf_counter() >= deadline:
+                            return order, moves
+                    if candidate:
+                        break
+                if candidate:
+                    break
+
+        if not candidate:
+            return order, moves
+        order, states, setup, current = candidate
+        moves += 1
+
+
+def _try(seq: _MachineSequence, new: List[int], k: int, states, setup: int, current):
+    """Decode `new` from position k; the accepted state if it beats `current`."""
+    new_states = seq.decode(new, k, states)
+    key = seq.key(new_states, setup)
+    return (new, new_states, setup, key) if key < current else None
+
+
+def sequence_plan(instance: ProblemInstance, plan: Plan, time_budget: float) -> Tuple[Plan, Dict[str, Any]]:
+    """
+    Re-sequence every machine of a plan to cut changeover minutes.
+
+    Args:
+        instance: Compiled problem
+        plan: Plan whose machine assignment is kept
+        time_budget: Seconds shared by all machines (0 = construction only)
+
+    Returns:
+        (re-sequenced plan, sequencing statistics)
+    """
+    started = time.perf_counter()
+    deadline = started + time_budget
+    sequenced: Plan = {}
+    setup_before = setup_after = moves = improved_machines = 0
+
+    for position, (machine_id, slots) in enumerate(plan.items()):
+        seq = _MachineSequence(instance, machine_id, [slot.job for slot in slots])
+        dispatch = list(range(len(seq.batches)))
+        before = seq.setup_total(dispatch)
+        setup_before += before
+
+        # Start from the better of the dispatch order and nearest neighbour
+        order = min(
+            (dispatch, seq.nearest_neighbour()),
+            key=lambda o: seq.key(seq.decode(o, 0, []), seq.setup_total(o))
+        )
+        now = time.perf_counter()
+        if len(order) > 2 and now < deadline:
+            share = (deadline - now) / (len(plan) - position)
+            order, machine_moves = _improve(seq, order, now + share)
+            moves += machine_moves
+
+        if order == dispatch:
+            sequenced[machine_id] = slots
+            setup_after += before
+            continue
+        sequenced[machine_id] = seq.slots(order)
+        setup_after += seq.setup_total(order)
+        improved_machines += 1
+
+    return sequenced, {
+        "sequencing_setup_before": setup_before,
+        "sequencing_setup_after": setup_after,
+        "sequencing_moves": moves,
+        "sequencing_machines_changed": improved_machines,
+        "sequencing_ms": round((time.perf_counter() - started) * 1000, 1)
+    }
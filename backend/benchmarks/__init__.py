@@ -0,0 +1 @@
+"""Scale benchmarks (see benchmarks/run_benchmarks.py)."""
@@ -0,0 +1,159 @@
+"""
+Exact Agent Check - Branch-and-bound against brute force on tiny instances
+
+Enumerates every schedule of small seeded instances (each job on one of
+its machines or unassigned, every order per machine) and checks that the
+exact agent finds the best selection objective and that its bounds (root
+bound and proven bound) never fall below it. A bound below the optimum
+would let the search prune the optimal schedule.
+
+The agent searches schedules without idle time, so each one is also tried
+with idle time before the last job of its machines (ending it at another
+machine's end, at its due time or at the shift end): a better score that
+way must stay within the proven bound and rules out "optimal".
+
+Usage (from backend/):
+    python -m benchmarks.check_exact              # 40 random instances + fixed cases
+    python -m benchmarks.check_exact --instances 200 --jobs 5
+
+Prints one line per failing instance and exits with status 1 if any fails.
+"""
+
+import argparse
+import contextlib
+import itertools
+import os
+import random
+import sys
+from typing import Iterator, List, Optional, Tuple
+
+os.environ.setdefault("GROQ_API_KEY", "check-stub")
+
+from models.data_generator import generate_random_jobs, generate_random_downtime
+from models.problem_instance import ProblemInstance, Plan, Slot
+from models.schemas import Job, JobPriority, SetupConfig, ShiftConstraints
+from agents.exact_agent import BranchAndBound, schedule_exact
+from agents.local_search_agent import SequenceState, selection_objective
+
+
+def with_idle(instance: ProblemInstance, plan: Plan) -> Iterator[Plan]:
+    """The plan with the last job of each machine delayed to a few candidate ends (or kept)."""
+    ends = {slots[-1].end for slots in plan.values()} | {instance.shift_end}
+    variants = []
+    for machine_id, slots in plan.items():
+        last = slots[-1]
+        duration = last.end - last.start
+        due = instance.due[last.job]
+        lasts = {last}
+        for end in ends | ({due} if due is not None else set()):
+            if end > last.end:
+                start = instance.downtimes.earliest_fit(machine_id, end - duration, duration)
+                lasts.add(last._replace(start=start, end=start + duration))
+        variants.append([(machine_id, slots[:-1] + [slot]) for slot in lasts])
+    for choice in itertools.product(*variants):
+        yield dict(choice)
+
+
+def brute_force(instance: ProblemInstance) -> Tuple[float, float]:
+    """
+    Best selection objective over every assignment and machine order:
+    (without idle time, with idle time before the last jobs too).
+    """
+    machine_ids = sorted(instance.table.machine_ids)
+    local = [machine_ids.index(mid) for mid in instance.table.machine_ids]
+    options = [sorted({local[m] for m in job_options}) + [None] for job_options in instance.table.option_lists]
+    best = best_idle = -float("inf")
+    for assignment in itertools.product(*options):
+        queues = [[j for j, m in enumerate(assignment) if m == k] for k in range(len(machine_ids))]
+        for orders in itertools.product(*(itertools.permutations(queue) for queue in queues)):
+            # Sequence order = start order; SequenceState re-times the slots
+            plan = {
+                machine_ids[k]: [Slot(j, i, i) for i, j in enumerate(order)]
+                for k, order in enumerate(orders) if order
+            }
+            plan = SequenceState(instance, plan).to_plan()
+            best = max(best, selection_objective(instance, plan))
+            for variant in with_idle(instance, plan):
+                best_idle = max(best_idle, selection_objective(instance, variant))
+    return round(best, 2), round(max(best, best_idle), 2)
+
+
+def fixed_cases() -> List[Tuple[str, ProblemInstance]]:
+    """Hand-built instances for bounds that were wrong before."""
+    jobs = [
+        Job(job_id=f"J{i}", product_type="Widget-A", machine_options=["M1", "M2"],
+            processing_time=30, due_time="12:00", priority=JobPriority.NORMAL)
+        for i in range(2)
+    ]
+    # An idle open machine: its first job pays no changeover either
+    idle_start = ProblemInstance(jobs, [], ShiftConstraints(), setup=SetupConfig(same_product_time=5))
+    # Delaying B to end with A balances the loads (100 vs 97.75 without idle time)
+    unbalanced = [
+        Job(job_id="A", product_type="Widget-A", machine_options=["M1"], processing_time=60,
+            due_time="12:00", priority=JobPriority.NORMAL),
+        Job(job_id="B", product_type="Widget-A", machine_options=["M2"], processing_time=30,
+            due_time="12:00", priority=JobPriority.NORMAL),
+    ]
+    balance_by_idle = ProblemInstance(unbalanced, [], ShiftConstraints())
+    return [("idle_open_machine", idle_start), ("balance_by_idle", balance_by_idle)]
+
+
+def random_case(seed: int, jobs: int, machines: int) -> ProblemInstance:
+    random.seed(seed)
+    rng = random.Random(seed)
+    job_list = generate_random_jobs(jobs, rush_probability=0.4, num_machines=machines)
+    downtimes = generate_random_downtime(rng.randint(0, machines), machines)
+    setup = SetupConfig(same_product_time=rng.randint(0, 10), different_product_time=rng.randint(0, 40))
+    return ProblemInstance(job_list, downtimes, ShiftConstraints(), setup=setup)
+
+
+def check(name: str, instance: ProblemInstance) -> Optional[str]:
+    """Failure description, or None if the exact agent agrees with brute force."""
+    no_idle, optimum = brute_force(instance)
+    solver = BranchAndBound(instance, node_limit=10 ** 7, deadline=float("inf"))
+    root = solver.bound(0, (1 << instance.num_jobs) - 1, -1, instance.shift_start, 0, 0, 0)
+    _, _, details = schedule_exact(instance, time_budget=60)
+    bound = details["bound"]
+    problems = []
+    if root < optimum - 1e-6:
+        problems.append(f"root bound {root} < optimum {optimum}")
+    if bound.bound < optimum - 1e-6:
+        problems.append(f"proven bound {bound.bound} < optimum {optimum}")
+    if bound.proven_optimal != (details["status"] == "optimal"):
+        problems.append(f"proven_optimal {bound.proven_optimal} with status {details['status']}")
+    if details["status"] == "optimal" and abs(details["final_objective"] - optimum) > 1e-6:
+        problems.append(f"'optimal' objective {details['final_objective']} != optimum {optimum}")
+    if details["status"] == "optimal_without_idle" and abs(details["final_objective"] - no_idle) > 1e-6:
+        problems.append(f"objective {details['final_objective']} != optimum without idle time {no_idle}")
+    return f"{name}: " + "; ".join(problems) if problems else None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Check the exact agent against brute force")
+    parser.add_argument("--instances", type=int, default=40, help="Random instances")
+    parser.add_argument("--jobs", type=int, default=4, help="Jobs per random instance (brute force is exponential)")
+    parser.add_argument("--machines", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    cases = fixed_cases() + [
+        (f"seed={seed}", random_case(seed, args.jobs, args.machines))
+        for seed in range(args.seed, args.seed + args.instances)
+    ]
+    failures = []
+    for name, instance in cases:
+        # Agents log with print(); keep stdout for the result
+        with contextlib.redirect_stdout(sys.stderr):
+            failure = check(name, instance)
+        if failure:
+            failures.append(failure)
+            print(failure)
+    print(f"{len(cases) - len(failures)}/{len(cases)} instances match brute force")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+KPI Accumulator Check - Incremental KPIs against calculate_plan_kpis
+
+Starts from a greedy schedule of small seeded instances and applies random
+inserts, removes and moves (same machine or another one, with start
+times drawn from a few values so that equal starts and ties occur) to a
+KPIAccumulator. After every operation its KPIs must be identical to
+calculate_plan_kpis on a plan kept separately in operation order, which
+the full calculation sorts itself.
+
+Usage (from backend/):
+    python -m benchmarks.check_kpi_accumulator            # 50 instances x 200 operations
+    python -m benchmarks.check_kpi_accumulator --instances 200 --operations 500 --jobs 60
+
+Prints one line per failing instance and exits with status 1 if any fails.
+"""
+
+import argparse
+import os
+import random
+import sys
+from typing import Optional
+
+os.environ.setdefault("GROQ_API_KEY", "check-stub")
+
+from models.data_generator import generate_random_jobs
+from models.problem_instance import ProblemInstance, Plan, Slot
+from models.schemas import SetupConfig, ShiftConstraints
+from agents.baseline_agent import schedule_fcfs
+from utils.kpi_accumulator import KPIAccumulator
+from utils.kpi_calculator import calculate_plan_kpis
+
+
+def check(seed: int, jobs: int, machines: int, operations: int) -> Optional[str]:
+    """Failure description, or None if the accumulator matched after every operation."""
+    random.seed(seed)
+    rng = random.Random(seed)
+    instance = ProblemInstance(
+        generate_random_jobs(jobs, rush_probability=0.3, num_machines=machines), [], ShiftConstraints(),
+        setup=SetupConfig(same_product_time=rng.randint(0, 5), different_product_time=rng.randint(5, 30))
+    )
+    plan, _, _ = schedule_fcfs(instance)
+    # Reference plan: slots appended in operation order (calculate_plan_kpis sorts stably)
+    reference: Plan = {machine_id: list(slots) for machine_id, slots in plan.items()}
+    accumulator = KPIAccumulator(instance, plan)
+    machine_ids = [f"M{m}" for m in range(1, machines + 2)]  # One machine that starts empty
+    starts = [rng.randrange(0, 600) for _ in range(8)]
+
+    def new_slot(job: int) -> Slot:
+        start = rng.choice(starts)
+        return Slot(job, start, start + instance.processing[job])
+
+    def unschedule(job: int):
+        for slots in reference.values():
+            for k, slot in enumerate(slots):
+                if slot.job == job:
+                    del slots[k]
+                    return
+
+    for step in range(operations):
+        scheduled = sorted(slot.job for slots in reference.values() for slot in slots)
+        unscheduled = sorted(set(range(instance.num_jobs)) - set(scheduled))
+        action = rng.choice(["insert", "remove", "move"])
+        if action == "insert" and unscheduled:
+            job, machine_id = rng.choice(unscheduled), rng.choice(machine_ids)
+            slot = new_slot(job)
+            accumulator.insert(machine_id, slot)
+            reference.setdefault(machine_id, []).append(slot)
+        elif action == "remove" and scheduled:
+            job = rng.choice(scheduled)
+            accumulator.remove(job)
+            unschedule(job)
+        elif action == "move" and scheduled:
+            job, machine_id = rng.choice(scheduled), rng.choice(machine_ids)
+            slot = new_slot(job)
+            accumulator.move(job, machine_id, slot)
+            unschedule(job)
+            reference.setdefault(machine_id, []).append(slot)
+        else:
+            continue
+        expected = calculate_plan_kpis(instance, reference)
+        actual = accumulator.kpis()
+        if actual != expected:
+            return f"seed={seed} step={step} ({action}): {actual} != {expected}"
+    return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Check KPIAccumulator against calculate_plan_kpis")
+    parser.add_argument("--instances", type=int, default=50, help="Random instances")
+    parser.add_argument("--operations", type=int, default=200, help="Random operations per instance")
+    parser.add_argument("--jobs", type=int, default=30)
+    parser.add_argument("--machines", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    failures = []
+    for seed in range(args.seed, args.seed + args.instances):
+        failure = check(seed, args.jobs, args.machines, args.operations)
+        if failure:
+            failures.append(failure)
+            print(failure)
+    print(f"{args.instances - len(failures)}/{args.instances} instances match calculate_plan_kpis")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+"""
+Scale Benchmarks - Wall time, peak memory and KPI score per component
+
+Builds seeded instances with models.data_generator across a grid of job
+counts, machine counts and downtime densities, then runs every agent, the
+Constraint Agent's validator and the KPI engine on them. LLM calls are
+replaced by a local stub, so no API key or network is needed and the
+numbers only reflect scheduling work.
+
+Usage (from backend/):
+    python -m benchmarks.run_benchmarks                       # standard grid
+    python -m benchmarks.run_benchmarks --preset full -o bench.json
+    python -m benchmarks.run_benchmarks --jobs 1000 10000 --machines 20 --targets baseline validate
+
+Output is JSON: {"meta": {...}, "results": [{target, jobs, machines,
+downtimes, seed, wall_ms, peak_mb, score, violations, ...}, ...]}.
+A failing run is recorded with an "error" field instead of aborting the suite.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# The LLM is stubbed; agents only need a key to construct their client
+os.environ.setdefault("GROQ_API_KEY", "benchmark-stub")
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from config import settings
+from models.data_generator import generate_random_jobs, generate_random_downtime
+from models.schemas import AgentResult, ShiftConstraints
+from agents.baseline_agent import BaselineAgent
+from agents.batching_agent import BatchingAgent
+from agents.bottleneck_agent import BottleneckAgent
+from agents.constraint_agent import ConstraintAgent
+from agents.local_search_agent import LocalSearchAgent
+from agents.orchestrator import OrchestratorAgent
+from utils.kpi_calculator import calculate_kpis
+from utils.result_cache import result_cache
+
+PRESETS = {
+    "quick": {"jobs": [100, 1000], "machines": [4, 20], "density": [0.0, 1.0]},
+    "standard": {"jobs": [100, 1000, 10000], "machines": [4, 20, 200], "density": [0.0, 1.0]},
+    "full": {"jobs": [100, 1000, 10000, 100000], "machines": [4, 20, 200], "density": [0.0, 1.0, 3.0]},
+}
+TARGETS = ["baseline", "batching", "bottleneck", "local_search", "orchestrated", "validate", "kpis"]
+STUB_EXPLANATION = "Benchmark stub explanation."
+
+
+def stub_llm(agent):
+    """Replace an agent's LLM with an instant local stub."""
+    agent.llm = RunnableLambda(lambda _: AIMessage(content=STUB_EXPLANATION))
+    return agent
+
+
+def build_instance(jobs: int, machines: int, density: float, seed: int):
+    """Seeded (jobs, downtimes, shift); density = downtime windows per machine."""
+    random.seed(seed)
+    job_list = generate_random_jobs(jobs, rush_probability=0.2, num_machines=machines)
+    downtimes = generate_random_downtime(int(round(density * machines)), machines) if density > 0 else []
+    return job_list, downtimes, ShiftConstraints()
+
+
+async def measure(run: Callable[[], Awaitable[Any]], trace_memory: bool) -> Tuple[Any, float, Optional[float]]:
+    """
+    Time one run; with trace_memory, repeat it under tracemalloc for the peak.
+    Tracing slows allocation-heavy code, so the timed run is never traced.
+
+    Returns:
+        (result, wall_ms, peak_mb)
+    """
+    gc.collect()
+    started = time.perf_counter()
+    result = await run()
+    wall_ms = (time.perf_counter() - started) * 1000
+
+    peak_mb = None
+    if trace_memory:
+        del result
+        gc.collect()
+        tracemalloc.start()
+        try:
+            result = await run()
+            peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        finally:
+            tracemalloc.stop()
+    return result, wall_ms, peak_mb
+
+
+def describe(result: Any) -> Dict[str, Any]:
+    """Score fields for an AgentResult, KPIResult or violation list."""
+    if isinstance(result, AgentResult):
+        return {
+            "agent": result.agent_name,
+            "score": result.kpis.score,
+            "completed_jobs": result.kpis.completed_jobs,
+            "violations": len(result.violations),
+        }
+    if isinstance(result, list):
+        return {"violations": len(result)}
+    return {"score": result.score, "completed_jobs": result.completed_jobs}
+
+
+def make_run(target, agents, orchestrator, validator, jobs, downtimes, shift, reference):
+    """Coroutine function running one benchmark target once."""
+    if target in agents:
+        agent = agents[target]
+        return lambda: agent.optimize(jobs, downtimes, shift)
+    if target == "orchestrated":
+        async def run():
+            result_cache.clear()  # Measure the evaluation, not a cache hit
+            return await orchestrator.optimize(jobs, downtimes, shift)
+        return run
+    if target == "validate":
+        async def run():
+            return validator.validate(reference.schedules, jobs, downtimes, shift)
+        return run
+    async def run():
+        return calculate_kpis(reference.schedules, jobs, shift)
+    return run
+
+
+async def run_suite(args) -> Dict[str, Any]:
+    # Everything runs in this process so tracemalloc sees it
+    settings.SCHEDULER_EXECUTOR = "inline"
+    agents = {
+        "baseline": BaselineAgent(),
+        "batching": stub_llm(BatchingAgent()),
+        "bottleneck": stub_llm(BottleneckAgent()),
+        "local_search": LocalSearchAgent(time_budget=args.local_search_budget),
+    }
+    orchestrator = stub_llm(OrchestratorAgent())
+    orchestrator.batching = stub_llm(orchestrator.batching)
+    orchestrator.bottleneck = stub_llm(orchestrator.bottleneck)
+    validator = ConstraintAgent()
+
+    results: List[Dict[str, Any]] = []
+    for jobs in args.jobs:
+        for machines in args.machines:
+            for density in args.density:
+                job_list, downtimes, shift = build_instance(jobs, machines, density, args.seed)
+                reference = None  # Baseline schedules for validate / kpis
+                for target in args.targets:
+                    row = {
+                        "target": target,
+                        "jobs": jobs,
+                        "machines": machines,
+                        "downtime_density": density,
+                        "downtimes": len(downtimes),
+                        "seed": args.seed,
+                    }
+                    try:
+                        if target in ("validate", "kpis") and reference is None:
+                            reference = await agents["baseline"].optimize(job_list, downtimes, shift)
+                        result, wall_ms, peak_mb = await measure(
+                            make_run(target, agents, orchestrator, validator, job_list, downtimes, shift, reference),
+                            not args.no_memory
+                        )
+                        row.update(
+                            wall_ms=round(wall_ms, 2),
+                            peak_mb=round(peak_mb, 2) if peak_mb is not None else None,
+                            jobs_per_second=round(jobs / (wall_ms / 1000)) if wall_ms > 0 else None,
+                            **describe(result)
+                        )
+                        if target == "baseline":
+                            reference = result
+                    except Exception as e:
+                        row["error"] = f"{type(e).__name__}: {e}"
+                    results.append(row)
+                    print(json.dumps(row), file=sys.stderr)
+
+    return {"meta": metadata(args), "results": results}
+
+
+def metadata(args) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "version": settings.VERSION,
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "memory_traced": not args.no_memory,
+        "local_search_budget_s": args.local_search_budget,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scale benchmarks for agents, validator and KPI engine")
+    parser.add_argument("--preset", choices=PRESETS, default="standard")
+    parser.add_argument("--jobs", type=int, nargs="+", help="Job counts (overrides preset)")
+    parser.add_argument("--machines", type=int, nargs="+", help="Machine counts (overrides preset)")
+    parser.add_argument("--density", type=float, nargs="+", help="Downtime windows per machine (overrides preset)")
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=TARGETS)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--local-search-budget", type=float, default=1.0, help="Seconds per local search run")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc peak-memory run")
+    parser.add_argument("-o", "--output", help="Write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    preset = PRESETS[args.preset]
+    args.jobs = args.jobs or preset["jobs"]
+    args.machines = args.machines or preset["machines"]
+    args.density = args.density or preset["density"]
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Agents log with print(); keep stdout clean for the JSON report
+    with contextlib.redirect_stdout(sys.stderr):
+        report = asyncio.run(run_suite(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,67 @@ class Settings:
     MODEL_NAME = "llama-3.3-70b-versatile" # High performance model
     FAST_MODEL_NAME = "llama-3.1-8b-instant" # Faster model for simple tasks
     
+    # Scheduling execution: "inline", "thread" or "process" (see utils/executor.py)
+    SCHEDULER_EXECUTOR = os.getenv("SCHEDULER_EXECUTOR", "thread")
+    SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", "0"))  # 0 = executor default
+    
+    # Background optimization jobs are kept this long after finishing
+    JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", "900"))
+    
+    # Memoized LLM explanations (see utils/explanation_service.py)
+    EXPLANATION_CACHE_SIZE = int(os.getenv("EXPLANATION_CACHE_SIZE", "512"))
+    
+    # Content-addressed optimization result cache (see utils/result_cache.py)
+    RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "128"))
+    RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "300"))
+    
+    # Local search improvement candidate (see agents/local_search_agent.py)
+    LOCAL_SEARCH_ENABLED = os.getenv("LOCAL_SEARCH_ENABLED", "false").lower() == "true"
+    LOCAL_SEARCH_TIME_BUDGET = float(os.getenv("LOCAL_SEARCH_TIME_BUDGET", "1.0"))  # seconds
+    
+    # Simulated annealing / tabu improvement candidate (see agents/annealing_agent.py)
+    ANNEALING_ENABLED = os.getenv("ANNEALING_ENABLED", "false").lower() == "true"
+    ANNEALING_TIME_BUDGET = float(os.getenv("ANNEALING_TIME_BUDGET", "1.0"))  # seconds
+    
+    # Genetic algorithm candidate (see agents/genetic_agent.py); GENETIC_WORKERS:
+    # processes for the islands, 0 = one per island up to the CPU count, 1 = in-process
+    GENETIC_ENABLED = os.getenv("GENETIC_ENABLED", "false").lower() == "true"
+    GENETIC_TIME_BUDGET = float(os.getenv("GENETIC_TIME_BUDGET", "2.0"))  # seconds
+    GENETIC_MAX_GENERATIONS = int(os.getenv("GENETIC_MAX_GENERATIONS", "200"))
+    GENETIC_POPULATION = int(os.getenv("GENETIC_POPULATION", "64"))
+    GENETIC_ISLANDS = int(os.getenv("GENETIC_ISLANDS", "4"))
+    GENETIC_WORKERS = int(os.getenv("GENETIC_WORKERS", "0"))
+    
+    # Exact branch-and-bound candidate for small instances (see agents/exact_agent.py)
+    EXACT_ENABLED = os.getenv("EXACT_ENABLED", "false").lower() == "true"
+    EXACT_TIME_BUDGET = float(os.getenv("EXACT_TIME_BUDGET", "2.0"))  # seconds
+    EXACT_NODE_LIMIT = int(os.getenv("EXACT_NODE_LIMIT", "1000000"))
+    EXACT_MAX_JOBS_PER_MACHINE = int(os.getenv("EXACT_MAX_JOBS_PER_MACHINE", "15"))
+    
+    # Iterative agents stop once within this many percent of the instance's
+    # lower-bound objective (see utils/lower_bounds.py); 0 = only at the bound, < 0 = never
+    EARLY_STOP_GAP_PCT = float(os.getenv("EARLY_STOP_GAP_PCT", "0"))
+    
+    # Changeover-minimizing machine sequencing in the Batching Agent (see agents/setup_sequencer.py)
+    BATCH_SEQUENCING_ENABLED = os.getenv("BATCH_SEQUENCING_ENABLED", "true").lower() == "true"
+    BATCH_SEQUENCING_TIME_BUDGET = float(os.getenv("BATCH_SEQUENCING_TIME_BUDGET", "0.5"))  # seconds
+    
+    # Portfolio racing in the orchestrator (see agents/orchestrator.py): seconds per
+    # request after which unfinished strategies are cancelled; 0 = wait for all
+    PORTFOLIO_TIME_BUDGET = float(os.getenv("PORTFOLIO_TIME_BUDGET", "0"))
+    
+    # Plant changeover times: JSON SetupConfig file (see models/setup_matrix.py); unset = 10 min per product change
+    SETUP_MATRIX_FILE = os.getenv("SETUP_MATRIX_FILE")
+    
+    # CSV uploads: parsed in chunks, kept server-side behind an upload_id (see utils/upload_store.py)
+    UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(100 * 1024 * 1024)))
+    UPLOAD_MAX_ROWS = int(os.getenv("UPLOAD_MAX_ROWS", "1000000"))
+    UPLOAD_CHUNK_ROWS = int(os.getenv("UPLOAD_CHUNK_ROWS", "50000"))
+    UPLOAD_MAX_CONCURRENT = int(os.getenv("UPLOAD_MAX_CONCURRENT", "2"))  # Parses running at once
+    UPLOAD_MAX_STORED = int(os.getenv("UPLOAD_MAX_STORED", "32"))
+    UPLOAD_RETENTION_SECONDS = float(os.getenv("UPLOAD_RETENTION_SECONDS", "900"))
+    
     # App Settings
     PROJECT_NAME = "Multi-Agent Job Optimizer"
     VERSION = "0.1.0"
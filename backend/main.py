@@ -1,11 +1,20 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from config import settings
 from routes import data_routes, optimization_routes, simulation_routes
+from utils.executor import shutdown_executor
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Release scheduler worker threads/processes
+    shutdown_executor()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    version=settings.VERSION
+    version=settings.VERSION,
+    lifespan=lifespan
 )
 
 # CORS Configuration
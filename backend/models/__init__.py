@@ -28,6 +28,7 @@ try:
         AgentResult,
         ComparisonResponse
     )
+    from .problem_instance import ProblemInstance, Slot, Plan
     
     __all__ = [
         # Core models
@@ -36,7 +37,9 @@ try:
         # Schemas
         'SchemaJob', 'JobPriority', 'MachineDowntime', 'ShiftConstraints',
         'SetupConfig', 'OptimizationRequest', 'ScheduledJob',
-        'MachineSchedule', 'KPIResult', 'AgentResult', 'ComparisonResponse'
+        'MachineSchedule', 'KPIResult', 'AgentResult', 'ComparisonResponse',
+        # Compiled request
+        'ProblemInstance', 'Slot', 'Plan'
     ]
 except ImportError:
     __all__ = ['Job', 'Machine', 'Constraint', 'DowntimeWindow', 'Schedule', 'KPI', 'JobAssignment']
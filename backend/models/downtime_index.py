@@ -0,0 +1,119 @@
+"""
+Downtime Index - Per-machine interval index over downtime windows
+
+Agents used to filter and sort the full downtime list for every
+job/machine pair and push the start time forward in a single pass, which
+missed a second window starting right after the first one. The index
+merges overlapping (and touching) windows per machine into sorted start
+and end arrays once, and answers placement questions with bisect.
+
+Key Features:
+    - earliest_fit: earliest start >= t where a job of length d fits
+    - conflicts: windows overlapping a given [start, end) interval
+    - window_arrays: the same windows as NumPy arrays for vectorized checks
+    - All times are integer minutes (see ProblemInstance)
+"""
+
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+
+class DowntimeIndex:
+    """
+    Merged, sorted downtime windows per machine.
+
+    Example:
+        >>> index = DowntimeIndex([("M1", 60, 90), ("M1", 90, 120)])
+        >>> index.earliest_fit("M1", 50, 20)
+        120
+    """
+
+    def __init__(self, windows: Iterable[Tuple[str, int, int]]):
+        """
+        Args:
+            windows: (machine_id, start, end) tuples in minutes
+        """
+        by_machine: Dict[str, List[Tuple[int, int]]] = {}
+        for machine_id, start, end in windows:
+            if end > start:
+                by_machine.setdefault(machine_id, []).append((start, end))
+
+        self._starts: Dict[str, List[int]] = {}
+        self._ends: Dict[str, List[int]] = {}
+        for machine_id, intervals in by_machine.items():
+            intervals.sort()
+            starts: List[int] = []
+            ends: List[int] = []
+            for start, end in intervals:
+                # Merge overlapping or touching windows: no job fits in between
+                if ends and start <= ends[-1]:
+                    ends[-1] = max(ends[-1], end)
+                else:
+                    starts.append(start)
+                    ends.append(end)
+            self._starts[machine_id] = starts
+            self._ends[machine_id] = ends
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def earliest_fit(self, machine_id: str, t: int, duration: int) -> int:
+        """
+        Earliest start >= t at which [start, start + duration) is downtime-free.
+
+        Args:
+            machine_id: Machine to place the job on
+            t: Earliest allowed start (minutes)
+            duration: Job length (minutes)
+
+        Returns:
+            Start minute
+        """
+        starts = self._starts.get(machine_id)
+        if not starts:
+            return t
+        ends = self._ends[machine_id]
+        # A zero-length job still may not start inside a window
+        span = duration if duration > 0 else 1
+        i = bisect_right(ends, t)
+        n = len(starts)
+        while i < n and starts[i] < t + span:
+            t = ends[i]
+            i += 1
+        return t
+
+    def conflicts(self, machine_id: str, start: int, end: int) -> List[Tuple[int, int]]:
+        """
+        Merged windows overlapping [start, end).
+
+        Returns:
+            List of (window_start, window_end) tuples
+        """
+        starts = self._starts.get(machine_id)
+        if not starts:
+            return []
+        ends = self._ends[machine_id]
+        found = []
+        i = bisect_right(ends, start)
+        while i < len(starts) and starts[i] < end:
+            found.append((starts[i], ends[i]))
+            i += 1
+        return found
+
+    def window_arrays(self, machine_id: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Merged window starts and ends as int64 arrays (empty if none), for searchsorted."""
+        arrays = self._arrays.get(machine_id)
+        if arrays is None:
+            arrays = self._arrays[machine_id] = (
+                np.asarray(self._starts.get(machine_id, []), dtype=np.int64),
+                np.asarray(self._ends.get(machine_id, []), dtype=np.int64)
+            )
+        return arrays
+
+    def windows(self, machine_id: str) -> List[Tuple[int, int]]:
+        """All merged windows for a machine, sorted by start."""
+        return list(zip(self._starts.get(machine_id, []), self._ends.get(machine_id, [])))
+
+    def machines(self) -> List[str]:
+        """Machine IDs that have at least one downtime window."""
+        return list(self._starts)
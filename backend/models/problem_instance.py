@@ -0,0 +1,194 @@
+"""
+Problem Instance - Compiled integer-minute view of an optimization request
+
+An OptimizationRequest carries jobs, downtimes and the shift as "HH:MM"
+strings. Parsing those strings inside sort keys and downtime loops is the
+dominant cost of every agent, so each request is compiled once into a
+ProblemInstance that stores every time as integer minutes from shift start.
+
+Agents, the KPI engine and the Constraint Agent all work on the compiled
+instance and on a Plan (machine_id -> list of Slot). Strings are only
+produced again at the API boundary via `to_schedules`.
+
+Jobs are held as a JobTable (columnar), which also supplies the agents'
+product codes, machine index and dispatch orders. Job objects are only
+built if something asks for `instance.jobs`.
+
+Key Features:
+    - Shift, due times and downtimes as minutes from shift start
+    - Downtimes compiled into a shared DowntimeIndex
+    - Changeover times compiled into a shared SetupMatrix
+    - Overnight shifts (end before start) handled without any date context
+    - Deterministic: no dependency on the current date or time
+"""
+
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Union
+
+import numpy as np
+
+from models.schemas import Job, MachineDowntime, ShiftConstraints, ScheduledJob, SetupConfig
+from models.downtime_index import DowntimeIndex
+from models.job_table import JobTable
+from models.setup_matrix import SetupMatrix, plant_setup_config
+
+MINUTES_PER_DAY = 24 * 60
+
+
+@lru_cache(maxsize=4096)
+def clock_to_minutes(t_str: str) -> int:
+    """Convert an "HH:MM" string to minutes after midnight."""
+    hours, minutes = t_str.strip().split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+class Slot(NamedTuple):
+    """A job placed on a machine, in minutes from shift start."""
+    job: int        # Index into ProblemInstance.jobs
+    start: int      # Processing start
+    end: int        # Processing end
+    setup: int = 0  # Setup minutes spent right before this job
+
+
+# Machine ID -> ordered list of slots
+Plan = Dict[str, List[Slot]]
+
+
+class ProblemInstance:
+    """
+    Compiled form of (jobs, downtimes, shift) built once per request.
+
+    Example:
+        >>> instance = ProblemInstance(jobs, downtimes, ShiftConstraints())
+        >>> instance.to_offset("10:30")
+        150
+        >>> instance.to_clock(150)
+        '10:30'
+    """
+
+    def __init__(
+        self,
+        jobs: Union[List[Job], JobTable],
+        downtimes: List[MachineDowntime],
+        constraints: ShiftConstraints,
+        setup: Optional[SetupConfig] = None
+    ):
+        """
+        Args:
+            jobs: Job models or an already columnar JobTable
+            downtimes: Machine downtime windows
+            constraints: Shift
+            setup: Changeover times (default: the plant's SETUP_MATRIX_FILE)
+        """
+        self.table = jobs if isinstance(jobs, JobTable) else JobTable.from_jobs(jobs)
+        self.downtime_list = list(downtimes)
+        self.constraints = constraints
+
+        # Shift boundaries
+        self.shift_start_clock = clock_to_minutes(constraints.start_time)
+        end_clock = clock_to_minutes(constraints.end_time)
+        self.overnight = end_clock < self.shift_start_clock
+        self.shift_start = 0
+        self.shift_end = self.to_offset(constraints.end_time)
+
+        # Per-job columns as lists (same order as the table) for the hot loops
+        table = self.table
+        self.num_jobs = len(table)
+        self.job_ids: List[str] = table.job_id.tolist()
+        self.job_index = {job_id: idx for idx, job_id in enumerate(self.job_ids)}
+        self.processing: List[int] = table.processing_time.tolist()
+        self.products: List[str] = table.product_type.tolist()
+        self.product_codes: List[int] = table.product_code.tolist()
+        self.rush: List[bool] = table.rush.tolist()
+        # Due clock minute -> minutes from shift start (same rule as to_offset)
+        due_clock = table.due_minute.astype(np.int64)
+        due_offset = due_clock - self.shift_start_clock
+        if self.overnight:
+            due_offset[due_clock < self.shift_start_clock] += MINUTES_PER_DAY
+        self.has_due = due_clock >= 0
+        self.due_offsets = due_offset  # Meaningless where not has_due
+        self.due: List[Optional[int]] = [
+            offset if clock >= 0 else None
+            for clock, offset in zip(due_clock.tolist(), due_offset.tolist())
+        ]
+
+        # Changeover minutes by product code pair, shared by agents, KPIs and validator
+        self.setup = SetupMatrix(setup or plant_setup_config(), table.product_names)
+
+        # Merged per-machine downtime windows shared by agents and validator
+        self.downtimes = DowntimeIndex(
+            (dt.machine_id, self.to_offset(dt.start_time), self.to_offset(dt.end_time))
+            for dt in self.downtime_list
+        )
+
+    @property
+    def jobs(self) -> List[Job]:
+        """Job objects (built from the table on first use)."""
+        return self.table.to_jobs()
+
+    def to_offset(self, t_str: str) -> int:
+        """Minutes from shift start for an "HH:MM" clock time."""
+        clock = clock_to_minutes(t_str)
+        if self.overnight and clock < self.shift_start_clock:
+            clock += MINUTES_PER_DAY
+        return clock - self.shift_start_clock
+
+    def to_clock(self, offset: int) -> str:
+        """"HH:MM" clock time for a minute offset from shift start."""
+        clock = (self.shift_start_clock + offset) % MINUTES_PER_DAY
+        return f"{clock // 60:02d}:{clock % 60:02d}"
+
+    def to_schedules(self, plan: Plan, setup_notes: bool = False) -> Dict[str, List[ScheduledJob]]:
+        """
+        Render a plan as API schedules (the only place times become strings).
+
+        Args:
+            plan: Machine ID -> slots
+            setup_notes: Annotate jobs preceded by a setup with "Setup: Nmin"
+
+        Returns:
+            Machine ID -> ScheduledJob list
+        """
+        schedules: Dict[str, List[ScheduledJob]] = {}
+        for machine_id, slots in plan.items():
+            schedules[machine_id] = [
+                ScheduledJob(
+                    job_id=self.job_ids[slot.job],
+                    machine_id=machine_id,
+                    start_time=self.to_clock(slot.start),
+                    end_time=self.to_clock(slot.end),
+                    product_type=self.products[slot.job],
+                    is_setup=False,
+                    notes=f"Setup: {slot.setup}min" if setup_notes and slot.setup > 0 else None
+                )
+                for slot in slots
+            ]
+        return schedules
+
+    def plan_from_schedules(self, schedules: Dict[str, List[ScheduledJob]]) -> Plan:
+        """
+        Compile API schedules back into a plan.
+
+        Clock times carry no date and plans may run past midnight, so each
+        machine's jobs are read in list (start) order: a start before the
+        shift start or before the previous job's start is on a later day.
+        Scheduled jobs that do not belong to this instance are skipped.
+        """
+        plan: Plan = {}
+        for machine_id, job_list in schedules.items():
+            slots = []
+            floor = self.shift_start
+            for s_job in job_list:
+                idx = self.job_index.get(s_job.job_id)
+                if idx is None:
+                    continue
+                start = self.to_offset(s_job.start_time)
+                if start < floor:
+                    start += -(-(floor - start) // MINUTES_PER_DAY) * MINUTES_PER_DAY
+                end = self.to_offset(s_job.end_time)
+                if end < start:
+                    end += -(-(start - end) // MINUTES_PER_DAY) * MINUTES_PER_DAY
+                slots.append(Slot(idx, start, end))
+                floor = start
+            plan[machine_id] = slots
+        return plan
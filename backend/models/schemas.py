@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field, validator
-from typing import List, Optional, Dict, Union
+from pydantic import BaseModel, Field, PrivateAttr, validator
+from typing import Any, List, Optional, Dict, Union
 from datetime import datetime, time
 from enum import Enum
 
@@ -32,11 +32,14 @@ class ShiftConstraints(BaseModel):
     end_time: str = "16:00"
     
 class SetupConfig(BaseModel):
-    same_product_time: int = 15
-    different_product_time: int = 60
+    same_product_time: int = 0
+    different_product_time: int = 10
+    # Per product pair overrides: changeovers[from_product][to_product] = minutes
+    changeovers: Dict[str, Dict[str, int]] = {}
 
 class OptimizationRequest(BaseModel):
-    jobs: List[Job]
+    jobs: List[Job] = []
+    upload_id: Optional[str] = None # Stored jobs upload (POST /data/upload-jobs) instead of jobs
     downtimes: List[MachineDowntime] = []
     shift: ShiftConstraints = ShiftConstraints()
     run_simulation: bool = False
@@ -50,6 +53,20 @@ class ScheduledJob(BaseModel):
     is_setup: bool = False
     notes: Optional[str] = None
 
+class RepairRequest(OptimizationRequest):
+    schedules: Dict[str, List[ScheduledJob]] # Existing schedule: machine_id -> jobs
+    failure: MachineDowntime # New failure window on one machine
+
+class ScheduleChange(BaseModel):
+    job_id: str
+    change: str # moved (other machine) | retimed (same machine) | unassigned
+    from_machine: str
+    from_start: str
+    from_end: str
+    to_machine: Optional[str] = None
+    to_start: Optional[str] = None
+    to_end: Optional[str] = None
+
 class MachineSchedule(BaseModel):
     machine_id: str
     jobs: List[ScheduledJob]
@@ -66,16 +83,87 @@ class KPIResult(BaseModel):
     bottleneck_machine: str
     score: float
 
+class StrategyRun(BaseModel):
+    candidate: str # baseline | batching | bottleneck | registered extra candidate key
+    status: str # finished | cancelled | failed | skipped
+    elapsed_ms: float = 0.0
+    error: Optional[str] = None
+    truncated: bool = False # Anytime strategy given less than its configured time_budget
+
+class PortfolioReport(BaseModel):
+    time_budget: Optional[float] = None # seconds; None = every strategy ran to completion
+    deadline_hit: bool = False
+    cached: bool = False # Served from the candidate cache (timings are from the original run)
+    elapsed_ms: float = 0.0
+    strategies: List[StrategyRun] = []
+
+class TrajectoryPoint(BaseModel):
+    elapsed_ms: float
+    iteration: int # Moves tried (annealing) or generations (genetic)
+    best_objective: float # Best selection objective found so far
+    temperature: Optional[float] = None # Annealing temperature at this point
+
+class ObjectiveBound(BaseModel):
+    objective: float # Selection objective of the returned schedule
+    bound: float # Proven upper bound on the selection objective of any schedule
+    gap_pct: float # (bound - objective) / max(|bound|, 1) * 100
+    proven_optimal: bool = False
+    source: str # Where the bound comes from, e.g. "branch_and_bound"
+    valid: bool = True # False if the objective exceeds the bound (the bound is wrong)
+
 class AgentResult(BaseModel):
     agent_name: str
     schedules: Dict[str, List[ScheduledJob]] # machine_id -> jobs
     kpis: KPIResult
     explanation: str
     violations: List[str] = []
+    violation_counts: Dict[str, int] = {} # Per violation type (constraint validation only)
+    # Background LLM explanation: fetch /optimize/explanations/{explanation_id}
+    explanation_id: Optional[str] = None
+    explanation_status: str = "ready" # ready | pending | failed
+    # Orchestrated results: which strategies finished and how long each took
+    portfolio: Optional[PortfolioReport] = None
+    # Metaheuristic agents: best objective over the search (improvement trajectory)
+    trajectory: List[TrajectoryPoint] = []
+    # Proven bound on the selection objective and the optimality gap, when known
+    bound: Optional[ObjectiveBound] = None
+    # Minute-based plan behind `schedules` (internal, never serialized)
+    _plan: Optional[dict] = PrivateAttr(default=None)
 
 class ComparisonResponse(BaseModel):
-    baseline: AgentResult
-    batching: AgentResult
-    bottleneck: AgentResult
+    # None when the strategy did not finish within the portfolio time budget
+    baseline: Optional[AgentResult] = None
+    batching: Optional[AgentResult] = None
+    bottleneck: Optional[AgentResult] = None
     orchestrated: AgentResult
     summary: str
+    # Candidates registered on the orchestrator beyond the three greedy agents
+    extra_candidates: Dict[str, AgentResult] = {}
+    portfolio: Optional[PortfolioReport] = None
+
+class RepairResponse(BaseModel):
+    schedules: Dict[str, List[ScheduledJob]] # Repaired schedule: machine_id -> jobs
+    downtimes: List[MachineDowntime] # Request downtimes plus the failure
+    changes: List[ScheduleChange] # Every job whose placement changed
+    kpis: KPIResult
+    violations: List[str]
+    repair_ms: float # Time spent re-placing the affected jobs
+
+class ProgressEvent(BaseModel):
+    seq: int
+    event: str
+    data: Dict[str, Any] = {}
+    elapsed_ms: float
+
+class OptimizationJobStatus(BaseModel):
+    job_id: str
+    mode: str
+    status: str # queued | running | done | failed
+    events: List[ProgressEvent] = []
+    result: Optional[Union[ComparisonResponse, AgentResult]] = None
+    error: Optional[str] = None
+
+class ExplanationStatus(BaseModel):
+    explanation_id: str
+    status: str # ready | pending | failed | unknown
+    text: Optional[str] = None
@@ -0,0 +1,149 @@
+"""
+Violation Report - Structured constraint violations of a plan
+
+The Constraint Agent used to build an f-string for every violation while
+it walked the schedule, although the orchestrator and the local search
+only ever look at how many there are. A ViolationReport keeps violations
+as parallel NumPy columns (one row per violation) and renders the
+familiar messages only when asked, in the same order and wording as the
+original validator.
+
+Key Features:
+    - One record per violation: kind, machine, slot position, job, values
+    - Per-type counts without rendering anything
+    - render(limit) produces the legacy message strings
+    - len(report) is the number of messages (all unassigned jobs share one)
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Violation kinds, in the order the checks run for a slot
+UNASSIGNED = 0
+SHIFT_OVERRUN = 1
+INCOMPATIBLE_MACHINE = 2
+DOWNTIME_CONFLICT = 3
+OVERLAP = 4
+RUSH_LATE = 5
+SETUP_GAP = 6
+
+VIOLATION_TYPES = [
+    "unassigned",
+    "shift_overrun",
+    "incompatible_machine",
+    "downtime_conflict",
+    "overlap",
+    "rush_late",
+    "setup_gap",
+]
+
+
+class ViolationReport:
+    """
+    Violations of one plan as columns.
+
+    Each record has: kind, machine (position in `machines`, -1 for
+    unassigned jobs), pos (slot position in start order on that machine),
+    job, end (slot end), value (overrun / overlap / tardiness minutes),
+    and for downtime conflicts the window (window_start, window_end);
+    for overlaps `other` is the next job on the machine; for setup gaps
+    `other` is the previous job, `value` the gap and `required` the
+    changeover the setup matrix asks for.
+
+    Example:
+        >>> report = ConstraintAgent().check_plan(instance, plan)
+        >>> len(report), report.counts()["rush_late"]
+        (3, 1)
+        >>> report.render(limit=1)
+        ['CRITICAL: Rush job J007 is 25 min late (due 10:00, ends 10:25)']
+    """
+
+    COLUMNS = ("kind", "machine", "pos", "job", "end", "value", "other", "window_start", "window_end", "required")
+
+    def __init__(self, instance, machines: List[str], columns: Optional[Dict[str, np.ndarray]] = None):
+        """
+        Args:
+            instance: ProblemInstance the plan belongs to (for rendering)
+            machines: Machine IDs of the plan, in plan order
+            columns: Record columns (unsorted); empty report when omitted
+        """
+        self.instance = instance
+        self.machines = machines
+        columns = columns or {}
+        size = len(columns["kind"]) if columns else 0
+        data = {
+            name: np.asarray(columns.get(name, np.full(size, -1)), dtype=np.int64)
+            for name in self.COLUMNS
+        }
+        # Message order: unassigned first, then machine, slot, check, window
+        order = np.lexsort((data["window_start"], data["kind"], data["pos"], data["machine"]))
+        for name in self.COLUMNS:
+            setattr(self, name, data[name][order])
+
+    def __len__(self) -> int:
+        unassigned = int(np.count_nonzero(self.kind == UNASSIGNED))
+        return len(self.kind) - unassigned + (1 if unassigned else 0)
+
+    def __bool__(self) -> bool:
+        return len(self.kind) > 0
+
+    def counts(self) -> Dict[str, int]:
+        """Violations per type (unassigned counts jobs)."""
+        totals = np.bincount(self.kind, minlength=len(VIOLATION_TYPES)) if len(self.kind) else [0] * len(VIOLATION_TYPES)
+        return {name: int(totals[k]) for k, name in enumerate(VIOLATION_TYPES)}
+
+    def records(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Violations as dicts (job and machine IDs resolved), in message order."""
+        job_ids = self.instance.job_ids
+        stop = len(self.kind) if limit is None else min(limit, len(self.kind))
+        records = []
+        for i in range(stop):
+            kind = int(self.kind[i])
+            record = {
+                "type": VIOLATION_TYPES[kind],
+                "job_id": job_ids[self.job[i]],
+                "machine_id": self.machines[self.machine[i]] if self.machine[i] >= 0 else None,
+            }
+            if kind != UNASSIGNED and kind != INCOMPATIBLE_MACHINE:
+                record["minutes"] = int(self.value[i]) if kind != DOWNTIME_CONFLICT else int(self.window_end[i] - self.window_start[i])
+            if kind == OVERLAP or kind == SETUP_GAP:
+                record["other_job_id"] = job_ids[self.other[i]]
+            if kind == SETUP_GAP:
+                record["required_minutes"] = int(self.required[i])
+            records.append(record)
+        return records
+
+    def render(self, limit: Optional[int] = None) -> List[str]:
+        """Legacy violation messages, identical to the original validator's output."""
+        instance = self.instance
+        job_ids = instance.job_ids
+        clock = instance.to_clock
+        due_times = instance.table.due_time
+
+        messages: List[str] = []
+        unassigned = self.job[self.kind == UNASSIGNED]
+        if len(unassigned):
+            # The old check was by job ID, in job order
+            messages.append(f"Not all jobs assigned. Missing: {', '.join(job_ids[j] for j in np.sort(unassigned).tolist())}")
+
+        rows = np.flatnonzero(self.kind != UNASSIGNED)
+        if limit is not None:
+            rows = rows[:max(0, limit - len(messages))]
+        for i in rows.tolist():
+            kind = self.kind[i]
+            job_id = job_ids[self.job[i]]
+            m_id = self.machines[self.machine[i]]
+            if kind == SHIFT_OVERRUN:
+                messages.append(f"Job {job_id} on {m_id} ends at {clock(int(self.end[i]))}, exceeds shift end by {self.value[i]} min.")
+            elif kind == INCOMPATIBLE_MACHINE:
+                messages.append(f"Job {job_id} assigned to incompatible machine {m_id}.")
+            elif kind == DOWNTIME_CONFLICT:
+                messages.append(f"Job {job_id} on {m_id} overlaps with downtime {clock(int(self.window_start[i]))}-{clock(int(self.window_end[i]))}.")
+            elif kind == OVERLAP:
+                messages.append(f"Job {job_id} overlaps with {job_ids[self.other[i]]} on {m_id} by {self.value[i]} min.")
+            elif kind == SETUP_GAP:
+                messages.append(f"Job {job_id} on {m_id} starts {self.value[i]} min after {job_ids[self.other[i]]}, needs {self.required[i]} min setup.")
+            else:
+                messages.append(f"CRITICAL: Rush job {job_id} is {self.value[i]} min late (due {due_times[self.job[i]]}, ends {clock(int(self.end[i]))})")
+        return messages[:limit] if limit is not None else messages
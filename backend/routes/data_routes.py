@@ -1,11 +1,29 @@
+import asyncio
 from fastapi import APIRouter, UploadFile, File, HTTPException
-from typing import List
-from models.schemas import Job, MachineDowntime
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import List, Union
+from config import settings
+from models.job_table import JobTable
+from models.schemas import Job, MachineDowntime, OptimizationRequest
 from models.data_generator import generate_random_jobs, generate_random_downtime
-from utils.csv_handler import parse_jobs_csv, parse_downtime_csv
+from models.instance_generator import InstanceGenerator
+from utils.csv_handler import parse_jobs_table, parse_downtime_csv, CSVValidationError, UploadLimitError
+from utils.upload_store import upload_store
 
 router = APIRouter(prefix="/data", tags=["Data"])
 
+MAX_REPORTED_ROW_ERRORS = 100
+
+def csv_error_detail(error: CSVValidationError) -> dict:
+    """400 body: summary plus the first row errors (all were collected)."""
+    return {
+        "message": str(error),
+        "error_count": len(error.errors),
+        "truncated": error.truncated,
+        "errors": error.errors[:MAX_REPORTED_ROW_ERRORS]
+    }
+
 @router.post("/generate-random", response_model=dict)
 async def generate_random_data(job_count: int = 20, rush_prob: float = 0.2, downtime_count: int = 0, machine_count: int = 4):
     jobs = generate_random_jobs(job_count, rush_prob, machine_count)
@@ -15,30 +33,128 @@ async def generate_random_data(job_count: int = 20, rush_prob: float = 0.2, down
         "downtimes": downtimes
     }
 
+MAX_STREAM_JOBS = 5_000_000
+
+@router.get("/generate-stream")
+async def generate_stream(
+    job_count: int = 1000,
+    machine_count: int = 4,
+    seed: int = 0,
+    rush_prob: float = 0.2,
+    capability_density: float = 0.6,
+    format: str = "csv"
+):
+    """
+    Stream a seeded, reproducible job instance as CSV (upload format) or NDJSON.
+    Intended for load tests and benchmarks at production scale.
+    """
+    if format not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be 'csv' or 'ndjson'")
+    if not 0 < job_count <= MAX_STREAM_JOBS or machine_count < 1:
+        raise HTTPException(status_code=400, detail=f"job_count must be 1-{MAX_STREAM_JOBS} and machine_count >= 1")
+
+    generator = InstanceGenerator(
+        seed=seed, num_machines=machine_count,
+        rush_probability=rush_prob, capability_density=capability_density
+    )
+    columns = generator.job_columns(job_count)
+    if format == "csv":
+        body, media_type = generator.iter_csv(columns), "text/csv"
+    else:
+        body, media_type = generator.iter_ndjson(columns), "application/x-ndjson"
+    filename = f"jobs_{job_count}_m{machine_count}_s{seed}.{format}"
+    return StreamingResponse(
+        body, media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @router.post("/generate-downtime", response_model=List[MachineDowntime])
 async def generate_downtime_only(count: int = 1, machine_count: int = 4):
     return generate_random_downtime(count, machine_count)
 
-@router.post("/upload-jobs", response_model=List[Job])
-async def upload_jobs(file: UploadFile = File(...)):
+# Bounds how many large files are parsed (and held) at the same time
+_upload_slots = asyncio.Semaphore(settings.UPLOAD_MAX_CONCURRENT)
+MAX_UPLOAD_PAGE = 10_000
+
+async def parse_upload(file: UploadFile, kind: str, parse) -> dict:
+    """
+    Parse an uploaded CSV in chunks off the event loop and store it.
+
+    The body is read from the spooled upload file incrementally (never as
+    one bytes object); the row / byte limits and the header check abort
+    the parse early.
+
+    Returns:
+        The stored upload's summary (counts and upload_id)
+    """
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="File must be a CSV")
-    
-    content = await file.read()
-    try:
-        jobs = parse_jobs_csv(content)
-        return jobs
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
-
-@router.post("/upload-downtime", response_model=List[MachineDowntime])
+    if file.size is not None and file.size > settings.UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"File exceeds the upload limit of {settings.UPLOAD_MAX_BYTES} bytes")
+
+    async with _upload_slots:
+        try:
+            data = await run_in_threadpool(
+                parse, file.file,
+                chunk_rows=settings.UPLOAD_CHUNK_ROWS,
+                max_rows=settings.UPLOAD_MAX_ROWS,
+                max_bytes=settings.UPLOAD_MAX_BYTES
+            )
+            size_bytes = file.size if file.size is not None else file.file.tell()
+        except CSVValidationError as e:
+            raise HTTPException(status_code=400, detail=csv_error_detail(e))
+        except UploadLimitError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        finally:
+            await file.close()
+
+    return upload_store.put(kind, data, file.filename, size_bytes).summary()
+
+@router.post("/upload-jobs", response_model=dict)
+async def upload_jobs(file: UploadFile = File(...)):
+    """
+    Upload a jobs CSV; returns counts and an upload_id. Optimization
+    requests send the upload_id instead of the jobs (rows via GET /data/uploads/{upload_id}).
+    """
+    return await parse_upload(file, "jobs", parse_jobs_table)
+
+@router.post("/upload-downtime", response_model=dict)
 async def upload_downtime(file: UploadFile = File(...)):
-    if not file.filename.endswith('.csv'):
-        raise HTTPException(status_code=400, detail="File must be a CSV")
-    
-    content = await file.read()
-    try:
-        downtimes = parse_downtime_csv(content)
-        return downtimes
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    """Upload a downtime CSV; returns counts and an upload_id."""
+    return await parse_upload(file, "downtimes", parse_downtime_csv)
+
+@router.get("/uploads/{upload_id}", response_model=dict)
+async def get_upload(upload_id: str, offset: int = 0, limit: int = 1000):
+    """One page of an upload's parsed rows (Jobs or MachineDowntimes)."""
+    upload = upload_store.get(upload_id)
+    if upload is None:
+        raise HTTPException(status_code=404, detail=f"Upload {upload_id} not found or expired")
+    if offset < 0 or not 0 < limit <= MAX_UPLOAD_PAGE:
+        raise HTTPException(status_code=400, detail=f"offset must be >= 0 and limit 1-{MAX_UPLOAD_PAGE}")
+    return {
+        "upload_id": upload_id,
+        "kind": upload.kind,
+        "rows": upload.rows,
+        "offset": offset,
+        "items": upload.page(offset, limit)
+    }
+
+def request_jobs(request: OptimizationRequest) -> Union[List[Job], JobTable]:
+    """
+    The request's jobs: its upload's stored JobTable if it names an
+    upload_id (shared, never copied into Job objects), else its job list.
+    """
+    if request.upload_id is None:
+        return request.jobs
+    if request.jobs:
+        raise HTTPException(status_code=400, detail="Send either jobs or an upload_id, not both")
+    table = upload_store.jobs_table(request.upload_id)
+    if table is None:
+        raise HTTPException(status_code=404, detail=f"Jobs upload {request.upload_id} not found or expired")
+    return table
+
+@router.delete("/uploads/{upload_id}", response_model=dict)
+async def delete_upload(upload_id: str):
+    if not upload_store.delete(upload_id):
+        raise HTTPException(status_code=404, detail=f"Upload {upload_id} not found or expired")
+    return {"deleted": upload_id}
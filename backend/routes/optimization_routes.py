@@ -1,9 +1,16 @@
-from fastapi import APIRouter, HTTPException
-from models.schemas import OptimizationRequest, AgentResult, ComparisonResponse
+import json
+from fastapi import APIRouter, HTTPException, Header
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from models.schemas import OptimizationRequest, AgentResult, ComparisonResponse, OptimizationJobStatus, ExplanationStatus
 from agents.baseline_agent import BaselineAgent
 from agents.batching_agent import BatchingAgent
 from agents.bottleneck_agent import BottleneckAgent
-from agents.orchestrator import OrchestratorAgent
+from agents.orchestrator import OrchestratorAgent, summarize_candidate, settle_explanations
+from utils.job_manager import job_manager
+from utils.explanation_service import explanation_service
+from utils.result_cache import result_cache, request_fingerprint
+from routes.data_routes import request_jobs
 
 router = APIRouter(prefix="/optimize", tags=["Optimization"])
 
@@ -13,22 +20,173 @@ batching_agent = BatchingAgent()
 bottleneck_agent = BottleneckAgent()
 orchestrator_agent = OrchestratorAgent()
 
+SINGLE_AGENTS = {
+    "baseline": baseline_agent,
+    "batching": batching_agent,
+    "bottleneck": bottleneck_agent,
+}
+
+# Schedules are returned as soon as they are computed. LLM explanations are
+# generated in the background (explanation_status="pending") and fetched from
+# /optimize/explanations/{explanation_id}, unless wait_explanations=true.
+
+# Identical payloads are served from the content-addressed result cache;
+# orchestrated and compare-all share their candidate evaluation there too.
+
+async def _cached_agent_result(name: str, request: OptimizationRequest, wait_explanations: bool = False) -> AgentResult:
+    """Single-agent result for `request`, computed at most once per payload."""
+    agent = SINGLE_AGENTS[name]
+    kwargs = {} if agent is baseline_agent else {"wait_explanation": False}
+    jobs = request_jobs(request)
+    key = (name, request_fingerprint(jobs, request.downtimes, request.shift))
+    cached = await result_cache.get_or_compute(
+        key, lambda: agent.optimize(jobs, request.downtimes, request.shift, **kwargs)
+    )
+    result = cached.model_copy()
+    if wait_explanations:
+        await settle_explanations([result])
+    return result
+
 @router.post("/baseline", response_model=AgentResult)
 async def run_baseline(request: OptimizationRequest):
-    return await baseline_agent.optimize(request.jobs, request.downtimes, request.shift)
+    return await _cached_agent_result("baseline", request)
 
 @router.post("/batching", response_model=AgentResult)
-async def run_batching(request: OptimizationRequest):
-    return await batching_agent.optimize(request.jobs, request.downtimes, request.shift)
+async def run_batching(request: OptimizationRequest, wait_explanations: bool = False):
+    return await _cached_agent_result("batching", request, wait_explanations)
 
 @router.post("/bottleneck", response_model=AgentResult)
-async def run_bottleneck(request: OptimizationRequest):
-    return await bottleneck_agent.optimize(request.jobs, request.downtimes, request.shift)
+async def run_bottleneck(request: OptimizationRequest, wait_explanations: bool = False):
+    return await _cached_agent_result("bottleneck", request, wait_explanations)
 
 @router.post("/orchestrated", response_model=AgentResult)
-async def run_orchestrated(request: OptimizationRequest):
-    return await orchestrator_agent.optimize(request.jobs, request.downtimes, request.shift)
+async def run_orchestrated(request: OptimizationRequest, wait_explanations: bool = False, time_budget: Optional[float] = None):
+    return await orchestrator_agent.optimize(
+        request_jobs(request), request.downtimes, request.shift,
+        wait_explanations=wait_explanations, time_budget=_time_budget(time_budget)
+    )
 
 @router.post("/compare-all", response_model=ComparisonResponse)
-async def run_comparison(request: OptimizationRequest):
-    return await orchestrator_agent.compare_all(request.jobs, request.downtimes, request.shift)
+async def run_comparison(request: OptimizationRequest, wait_explanations: bool = False, time_budget: Optional[float] = None):
+    return await orchestrator_agent.compare_all(
+        request_jobs(request), request.downtimes, request.shift,
+        wait_explanations=wait_explanations, time_budget=_time_budget(time_budget)
+    )
+
+@router.get("/cache-stats")
+async def get_cache_stats():
+    """Hit/miss counters and size of the optimization result cache."""
+    return result_cache.stats()
+
+@router.delete("/cache")
+async def clear_cache():
+    result_cache.clear()
+    return {"message": "Result cache cleared"}
+
+@router.get("/explanations-stats")
+async def get_explanation_stats():
+    return explanation_service.stats()
+
+@router.get("/explanations/{explanation_id}", response_model=ExplanationStatus)
+async def get_explanation(explanation_id: str, wait: float = 0):
+    """Background explanation text; with wait > 0 waits up to `wait` seconds for it."""
+    if wait > 0:
+        status, text = await explanation_service.wait(explanation_id, timeout=min(wait, 60))
+    else:
+        status, text = explanation_service.status(explanation_id)
+    if status == "unknown":
+        raise HTTPException(status_code=404, detail=f"Explanation {explanation_id} not found")
+    return ExplanationStatus(explanation_id=explanation_id, status=status, text=text)
+
+# --- Background jobs with progress streaming ---
+
+def _time_budget(time_budget: Optional[float]) -> Optional[float]:
+    """Validate a portfolio time budget (seconds) from the query string."""
+    if time_budget is not None and time_budget <= 0:
+        raise HTTPException(status_code=400, detail="time_budget must be a positive number of seconds")
+    return time_budget
+
+JOB_MODES = list(SINGLE_AGENTS) + ["orchestrated", "compare-all"]
+
+def _job_runner(mode: str, request: OptimizationRequest, time_budget: Optional[float] = None):
+    """Build the coroutine function that runs `mode` and reports progress."""
+    jobs = request_jobs(request)  # Resolved at submit time: an unknown upload is a 404 there
+
+    async def run(job):
+        progress = job.emit
+        if mode == "orchestrated":
+            result = await orchestrator_agent.optimize(
+                jobs, request.downtimes, request.shift, progress=progress, wait_explanations=False,
+                time_budget=time_budget
+            )
+            results = [result]
+        elif mode == "compare-all":
+            result = await orchestrator_agent.compare_all(
+                jobs, request.downtimes, request.shift, progress=progress, wait_explanations=False,
+                time_budget=time_budget
+            )
+            results = [res for res in (result.baseline, result.batching, result.bottleneck) if res is not None]
+            results.append(result.orchestrated)
+            results += list(result.extra_candidates.values())
+        else:
+            result = await _cached_agent_result(mode, request)
+            progress("candidate_done", summarize_candidate(result))
+            results = [result]
+        
+        # Schedules are available now; explanations stream in as they arrive
+        job.result = result
+        progress("result_ready", {})
+        await settle_explanations(results, progress)
+        if mode == "compare-all":
+            result.summary = result.orchestrated.explanation
+        return result
+    return run
+
+def _job_status(job, after: int = 0) -> OptimizationJobStatus:
+    return OptimizationJobStatus(
+        job_id=job.job_id,
+        mode=job.mode,
+        status=job.status,
+        events=job.events[after:],
+        result=job.result,
+        error=job.error
+    )
+
+@router.post("/jobs", response_model=OptimizationJobStatus, status_code=202)
+async def submit_job(request: OptimizationRequest, mode: str = "orchestrated", time_budget: Optional[float] = None):
+    """Start an optimization in the background and return its job id immediately."""
+    if mode not in JOB_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown mode '{mode}'. Use one of: {', '.join(JOB_MODES)}")
+    job = job_manager.submit(mode, _job_runner(mode, request, _time_budget(time_budget)))
+    return _job_status(job)
+
+@router.get("/jobs/{job_id}", response_model=OptimizationJobStatus)
+async def get_job(job_id: str, after: int = 0, wait: float = 0):
+    """
+    Job status and events with seq >= after.
+    With wait > 0 this long-polls for up to `wait` seconds until a new event arrives.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    if wait > 0:
+        await job.wait_for_events(after, timeout=min(wait, 60))
+    return _job_status(job, after)
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, last_event_id: Optional[str] = Header(default=None)):
+    """Server-Sent Events stream of job progress; resumes after Last-Event-ID."""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    after = int(last_event_id) + 1 if last_event_id and last_event_id.isdigit() else 0
+
+    async def event_source():
+        async for event in job.stream(after):
+            yield f"id: {event['seq']}\nevent: {event['event']}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,10 +1,20 @@
-from fastapi import APIRouter
-from models.schemas import MachineDowntime, OptimizationRequest, ScheduledJob
+import time
+from typing import List, Union
+from fastapi import APIRouter, HTTPException
+from models.job_table import JobTable
+from models.schemas import Job, MachineDowntime, OptimizationRequest, RepairRequest, RepairResponse, ScheduleChange
+from models.problem_instance import ProblemInstance
+from agents.constraint_agent import ConstraintAgent
+from utils.executor import run_cpu_bound
+from utils.schedule_repair import repair_plan, with_setups
+from routes.data_routes import request_jobs
 from datetime import datetime, timedelta
 import random
 
 router = APIRouter(prefix="/simulate", tags=["Simulation"])
 
+constraint_agent = ConstraintAgent()
+
 @router.post("/machine-failure", response_model=OptimizationRequest)
 async def simulate_failure(request: OptimizationRequest, machine_id: str):
     """
@@ -26,3 +36,54 @@ async def simulate_failure(request: OptimizationRequest, machine_id: str):
     
     request.downtimes.append(new_downtime)
     return request
+
+@router.post("/repair", response_model=RepairResponse)
+async def repair_schedule(request: RepairRequest):
+    """
+    Repairs an existing schedule after a new machine failure.
+    Only the jobs the failure displaces or pushes later on that machine are
+    re-placed (on any of their machine options); every other job keeps its
+    slot. Returns the repaired schedule and the changed jobs.
+    """
+    scheduled = [s_job.job_id for job_list in request.schedules.values() for s_job in job_list]
+    if len(scheduled) != len(set(scheduled)):
+        raise HTTPException(status_code=400, detail="A job appears more than once in the schedules")
+    return await run_cpu_bound(_repair, request, request_jobs(request))
+
+def _repair(request: RepairRequest, jobs: Union[List[Job], JobTable]) -> RepairResponse:
+    """Compile, repair, score and validate (CPU-bound; runs through run_cpu_bound)."""
+    failure = request.failure
+    downtimes = request.downtimes + [failure]
+    instance = ProblemInstance(jobs, downtimes, request.shift)
+    plan = instance.plan_from_schedules(request.schedules)
+
+    started = time.perf_counter()
+    repaired, slot_changes, kpis = repair_plan(instance, plan, failure.machine_id, instance.to_offset(failure.start_time))
+    repair_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    clock = instance.to_clock
+    changes = [
+        ScheduleChange(
+            job_id=instance.job_ids[change.job],
+            change="unassigned" if change.new is None else "retimed" if change.new_machine == change.old_machine else "moved",
+            from_machine=change.old_machine,
+            from_start=clock(change.old.start),
+            from_end=clock(change.old.end),
+            to_machine=change.new_machine,
+            to_start=clock(change.new.start) if change.new is not None else None,
+            to_end=clock(change.new.end) if change.new is not None else None
+        )
+        for change in slot_changes
+    ]
+    # Machines without changes are returned as sent
+    schedules = dict(request.schedules)
+    changed = {change.from_machine for change in changes} | {change.to_machine for change in changes if change.to_machine}
+    schedules.update(instance.to_schedules({m: with_setups(instance, repaired[m]) for m in changed}, setup_notes=True))
+    return RepairResponse(
+        schedules=schedules,
+        downtimes=downtimes,
+        changes=changes,
+        kpis=kpis,
+        violations=constraint_agent.validate_plan(instance, repaired),
+        repair_ms=repair_ms
+    )
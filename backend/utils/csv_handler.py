@@ -1,70 +1,257 @@
+import re
+import numpy as np
 import pandas as pd
-from typing import List, Union
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
 from io import BytesIO
-from models.schemas import Job, MachineDowntime, JobPriority
+from models.schemas import Job, MachineDowntime
+from models.job_table import JobTable
 
-def parse_jobs_csv(file_content: bytes) -> List[Job]:
-    try:
-        df = pd.read_csv(BytesIO(file_content))
-        required_cols = ["job_id", "product_type", "machine_options", "processing_time", "priority", "due_time"]
-        
-        # Check columns
-        missing = [col for col in required_cols if col not in df.columns]
-        if missing:
-            raise ValueError(f"Missing required columns: {', '.join(missing)}")
-            
-        jobs = []
-        for _, row in df.iterrows():
-            # Handle list parsing for machine_options
-            machines = row["machine_options"]
-            if isinstance(machines, str):
-                machines = [m.strip() for m in machines.split(';')] # Semicolon separated in CSV preferably
-            
-            # Priority is now required
-            priority = JobPriority.NORMAL
-            if str(row["priority"]).lower() == "rush":
-                priority = JobPriority.RUSH
-                
-            # Due time is now required
-            if pd.isna(row["due_time"]):
-                raise ValueError(f"Job {row['job_id']} missing required due_time")
-            due_time = str(row["due_time"])
-
-            job = Job(
-                job_id=str(row["job_id"]),
-                product_type=str(row["product_type"]),
-                machine_options=machines,
-                processing_time=int(row["processing_time"]),
-                due_time=due_time,
-                priority=priority
-            )
-            jobs.append(job)
-        return jobs
-    except Exception as e:
-        raise ValueError(f"Error parsing Jobs CSV: {str(e)}")
+JOB_COLUMNS = ["job_id", "product_type", "machine_options", "processing_time", "priority", "due_time"]
+DOWNTIME_COLUMNS = ["machine_id", "start_time", "end_time"]
+
+# "HH:MM" with 0-23 hours and 0-59 minutes
+CLOCK_PATTERN = r"^\s*(?:[01]?\d|2[0-3]):[0-5]\d\s*$"
+CLOCK_RE = re.compile(CLOCK_PATTERN)
+
+# Chunked parsing defaults (routes pass the configured upload limits)
+DEFAULT_CHUNK_ROWS = 50_000
+# Stop reading further chunks once this many row errors have been found
+MAX_ROW_ERRORS = 1000
+
+class CSVValidationError(ValueError):
+    """
+    Raised when a CSV fails validation. Carries every row error found in
+    one pass (row = 1-based line number in the file, header is line 1).
+    `truncated` is set when parsing stopped early at MAX_ROW_ERRORS.
+    """
+    def __init__(self, message: str, errors: List[Dict[str, Any]] = None, truncated: bool = False):
+        self.errors = errors or []
+        self.truncated = truncated
+        if self.errors:
+            message = f"{message}: {len(self.errors)}{'+' if truncated else ''} row error(s), first: row {self.errors[0]['row']} {self.errors[0]['message']}"
+        super().__init__(message)
+
+class UploadLimitError(ValueError):
+    """Raised when a CSV exceeds the configured byte or row limit."""
+
+class _LimitedReader:
+    """Binary file wrapper that counts bytes and fails once past `max_bytes`."""
+    def __init__(self, raw, max_bytes: Optional[int] = None):
+        self.raw = raw
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.raw.read(size)
+        self.bytes_read += len(data)
+        if self.max_bytes is not None and self.bytes_read > self.max_bytes:
+            raise UploadLimitError(f"File exceeds the upload limit of {self.max_bytes} bytes")
+        return data
+
+    def __iter__(self):
+        return iter(self.raw)
+
+def _iter_chunks(
+    file_content: Union[bytes, BinaryIO],
+    label: str,
+    required: List[str],
+    chunk_rows: int,
+    max_rows: Optional[int],
+    max_bytes: Optional[int]
+) -> Iterator[pd.DataFrame]:
+    """
+    Read a CSV `chunk_rows` rows at a time (all values as strings).
 
-def parse_downtime_csv(file_content: bytes) -> List[MachineDowntime]:
+    Only one chunk is held in memory at a time. The header is checked
+    before any row is parsed, and the row / byte limits abort the read as
+    soon as they are crossed.
+    """
+    source = BytesIO(file_content) if isinstance(file_content, bytes) else file_content
+    reader = _LimitedReader(source, max_bytes)
     try:
-        df = pd.read_csv(BytesIO(file_content))
-        required_cols = ["machine_id", "start_time", "end_time"]
-        
-        missing = [col for col in required_cols if col not in df.columns]
-        if missing:
-            raise ValueError(f"Missing columns: {', '.join(missing)}")
-            
-        downtimes = []
-        for _, row in df.iterrows():
-            reason = "Maintenance"
-            if "reason" in df.columns and pd.notna(row["reason"]):
-                reason = str(row["reason"])
-                
-            dt = MachineDowntime(
-                machine_id=str(row["machine_id"]),
-                start_time=str(row["start_time"]),
-                end_time=str(row["end_time"]),
-                reason=reason
-            )
-            downtimes.append(dt)
-        return downtimes
+        # Everything as strings: validation decides what is a number or a time
+        chunks = pd.read_csv(reader, dtype=str, skipinitialspace=True, chunksize=chunk_rows)
+    except UploadLimitError:
+        raise
     except Exception as e:
-        raise ValueError(f"Error parsing Downtime CSV: {str(e)}")
+        raise CSVValidationError(f"Error parsing {label} CSV: {str(e)}")
+
+    with chunks:
+        rows = 0
+        first = True
+        while True:
+            try:
+                df = next(chunks)
+            except StopIteration:
+                return
+            except UploadLimitError:
+                raise
+            except Exception as e:
+                raise CSVValidationError(f"Error parsing {label} CSV: {str(e)}")
+
+            if first:
+                missing = [col for col in required if col not in df.columns]
+                if missing:
+                    raise CSVValidationError(f"Error parsing {label} CSV: Missing required columns: {', '.join(missing)}")
+                first = False
+            rows += len(df)
+            if max_rows is not None and rows > max_rows:
+                raise UploadLimitError(f"File exceeds the upload limit of {max_rows} rows")
+            yield df.reset_index(drop=True)
+
+def _blank(col: pd.Series) -> pd.Series:
+    return col.isna() | (col.str.strip() == "")
+
+def _per_value(col: pd.Series, func, missing) -> np.ndarray:
+    """
+    Apply `func` once per distinct value and broadcast back to the rows.
+    Product, options, priority and due columns have few distinct values, so
+    this replaces 200k Python calls with a few hundred. NaN maps to `missing`.
+    """
+    codes, uniques = pd.factorize(col)
+    table = np.empty(len(uniques) + 1, dtype=object)
+    table[:-1] = [func(value) for value in uniques]
+    table[-1] = missing
+    return table[codes]
+
+def _collect(errors: List[Dict[str, Any]], mask, column: str, message: str, ids: np.ndarray, first_row: int = 0):
+    """
+    Append one error per row selected by `mask` (no per-row work for valid rows).
+    `ids` identifies the rows in the error (job_id or machine_id column);
+    `first_row` is the chunk's offset in the file.
+    """
+    rows = np.flatnonzero(np.asarray(mask, dtype=bool))
+    for row in rows.tolist():
+        row_id = ids[row]
+        errors.append({
+            "row": first_row + row + 2,
+            "column": column,
+            "job_id": None if row_id is None or pd.isna(row_id) or not str(row_id).strip() else str(row_id).strip(),
+            "message": message
+        })
+
+def _split_options(value: str):
+    """ "M1; M2;M4" -> ["M1", "M2", "M4"], or None if malformed."""
+    options = [m.strip() for m in value.split(";")]
+    return options if all(options) else None
+
+def _validate_job_chunk(df: pd.DataFrame, first_row: int, errors: List[Dict[str, Any]]) -> Tuple[np.ndarray, ...]:
+    """Validate one chunk of job rows; returns its parsed columns."""
+    raw_ids = df["job_id"].to_numpy()
+    job_id = df["job_id"].str.strip()
+    _collect(errors, job_id.isna() | (job_id == ""), "job_id", "missing job_id", raw_ids, first_row)
+
+    product_type = _per_value(df["product_type"], str.strip, "")
+    _collect(errors, product_type == "", "product_type", "missing product_type", raw_ids, first_row)
+
+    # Machine options: "M1;M2;M4" (whitespace around separators allowed)
+    machine_options = _per_value(df["machine_options"], _split_options, None)
+    _collect(errors, pd.isna(machine_options), "machine_options", "machine_options must be ';'-separated machine IDs", raw_ids, first_row)
+
+    processing = pd.to_numeric(df["processing_time"], errors="coerce")
+    bad_processing = processing.isna() | (processing % 1 != 0) | (processing < 0)
+    _collect(errors, bad_processing, "processing_time", "processing_time must be a non-negative integer", raw_ids, first_row)
+
+    priority = _per_value(df["priority"], lambda v: v.strip().lower(), "")
+    rush = priority == "rush"
+    _collect(errors, ~rush & (priority != "normal"), "priority", "priority must be Rush or Normal", raw_ids, first_row)
+
+    due_time = _per_value(df["due_time"], lambda v: v.strip() if CLOCK_RE.match(v) else ("" if not v.strip() else None), "")
+    _collect(errors, due_time == "", "due_time", "missing required due_time", raw_ids, first_row)
+    _collect(errors, pd.isna(due_time), "due_time", "due_time must be HH:MM", raw_ids, first_row)
+
+    processing = processing.fillna(0).to_numpy().astype("int64")
+    return job_id.fillna("").to_numpy(), product_type, machine_options, processing, due_time, rush
+
+def parse_jobs_table(
+    file_content: Union[bytes, BinaryIO],
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    max_rows: Optional[int] = None,
+    max_bytes: Optional[int] = None
+) -> JobTable:
+    """
+    Parse and validate a jobs CSV chunk by chunk into a JobTable.
+
+    Checks (all rows, column-wise per chunk): missing job_id / product_type,
+    duplicate job_id, empty or malformed machine_options (';'-separated),
+    non-integer or negative processing_time, priority other than Rush/Normal,
+    missing or malformed due_time (HH:MM).
+
+    Args:
+        file_content: Raw bytes or a binary file object (read incrementally)
+        chunk_rows: Rows parsed per chunk
+        max_rows: Row limit (None = unlimited)
+        max_bytes: Byte limit (None = unlimited)
+
+    Raises:
+        CSVValidationError: Missing columns, or with the row errors found
+        UploadLimitError: More than max_rows rows or max_bytes bytes
+    """
+    errors: List[Dict[str, Any]] = []
+    parts: List[Tuple[np.ndarray, ...]] = []
+    first_row = 0
+    truncated = False
+
+    for df in _iter_chunks(file_content, "Jobs", JOB_COLUMNS, chunk_rows, max_rows, max_bytes):
+        parts.append(_validate_job_chunk(df, first_row, errors))
+        first_row += len(df)
+        if len(errors) >= MAX_ROW_ERRORS:
+            truncated = True  # Schema is clearly wrong: don't read the rest
+            break
+
+    columns = [np.concatenate(column) for column in zip(*parts)] if parts else [[]] * 6
+    # Duplicates can span chunks, so they are checked once over all ids
+    job_id = pd.Series(columns[0], dtype=object)
+    _collect(errors, job_id.duplicated(keep="first") & (job_id != ""), "job_id", "duplicate job_id", columns[0])
+
+    if errors:
+        errors.sort(key=lambda e: e["row"])
+        raise CSVValidationError("Error parsing Jobs CSV", errors, truncated)
+
+    return JobTable(*columns)
+
+def parse_jobs_csv(file_content: Union[bytes, BinaryIO], **limits) -> List[Job]:
+    """Parse a jobs CSV into Job objects (see parse_jobs_table for validation)."""
+    return parse_jobs_table(file_content, **limits).to_jobs()
+
+def parse_downtime_csv(
+    file_content: Union[bytes, BinaryIO],
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    max_rows: Optional[int] = None,
+    max_bytes: Optional[int] = None
+) -> List[MachineDowntime]:
+    """
+    Parse a downtime CSV chunk by chunk, validating machine_id and HH:MM times.
+
+    Raises:
+        CSVValidationError: Missing columns, or with the row errors found
+        UploadLimitError: More than max_rows rows or max_bytes bytes
+    """
+    errors: List[Dict[str, Any]] = []
+    downtimes: List[MachineDowntime] = []
+    first_row = 0
+    truncated = False
+
+    for df in _iter_chunks(file_content, "Downtime", DOWNTIME_COLUMNS, chunk_rows, max_rows, max_bytes):
+        ids = df["machine_id"].to_numpy()
+        _collect(errors, _blank(df["machine_id"]), "machine_id", "missing machine_id", ids, first_row)
+        for col in ("start_time", "end_time"):
+            _collect(errors, ~df[col].fillna("").str.match(CLOCK_PATTERN), col, f"{col} must be HH:MM", ids, first_row)
+        first_row += len(df)
+        if errors:
+            if len(errors) >= MAX_ROW_ERRORS:
+                truncated = True
+                break
+            continue  # Keep validating, stop building
+
+        reasons = df["reason"] if "reason" in df.columns else pd.Series("Maintenance", index=df.index)
+        reasons = reasons.where(~_blank(reasons), "Maintenance")
+        downtimes.extend(
+            MachineDowntime(machine_id=m.strip(), start_time=s.strip(), end_time=e.strip(), reason=str(r))
+            for m, s, e, r in zip(df["machine_id"], df["start_time"], df["end_time"], reasons)
+        )
+
+    if errors:
+        errors.sort(key=lambda e: e["row"])
+        raise CSVValidationError("Error parsing Downtime CSV", errors, truncated)
+    return downtimes
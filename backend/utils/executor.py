@@ -0,0 +1,127 @@
+"""
+Scheduler Executor - Runs CPU-bound scheduling work off the asyncio event loop
+
+The agents' dispatch loops are pure synchronous CPU work. Running them
+directly inside `async def optimize` blocks the uvicorn event loop, so a
+large request stalls every other request (including health checks).
+
+The execution mode is configured with SCHEDULER_EXECUTOR:
+    - "inline":  run in the calling coroutine (previous behaviour)
+    - "thread":  run in a thread pool; keeps the event loop responsive
+    - "process": run in a process pool; strategies use separate cores
+
+Work submitted in "process" mode must be picklable: module-level
+functions and plain data (ProblemInstance, plans, Pydantic models).
+
+Searches that fan out inside one scheduling call (the genetic agent's
+islands) use a separate long-lived process pool, get_process_pool(), so
+that worker processes are started once and not per request.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from multiprocessing.util import Finalize
+from typing import Any, Callable, Dict, Optional
+
+from config import settings
+
+EXECUTOR_MODES = ("inline", "thread", "process")
+
+_executor: Optional[Executor] = None
+_process_pools: Dict[int, ProcessPoolExecutor] = {}  # By worker count
+_process_pools_lock = threading.Lock()
+
+
+def get_executor() -> Optional[Executor]:
+    """
+    Lazily create the shared executor for the configured mode.
+
+    Returns:
+        The executor, or None in "inline" mode
+    """
+    global _executor
+    mode = settings.SCHEDULER_EXECUTOR
+    if mode not in EXECUTOR_MODES:
+        raise ValueError(f"SCHEDULER_EXECUTOR must be one of {', '.join(EXECUTOR_MODES)}, got: {mode}")
+    if mode == "inline":
+        return None
+    if _executor is None:
+        workers = settings.SCHEDULER_WORKERS or None
+        if mode == "process":
+            _executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scheduler")
+    return _executor
+
+
+async def run_cpu_bound(func: Callable[..., Any], *args: Any) -> Any:
+    """
+    Await a CPU-bound call on the configured executor.
+
+    Args:
+        func: Module-level function (picklable in "process" mode)
+        *args: Positional arguments for func
+
+    Returns:
+        Whatever func returns
+    """
+    executor = get_executor()
+    if executor is None:
+        return func(*args)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(func, *args))
+
+
+def get_process_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Long-lived process pool for work fanned out inside one scheduling call.
+
+    Created on first use for each worker count and kept for later calls
+    (scheduling threads may ask concurrently).
+
+    Args:
+        workers: Worker processes
+
+    Returns:
+        The shared pool
+    """
+    with _process_pools_lock:
+        pool = _process_pools.get(workers)
+        if pool is None:
+            if not _process_pools:
+                # A worker process of the scheduler executor joins its children
+                # on exit (no atexit there): stop the idle workers first, before
+                # multiprocessing closes the queues they would be stopped through
+                Finalize(None, shutdown_process_pools, args=(True,), exitpriority=100)
+            pool = _process_pools[workers] = ProcessPoolExecutor(max_workers=workers)
+        return pool
+
+
+def shutdown_process_pools(wait: bool = False):
+    """Shut down the long-lived process pools (wait: until their workers exited)."""
+    with _process_pools_lock:
+        for pool in _process_pools.values():
+            pool.shutdown(wait=wait, cancel_futures=True)
+        _process_pools.clear()
+
+
+def _forget_process_pools():
+    """In a forked child: the parent's pools (and lock state) are not usable."""
+    global _process_pools_lock
+    _process_pools.clear()
+    _process_pools_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_process_pools)
+
+
+def shutdown_executor():
+    """Shut down the shared executor and process pools (called on application shutdown)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+    shutdown_process_pools()
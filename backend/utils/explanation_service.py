@@ -0,0 +1,160 @@
+"""
+Explanation Service - Background, memoized LLM explanations
+
+LLM explanations used to be awaited on the critical path of every
+optimize call, although the round-trip is usually 10-50x longer than the
+scheduling itself. Explanations are now requested from this service,
+which generates them in the background and memoizes them by a
+fingerprint of exactly the inputs that appear in the prompt (KPIs,
+loads, candidate summary). Re-running a plan with identical KPI outcomes
+therefore never pays for a second LLM call.
+
+Key Features:
+    - Fingerprint = SHA-256 of the prompt kind and its inputs
+    - Concurrent requests for the same fingerprint share one LLM call
+    - LRU-bounded memo of finished texts (EXPLANATION_CACHE_SIZE)
+    - Failures fall back to a caller-provided text and are not memoized
+"""
+
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from config import settings
+
+PENDING_TEXT = "Explanation is being generated..."
+
+
+def explanation_fingerprint(kind: str, inputs: Dict[str, Any]) -> str:
+    """Stable id for an explanation prompt and its inputs."""
+    payload = json.dumps({"kind": kind, "inputs": inputs}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class ExplanationService:
+    """Generates explanations off the critical path and memoizes them."""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._texts: "OrderedDict[str, str]" = OrderedDict()
+        self._failed: Dict[str, str] = {}
+        self._pending: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def request(
+        self,
+        kind: str,
+        inputs: Dict[str, Any],
+        generate: Callable[[], Awaitable[str]],
+        fallback: Callable[[Exception], str]
+    ) -> str:
+        """
+        Ensure an explanation for (kind, inputs) exists or is being generated.
+
+        Args:
+            kind: Prompt identifier (e.g. "batching")
+            inputs: Exactly the values rendered into the prompt
+            generate: Coroutine function performing the LLM call
+            fallback: Text to use if the LLM call raises
+
+        Returns:
+            The explanation id (fingerprint)
+        """
+        explanation_id = explanation_fingerprint(kind, inputs)
+        if explanation_id in self._texts:
+            self._texts.move_to_end(explanation_id)
+            self.hits += 1
+        elif explanation_id in self._pending:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._failed.pop(explanation_id, None)
+            self._pending[explanation_id] = asyncio.create_task(
+                self._generate(explanation_id, generate, fallback)
+            )
+        return explanation_id
+
+    async def _generate(self, explanation_id: str, generate, fallback) -> str:
+        try:
+            text = await generate()
+        except Exception as e:
+            text = fallback(e)
+            self._failed[explanation_id] = text
+            while len(self._failed) > self.max_entries:
+                self._failed.pop(next(iter(self._failed)))
+        else:
+            self._texts[explanation_id] = text
+            while len(self._texts) > self.max_entries:
+                self._texts.popitem(last=False)
+        finally:
+            self._pending.pop(explanation_id, None)
+        return text
+
+    def status(self, explanation_id: str) -> Tuple[str, Optional[str]]:
+        """
+        Returns:
+            (status, text) with status "ready", "failed", "pending" or "unknown"
+        """
+        if explanation_id in self._texts:
+            return "ready", self._texts[explanation_id]
+        if explanation_id in self._failed:
+            return "failed", self._failed[explanation_id]
+        if explanation_id in self._pending:
+            return "pending", None
+        return "unknown", None
+
+    async def wait(self, explanation_id: str, timeout: Optional[float] = None) -> Tuple[str, Optional[str]]:
+        """Wait up to `timeout` seconds for a pending explanation, then report its status."""
+        task = self._pending.get(explanation_id)
+        if task is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(task), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.status(explanation_id)
+
+    async def as_completed(self, explanation_ids: Iterable[str]) -> AsyncIterator[Tuple[str, str, Optional[str]]]:
+        """Yield (explanation_id, status, text) for each id as soon as it is settled."""
+        waiters = [asyncio.ensure_future(self._settled(eid)) for eid in dict.fromkeys(explanation_ids)]
+        for waiter in asyncio.as_completed(waiters):
+            yield await waiter
+
+    async def _settled(self, explanation_id: str) -> Tuple[str, str, Optional[str]]:
+        status, text = await self.wait(explanation_id)
+        return explanation_id, status, text
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "cached": len(self._texts),
+            "pending": len(self._pending)
+        }
+
+
+explanation_service = ExplanationService(settings.EXPLANATION_CACHE_SIZE)
+
+
+async def resolve_explanation(
+    kind: str,
+    inputs: Dict[str, Any],
+    generate: Callable[[], Awaitable[str]],
+    fallback: Callable[[Exception], str],
+    wait: bool
+) -> Tuple[str, str, str]:
+    """
+    Request an explanation and optionally wait for it.
+
+    Returns:
+        (text, explanation_id, status) - text is a placeholder while pending
+    """
+    explanation_id = explanation_service.request(kind, inputs, generate, fallback)
+    if wait:
+        status, text = await explanation_service.wait(explanation_id)
+    else:
+        status, text = explanation_service.status(explanation_id)
+    # Failed explanations still carry the readable fallback text
+    return text if text is not None else PENDING_TEXT, explanation_id, status
@@ -0,0 +1,141 @@
+"""
+Job Manager - Background optimization jobs with progress events
+
+Optimization routes used to hold the HTTP request open until every agent
+and every LLM explanation had finished, which times out behind proxies on
+large requests. A submitted optimization runs as a background task that
+records an ordered list of progress events ("candidate_done",
+"validation_done", "supervisor_selected", "explanation", ...). Clients
+read them incrementally over Server-Sent Events or long-polling.
+
+Jobs live in process memory and are pruned after JOB_RETENTION_SECONDS.
+"""
+
+import asyncio
+import time
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from config import settings
+
+# progress(event_name, data) - synchronous, safe to call from coroutines
+ProgressCallback = Callable[[str, Dict[str, Any]], None]
+
+JOB_STATUSES = ("queued", "running", "done", "failed")
+
+
+class OptimizationJob:
+    """
+    A background optimization and its event log.
+
+    Events are append-only; `seq` is the index in `events`, so a client
+    that has seen N events resumes with after=N.
+    """
+
+    def __init__(self, mode: str):
+        self.job_id = uuid.uuid4().hex
+        self.mode = mode
+        self.status = "queued"
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.events: List[Dict[str, Any]] = []
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    def emit(self, event: str, data: Optional[Dict[str, Any]] = None):
+        """Append a progress event and wake up any waiting readers."""
+        self.events.append({
+            "seq": len(self.events),
+            "event": event,
+            "data": data or {},
+            "elapsed_ms": round((time.time() - self.created_at) * 1000, 1)
+        })
+        # Swap the event so waiters wake once and later waiters block again
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    async def wait_for_events(self, after: int, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Events with seq >= after, waiting up to `timeout` seconds if none yet.
+
+        Returns:
+            Possibly empty list of events
+        """
+        if after >= len(self.events) and not self.finished:
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.events[after:]
+
+    async def stream(self, after: int = 0) -> AsyncIterator[Dict[str, Any]]:
+        """Yield events from `after` onwards until the job has finished."""
+        while True:
+            events = await self.wait_for_events(after)
+            for event in events:
+                yield event
+            after += len(events)
+            if self.finished and after >= len(self.events):
+                return
+
+
+class JobManager:
+    """In-memory registry of background optimization jobs."""
+
+    def __init__(self):
+        self._jobs: Dict[str, OptimizationJob] = {}
+
+    def submit(self, mode: str, runner: Callable[["OptimizationJob"], Awaitable[Any]]) -> OptimizationJob:
+        """
+        Start `runner(job)` as a background task.
+
+        Args:
+            mode: Label for the optimization (e.g. "orchestrated")
+            runner: Coroutine function that reports through `job.emit`,
+                    may publish `job.result` early (before explanations
+                    have arrived) and returns the final result
+
+        Returns:
+            The queued job
+        """
+        self._prune()
+        job = OptimizationJob(mode)
+        self._jobs[job.job_id] = job
+        job.task = asyncio.create_task(self._run(job, runner))
+        return job
+
+    def get(self, job_id: str) -> Optional[OptimizationJob]:
+        return self._jobs.get(job_id)
+
+    async def _run(self, job: OptimizationJob, runner):
+        job.status = "running"
+        job.emit("started", {"mode": job.mode})
+        try:
+            job.result = await runner(job)
+            job.status = "done"
+            job.finished_at = time.time()
+            job.emit("done", {})
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+            job.finished_at = time.time()
+            job.emit("failed", {"error": job.error})
+
+    def _prune(self):
+        """Drop finished jobs older than the retention window."""
+        cutoff = time.time() - settings.JOB_RETENTION_SECONDS
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+job_manager = JobManager()
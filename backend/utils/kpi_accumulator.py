@@ -0,0 +1,188 @@
+"""
+KPI Accumulator - Incrementally maintained schedule KPIs
+
+calculate_plan_kpis re-sorts every machine's slots and recomputes every
+metric from scratch, so an iterative optimizer or what-if tool that calls
+it after each change pays O(N log N) per evaluation. The accumulator keeps
+per-machine slot lists sorted by start time together with the running
+totals (tardiness, product switches, setup minutes, loads) and updates them
+locally when a single slot is inserted, removed or moved.
+
+Key Features:
+    - insert / remove / move: bisect positioning, O(log n) per machine
+      (plus a list memmove), only the neighbouring slots are re-examined
+    - score / kpis(): O(machines) readout, cached until the next update
+    - Bit-identical to calculate_plan_kpis (shares build_kpi_result)
+"""
+
+from bisect import bisect_left
+from itertools import count
+from typing import Dict, List, Optional, Tuple
+
+from models.schemas import KPIResult
+from models.problem_instance import ProblemInstance, Plan, Slot
+from utils.kpi_calculator import build_kpi_result
+
+
+class _MachineSlots:
+    """Slots of one machine ordered by (start, insertion order)."""
+
+    __slots__ = ("keys", "slots")
+
+    def __init__(self):
+        self.keys: List[Tuple[int, int]] = []
+        self.slots: List[Slot] = []
+
+
+class KPIAccumulator:
+    """
+    Schedule KPIs kept up to date under single-slot changes.
+
+    Slots with equal start times keep their insertion order, exactly like the
+    stable sort in calculate_plan_kpis; machines are reported in the order
+    they were first seen (the plan's key order when built from a plan).
+
+    Example:
+        >>> acc = KPIAccumulator(instance, plan)
+        >>> acc.move(job=3, machine_id="M2", slot=Slot(3, 120, 180))
+        >>> acc.score
+        81.25
+    """
+
+    def __init__(self, instance: ProblemInstance, plan: Optional[Plan] = None):
+        self.instance = instance
+        self.total_jobs = instance.num_jobs
+        self._products = instance.product_codes
+        self._setup_rows = instance.setup.rows
+        self._due = instance.due
+        self._seq = count()
+
+        self._machines: Dict[str, _MachineSlots] = {}
+        self._where: Dict[int, Tuple[str, Tuple[int, int]]] = {}  # job -> (machine, key)
+
+        self.total_tardiness = 0
+        self.total_switches = 0
+        self.total_setup_time = 0
+        self._cached: Optional[KPIResult] = None
+
+        for machine_id, slots in (plan or {}).items():
+            self._machine(machine_id)
+            for slot in slots:
+                self.insert(machine_id, slot)
+
+    # --- Updates ---
+
+    def insert(self, machine_id: str, slot: Slot):
+        """Place a slot on a machine (the job must not be scheduled already)."""
+        if slot.job in self._where:
+            raise ValueError(f"Job {self.instance.job_ids[slot.job]} is already scheduled")
+        machine = self._machine(machine_id)
+        key = (slot.start, next(self._seq))
+        i = bisect_left(machine.keys, key)
+
+        before = machine.slots[i - 1] if i > 0 else None
+        after = machine.slots[i] if i < len(machine.slots) else None
+        self.total_switches += (
+            self._switch(before, slot) + self._switch(slot, after) - self._switch(before, after)
+        )
+        self.total_setup_time += (
+            self._setup(before, slot) + self._setup(slot, after) - self._setup(before, after)
+        )
+        self.total_tardiness += self._tardiness(slot)
+
+        machine.keys.insert(i, key)
+        machine.slots.insert(i, slot)
+        self._where[slot.job] = (machine_id, key)
+        self._cached = None
+
+    def remove(self, job: int) -> Tuple[str, Slot]:
+        """
+        Unschedule a job.
+
+        Returns:
+            (machine_id, slot) it occupied
+        """
+        machine_id, key = self._where.pop(job)
+        machine = self._machines[machine_id]
+        i = bisect_left(machine.keys, key)
+        slot = machine.slots[i]
+
+        before = machine.slots[i - 1] if i > 0 else None
+        after = machine.slots[i + 1] if i + 1 < len(machine.slots) else None
+        self.total_switches -= (
+            self._switch(before, slot) + self._switch(slot, after) - self._switch(before, after)
+        )
+        self.total_setup_time -= (
+            self._setup(before, slot) + self._setup(slot, after) - self._setup(before, after)
+        )
+        self.total_tardiness -= self._tardiness(slot)
+
+        del machine.keys[i]
+        del machine.slots[i]
+        self._cached = None
+        return machine_id, slot
+
+    def move(self, job: int, machine_id: str, slot: Slot):
+        """Reschedule a job to `slot` on `machine_id` (same or another machine)."""
+        self.remove(job)
+        self.insert(machine_id, slot)
+
+    # --- Readouts ---
+
+    @property
+    def scheduled_jobs(self) -> int:
+        return len(self._where)
+
+    def machine_loads(self) -> Dict[str, int]:
+        """Busy span per non-empty machine, in first-seen machine order."""
+        shift_start = self.instance.shift_start
+        return {
+            machine_id: machine.slots[-1].end - shift_start
+            for machine_id, machine in self._machines.items()
+            if machine.slots
+        }
+
+    def kpis(self) -> KPIResult:
+        """Current KPIs, identical to calculate_plan_kpis(instance, self.plan())."""
+        if self._cached is None:
+            self._cached = build_kpi_result(
+                self.total_jobs,
+                self.scheduled_jobs,
+                self.total_tardiness,
+                self.total_setup_time,
+                self.total_switches,
+                self.machine_loads()
+            )
+        return self._cached
+
+    @property
+    def score(self) -> float:
+        return self.kpis().score
+
+    def plan(self) -> Plan:
+        """Current slots as a plan (machines in first-seen order)."""
+        return {machine_id: list(machine.slots) for machine_id, machine in self._machines.items()}
+
+    # --- Helpers ---
+
+    def _machine(self, machine_id: str) -> _MachineSlots:
+        machine = self._machines.get(machine_id)
+        if machine is None:
+            machine = self._machines[machine_id] = _MachineSlots()
+        return machine
+
+    def _switch(self, first: Optional[Slot], second: Optional[Slot]) -> int:
+        """1 if two consecutive slots run different products."""
+        if first is None or second is None:
+            return 0
+        return 1 if self._products[first.job] != self._products[second.job] else 0
+
+    def _setup(self, first: Optional[Slot], second: Optional[Slot]) -> int:
+        """Changeover minutes between two consecutive slots (matrix lookup)."""
+        if first is None or second is None:
+            return 0
+        return self._setup_rows[self._products[first.job]][self._products[second.job]]
+
+    def _tardiness(self, slot: Slot) -> int:
+        due = self._due[slot.job]
+        return slot.end - due if due is not None and slot.end > due else 0
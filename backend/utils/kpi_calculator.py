@@ -1,85 +1,85 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
 from datetime import datetime, timedelta
-from models.schemas import ScheduledJob, Job, MachineSchedule, KPIResult
+from models.schemas import ScheduledJob, Job, MachineSchedule, KPIResult, ShiftConstraints
+from models.problem_instance import ProblemInstance, Plan
 
 def parse_time(t_str: str) -> datetime:
-    # Assumes HH:MM format and current day
+    # Assumes HH:MM format and current day.
+    # Legacy helper: agents and KPIs use ProblemInstance minute offsets instead.
     now = datetime.now()
     t = datetime.strptime(t_str, "%H:%M").time()
     return now.replace(hour=t.hour, minute=t.minute, second=0, microsecond=0)
 
-def calculate_kpis(schedules: Dict[str, List[ScheduledJob]], all_jobs: List[Job]) -> KPIResult:
+def calculate_kpis(
+    schedules: Dict[str, List[ScheduledJob]],
+    all_jobs: List[Job],
+    constraints: Optional[ShiftConstraints] = None
+) -> KPIResult:
+    """
+    Calculate KPIs for API schedules.
+    Compiles a ProblemInstance and delegates to calculate_plan_kpis; agents
+    that already hold a compiled instance should call that directly.
+    """
+    instance = ProblemInstance(all_jobs, [], constraints or ShiftConstraints())
+    return calculate_plan_kpis(instance, instance.plan_from_schedules(schedules))
+
+def calculate_plan_kpis(instance: ProblemInstance, plan: Plan) -> KPIResult:
     """
     Calculate KPIs:
     1. Tardiness: Total minutes jobs are late
-    2. Setup Time: 10 min for each product switch on each machine
+    2. Setup Time: changeover minutes from the plant setup matrix between
+       consecutive jobs on each machine
     3. Product Switches: Number of product changes
     4. Load Balance: Variance in machine utilization
+    All times are integer minutes from shift start.
     """
-    total_jobs = len(all_jobs)
-    scheduled_jobs_count = sum(len(jobs) for jobs in schedules.values())
+    total_jobs = instance.num_jobs
+    scheduled_jobs_count = sum(len(slots) for slots in plan.values())
     
     total_tardiness = 0
     total_setup_time = 0
     total_switches = 0
-    machine_end_times = []
     machine_loads = {}
     
-    job_map = {j.job_id: j for j in all_jobs}
+    products = instance.product_codes
+    setup_rows = instance.setup.rows
+    due = instance.due
     
-    for machine_id, jobs in schedules.items():
-        if not jobs:
+    for machine_id, slots in plan.items():
+        if not slots:
             continue
             
         # Sort by start time
-        sorted_jobs = sorted(jobs, key=lambda x: parse_time(x.start_time))
+        sorted_slots = sorted(slots, key=lambda s: s.start)
         
         last_product = None
-        machine_start = None
-        machine_end = None
         
-        for s_job in sorted_jobs:
+        for slot in sorted_slots:
+            product = products[slot.job]
             # Count product switches - every time product type changes
-            if last_product is not None and last_product != s_job.product_type:
-                total_switches += 1
-                total_setup_time += 10  # 10 min setup penalty per switch
+            if last_product is not None:
+                if last_product != product:
+                    total_switches += 1
+                total_setup_time += setup_rows[last_product][product]
             
-            last_product = s_job.product_type
-            
-            # Track machine utilization
-            if machine_start is None:
-                machine_start = parse_time(s_job.start_time)
-            machine_end = parse_time(s_job.end_time)
+            last_product = product
             
             # Calculate tardiness
-            original_job = job_map.get(s_job.job_id)
-            if original_job and original_job.due_time:
-                due = parse_time(original_job.due_time)
-                end = parse_time(s_job.end_time)
-                if end > due:
-                    tardiness = (end - due).total_seconds() / 60
-                    total_tardiness += tardiness
+            job_due = due[slot.job]
+            if job_due is not None and slot.end > job_due:
+                total_tardiness += slot.end - job_due
         
-        if machine_end:
-            machine_end_times.append(machine_end)
-            # Calculate actual working time for this machine
-            shift_start = parse_time("08:00")
-            working_time = (machine_end - shift_start).total_seconds() / 60
-            machine_loads[machine_id] = working_time
-
-    # Makespan: Time from shift start to last job completion
-    makespan = 0
-    if machine_end_times:
-        shift_start = parse_time("08:00")
-        latest_end = max(machine_end_times)
-        makespan = (latest_end - shift_start).total_seconds() / 60
+        # Calculate actual working time for this machine
+        machine_end = sorted_slots[-1].end
+        machine_loads[machine_id] = machine_end - instance.shift_start
 
-    # Bottleneck: Machine with highest load
-    bottleneck_machine = "None"
-    if machine_loads:
-        bottleneck_machine = max(machine_loads.items(), key=lambda x: x[1])[0]
+    return build_kpi_result(
+        total_jobs, scheduled_jobs_count, total_tardiness,
+        total_setup_time, total_switches, machine_loads
+    )
 
-    # Load Balance Variance: Lower is better (more balanced)
+def load_variance(machine_loads: Dict[str, int]) -> float:
+    """Load Balance Variance: Lower is better (more balanced)"""
     load_balance_variance = 0.0
     if machine_loads:
         loads = list(machine_loads.values())
@@ -87,16 +87,49 @@ def calculate_kpis(schedules: Dict[str, List[ScheduledJob]], all_jobs: List[Job]
             mean_load = sum(loads) / len(loads)
             variance = sum((x - mean_load) ** 2 for x in loads) / len(loads)
             load_balance_variance = variance
+    return load_balance_variance
 
-    # Score calculation:
-    # Higher is better. Penalize tardiness heavily, setup moderately
-    # Perfect score (100) = no tardiness, no setup, all jobs scheduled, balanced load
+def compute_score(
+    total_jobs: int,
+    scheduled_jobs_count: int,
+    total_tardiness: int,
+    total_setup_time: int,
+    load_balance_variance: float
+) -> float:
+    """
+    Score calculation:
+    Higher is better. Penalize tardiness heavily, setup moderately
+    Perfect score (100) = no tardiness, no setup, all jobs scheduled, balanced load
+    """
     completion_bonus = (scheduled_jobs_count / total_jobs) * 40 if total_jobs > 0 else 0
     tardiness_penalty = min(total_tardiness * 0.3, 30)  # Max 30 point penalty
     setup_penalty = min(total_setup_time * 0.2, 20)  # Max 20 point penalty
     balance_penalty = min(load_balance_variance * 0.01, 10)  # Max 10 point penalty
     
-    score = max(0.0, completion_bonus + 60 - tardiness_penalty - setup_penalty - balance_penalty)
+    return max(0.0, completion_bonus + 60 - tardiness_penalty - setup_penalty - balance_penalty)
+
+def build_kpi_result(
+    total_jobs: int,
+    scheduled_jobs_count: int,
+    total_tardiness: int,
+    total_setup_time: int,
+    total_switches: int,
+    machine_loads: Dict[str, int]
+) -> KPIResult:
+    """
+    Plan-level KPIs from aggregated totals and per-machine loads (in plan order).
+    Shared by calculate_plan_kpis and KPIAccumulator so both agree bit for bit.
+    """
+    # Makespan: Time from shift start to last job completion
+    makespan = max(machine_loads.values()) if machine_loads else 0
+
+    # Bottleneck: Machine with highest load
+    bottleneck_machine = "None"
+    if machine_loads:
+        bottleneck_machine = max(machine_loads.items(), key=lambda x: x[1])[0]
+
+    load_balance_variance = load_variance(machine_loads)
+    score = compute_score(total_jobs, scheduled_jobs_count, total_tardiness, total_setup_time, load_balance_variance)
 
     return KPIResult(
         total_jobs=total_jobs,
@@ -0,0 +1,299 @@
+"""
+Lower Bounds - Cheap bounds on what any schedule of an instance can score
+
+The exact agent proves bounds for small instances only. This module
+computes relaxation bounds for instances of any size, in a few NumPy
+passes over the jobs, so that every candidate schedule can be reported with
+a gap to the best objective any schedule could reach, and so that the
+iterative agents can stop as soon as they are close enough to it.
+
+Every bound is evaluated for a set of machines S and the jobs that can only
+run on machines of S (the most loaded distinct option sets and the set of
+all machines); the strongest set wins. Schedules are assumed to keep off
+downtime windows, each other and incompatible machines, as every agent's
+schedules do:
+    - Load: the jobs' processing minutes against S's downtime-free shift
+      minutes give the earliest possible makespan and the number of jobs
+      that cannot finish inside the shift (overrun or unassigned)
+    - Tardiness: SPT completion times on |S| parallel machines, paired
+      with the due times in EDD order
+    - Late rush jobs: rush processing due before each rush due time
+      against S's free minutes until then
+    - Setup: every job after the first one of a machine pays at least its
+      product's cheapest changeover, and every product run at least the
+      cheapest changeover from another product
+
+Key Features:
+    - Bounds on the cost components (LowerBounds) and on the supervisor's
+      selection objective (LowerBounds.objective, an upper bound since the
+      objective is maximized)
+    - Computed once per ProblemInstance (weakly cached); prepare_lower_bounds
+      computes them off the event loop for the async agents
+    - candidate_bound: gap of a candidate to the tightest known bound
+    - early_stop_target: objective at which EARLY_STOP_GAP_PCT is reached
+"""
+
+import asyncio
+from typing import List, NamedTuple, Optional
+from weakref import WeakKeyDictionary
+
+import numpy as np
+
+from models.schemas import ObjectiveBound
+from models.problem_instance import ProblemInstance
+from config import settings
+from utils.executor import run_cpu_bound
+
+# Machine sets evaluated besides "all machines" (the ones with the most load per machine)
+MAX_MACHINE_SETS = 64
+# Option sets whose nested load is summed to pick those (by their own load per machine)
+SHORTLIST_SETS = 4 * MAX_MACHINE_SETS
+
+_cache: "WeakKeyDictionary[ProblemInstance, LowerBounds]" = WeakKeyDictionary()
+_pending: "WeakKeyDictionary[ProblemInstance, asyncio.Future]" = WeakKeyDictionary()
+
+
+class LowerBounds(NamedTuple):
+    """Lower bounds on the cost components of any schedule of an instance."""
+    makespan: int       # Latest machine end, minutes from shift start
+    tardiness: int      # Total tardiness minutes if every job is assigned
+    setup: int          # Total setup minutes if every job is assigned
+    overrun_drops: int  # Jobs that overrun the shift or stay unassigned
+    rush_late: int      # Late rush jobs if every job is assigned
+    objective: float    # Upper bound on the selection objective
+
+
+def gap_pct(objective: float, bound: float) -> float:
+    """Relative gap of an objective to an upper bound, in percent."""
+    return round(max(0.0, bound - objective) / max(abs(bound), 1.0) * 100, 2)
+
+
+def _free_minutes(instance: ProblemInstance, machine_ids: List[str], until: np.ndarray) -> np.ndarray:
+    """Downtime-free minutes from shift start to each `until`, per machine: (machines, len(until))."""
+    start = instance.shift_start
+    span = np.maximum(until - start, 0)
+    free = np.repeat(span[None, :], len(machine_ids), axis=0)
+    for m, machine_id in enumerate(machine_ids):
+        window_starts, window_ends = instance.downtimes.window_arrays(machine_id)
+        if len(window_starts):
+            lo = np.maximum(window_starts, start)[:, None]
+            free[m] -= np.clip(np.minimum(window_ends[:, None], until[None, :]) - lo, 0, None).sum(axis=0)
+    return free
+
+
+def _longest_gaps(instance: ProblemInstance, machine_ids: List[str]) -> np.ndarray:
+    """Longest downtime-free stretch inside the shift, per machine."""
+    start, end = instance.shift_start, instance.shift_end
+    gaps = np.empty(len(machine_ids), dtype=np.int64)
+    for m, machine_id in enumerate(machine_ids):
+        window_starts, window_ends = instance.downtimes.window_arrays(machine_id)
+        edges_from = np.concatenate(([start], np.clip(window_ends, start, end)))
+        edges_to = np.concatenate((np.clip(window_starts, start, end), [end]))
+        gaps[m] = max(0, int((edges_to - np.maximum.accumulate(edges_from)).max()))
+    return gaps
+
+
+def _earliest_end(instance: ProblemInstance, machine_ids: List[str], load: int) -> int:
+    """Earliest t at which the machines have `load` downtime-free minutes since shift start."""
+    width, start = len(machine_ids), instance.shift_start
+    t = start + -(-load // width)
+    while True:
+        # width * (t - start) - downtime(t) >= load, iterated up from below
+        lacking = load - int(_free_minutes(instance, machine_ids, np.array([t], dtype=np.int64)).sum())
+        if lacking <= 0:
+            return t
+        t += -(-lacking // width)
+
+
+def _setup_bound(instance: ProblemInstance, codes: np.ndarray, machines: int) -> int:
+    """Setup minutes of any assignment of the jobs with product `codes` to `machines` machines."""
+    if not len(codes) or machines == 0:
+        return 0
+    products, counts = np.unique(codes, return_counts=True)
+    sub = instance.setup.matrix[np.ix_(products, products)]
+    entry = sub.min(axis=0)  # Cheapest setup before a job of each product
+    if len(products) > 1:
+        switch = sub + np.diag(np.full(len(products), np.iinfo(np.int64).max // 4))
+        switch = np.maximum(switch.min(axis=0), entry)  # Cheapest change from another product
+    else:
+        switch = entry.copy()
+    # Each job pays `entry`, each product run pays `switch` once; a machine's
+    # first job pays nothing (saves `switch` once per product, else `entry`)
+    total = int((counts * entry).sum() + (switch - entry).sum())
+    savings = np.concatenate((switch, np.full(machines, entry.max())))
+    savings = np.sort(savings)[::-1][:min(machines, len(codes))]
+    return max(0, total - int(savings.sum()))
+
+
+def _objective_bound(n: int, unplaceable: int, drops: int, rush_late: int, tardiness: int, setup: int) -> float:
+    """Upper bound on the selection objective from the component bounds."""
+    if n == 0:
+        return 60.0
+    # B: at least one job unassigned (one violation); dropping a job costs
+    # 40 / n score points, less than the 100 of an overrun it avoids
+    dropped = max(1, drops)
+    best = max(0.0, 40 * (n - dropped) / n + 60) - 100
+    if unplaceable == 0:
+        # A: every job assigned; overruns and late rush jobs are violations each
+        score = max(0.0, 100 - min(tardiness * 0.3, 30) - min(setup * 0.2, 20))
+        best = max(best, score - 100 * (drops + rush_late))
+    return round(best, 2)
+
+
+def compute_lower_bounds(instance: ProblemInstance) -> LowerBounds:
+    """Lower bounds for `instance` (cached per instance)."""
+    cached = _cache.get(instance)
+    if cached is not None:
+        return cached
+
+    table = instance.table
+    n = instance.num_jobs
+    start, shift_end = instance.shift_start, instance.shift_end
+    machine_ids = table.machine_ids
+    n_machines = len(machine_ids)
+    processing = table.processing_time.astype(np.int64)
+
+    # Jobs grouped by distinct option set: (groups, machines) membership and
+    # the same sets as uint64 words for vectorized subset tests
+    masks, group = table.mask_groups
+    words = max(1, (n_machines + 63) // 64)
+    group_bits = np.array(
+        [[mask >> (64 * w) & 0xFFFF_FFFF_FFFF_FFFF for w in range(words)] for mask in masks], dtype=np.uint64
+    ).reshape(len(masks), words)
+    machine = np.arange(n_machines)
+    member = (group_bits[:, machine >> 6] >> (machine & 63).astype(np.uint64) & np.uint64(1)).astype(bool)
+    set_width = member.sum(axis=1)
+    placeable = (set_width > 0)[group]
+    unplaceable = int(n - placeable.sum())
+
+    def inside(s: int) -> np.ndarray:
+        """Option sets (placeable) contained in option set `s`."""
+        return (set_width > 0) & ~(group_bits & ~group_bits[s]).any(axis=1)
+
+    # Jobs longer than every free stretch of their machines cannot finish in the shift
+    gaps = _longest_gaps(instance, machine_ids)
+    group_gap = np.where(member, gaps, 0).max(axis=1, initial=0)
+    fits = placeable & (processing <= group_gap[group])
+    never_fit = int((placeable & ~fits).sum())
+
+    # Machine sets: the option sets with the most load per machine (their
+    # own jobs' load shortlists them, then the load of every option set
+    # inside them ranks them) plus all machines
+    group_load = np.bincount(group, weights=processing, minlength=len(masks))
+    candidates = np.flatnonzero(set_width > 0)
+    own = group_load[candidates] / set_width[candidates]
+    shortlist = np.sort(candidates[np.argsort(-own, kind="stable")[:SHORTLIST_SETS]])
+    nested = {s: inside(s) for s in shortlist.tolist()}
+    load = {s: group_load[nested[s]].sum() / set_width[s] for s in nested}
+    sets = [(member[s], nested[s]) for s in sorted(load, key=lambda s: -load[s])[:MAX_MACHINE_SETS]]
+    if n_machines and not any(members.all() for members, _ in sets):
+        sets.append((np.ones(n_machines, dtype=bool), set_width > 0))
+
+    due = np.where(instance.has_due, instance.due_offsets, np.iinfo(np.int64).max // 4).astype(np.int64)
+    rush = table.rush & instance.has_due
+    free_end = _free_minutes(instance, machine_ids, np.array([shift_end], dtype=np.int64))[:, 0]
+
+    makespan = start
+    tardiness = drops = rush_late = 0
+    for members, inside_sets in sets:
+        width = int(members.sum())
+        jobs = np.flatnonzero(inside_sets[group])
+        if not len(jobs):
+            continue
+        ids = [machine_ids[m] for m in np.flatnonzero(members).tolist()]
+        p = np.sort(processing[jobs])
+        prefix = np.cumsum(p)
+
+        # Load: makespan and jobs that cannot finish inside the shift
+        load = int(prefix[-1])
+        makespan = max(makespan, _earliest_end(instance, ids, load))
+        fitting = np.sort(processing[jobs[fits[jobs]]])
+        fit_count = int(np.searchsorted(np.cumsum(fitting), int(free_end[members].sum()), side="right"))
+        drops = max(drops, len(jobs) - fit_count)
+
+        # Tardiness: k-th completion no earlier than SPT prefix / |S| or the k-th shortest job
+        completion = start + np.maximum(-(-prefix // width), p)
+        late = completion - np.sort(due[jobs])
+        tardiness = max(tardiness, int(late[late > 0].sum()))
+
+        # Late rush jobs: rush minutes due by each due time against free minutes until then
+        rush_jobs = jobs[rush[jobs]]
+        if len(rush_jobs):
+            rush_jobs = rush_jobs[np.argsort(due[rush_jobs], kind="stable")]
+            demand = np.cumsum(processing[rush_jobs])
+            supply = _free_minutes(instance, ids, due[rush_jobs]).sum(axis=0)
+            excess = demand - supply
+            if (excess > 0).any():
+                longest = np.maximum.accumulate(processing[rush_jobs])
+                rush_late = max(rush_late, int((-(-np.maximum(excess, 0) // longest)).max()))
+
+    drops = max(drops, never_fit) + unplaceable
+    setup = _setup_bound(instance, np.asarray(instance.product_codes, dtype=np.int64)[placeable], n_machines)
+    bounds = LowerBounds(
+        makespan=int(makespan) - start,
+        tardiness=tardiness,
+        setup=setup,
+        overrun_drops=drops,
+        rush_late=rush_late,
+        objective=_objective_bound(n, unplaceable, drops, rush_late, tardiness, setup)
+    )
+    _cache[instance] = bounds
+    return bounds
+
+
+async def prepare_lower_bounds(instance: ProblemInstance) -> LowerBounds:
+    """
+    compute_lower_bounds on the scheduler executor, cached in this process,
+    so the synchronous helpers below are lookups. Concurrent callers for
+    the same instance share one computation.
+    """
+    cached = _cache.get(instance)
+    if cached is not None:
+        return cached
+    pending = _pending.get(instance)
+    if pending is None:
+        pending = _pending[instance] = asyncio.ensure_future(run_cpu_bound(compute_lower_bounds, instance))
+    try:
+        # Shielded: a cancelled caller (e.g. a raced agent) leaves it to the others
+        bounds = await asyncio.shield(pending)
+    finally:
+        if pending.done():
+            _pending.pop(instance, None)
+    _cache[instance] = bounds
+    return bounds
+
+
+def candidate_bound(bounds: LowerBounds, objective: float,
+                    existing: Optional[ObjectiveBound] = None) -> ObjectiveBound:
+    """
+    Gap of a candidate's selection objective to the tightest known bound:
+    the instance's lower `bounds` or `existing` (e.g. the exact agent's).
+
+    Only `existing` can prove optimality (the exact search's own proof). An
+    objective above the bound is never hidden by raising the bound: the
+    bound is returned as is and marked invalid.
+    """
+    objective = round(objective, 2)
+    bound, source = bounds.objective, "lower_bounds"
+    if existing is not None and existing.bound <= bound:
+        bound, source = existing.bound, existing.source
+    valid = objective <= bound
+    return ObjectiveBound(
+        objective=objective,
+        bound=bound,
+        gap_pct=gap_pct(objective, bound),
+        proven_optimal=valid and existing is not None and existing.proven_optimal and existing.valid,
+        source=source,
+        valid=valid
+    )
+
+
+def early_stop_target(bounds: LowerBounds, gap: Optional[float] = None) -> Optional[float]:
+    """
+    Selection objective at which a search is within `gap` percent
+    (default EARLY_STOP_GAP_PCT) of the bounds' objective; None if disabled.
+    """
+    gap = settings.EARLY_STOP_GAP_PCT if gap is None else gap
+    if gap < 0:
+        return None
+    return bounds.objective - gap / 100 * max(abs(bounds.objective), 1.0)
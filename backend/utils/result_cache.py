@@ -0,0 +1,185 @@
+"""
+Result Cache - Content-addressed cache for optimization results
+
+The dashboard often sends the same OptimizationRequest to several
+endpoints within seconds (baseline, orchestrated, compare-all), and
+several planners open the same plan at once. Results are cached under a
+canonical hash of the request content (jobs, downtimes, shift), so any
+identical payload is answered from memory, and identical requests that
+arrive while the computation is still running wait on that one
+computation instead of starting their own.
+
+Key Features:
+    - Canonical SHA-256 fingerprint of jobs, downtimes and shift
+    - LRU eviction bounded by entry count and an approximate byte budget
+    - TTL expiry (RESULT_CACHE_TTL_SECONDS)
+    - In-flight coalescing of concurrent identical requests
+    - Hit / miss / coalesced counters for monitoring
+
+Cached values are shared between requests and must be treated as
+immutable; callers copy them before changing anything.
+"""
+
+import asyncio
+import hashlib
+import json
+import pickle
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple, Union
+
+from pydantic import BaseModel
+
+from config import settings
+from models.job_table import JobTable
+from models.schemas import Job, MachineDowntime, ShiftConstraints
+
+
+def request_fingerprint(
+    jobs: Union[List[Job], JobTable],
+    downtimes: List[MachineDowntime],
+    constraints: ShiftConstraints
+) -> str:
+    """
+    Canonical hash of an optimization request.
+
+    Job order is kept because it decides ties in the agents' stable sorts;
+    downtime order is irrelevant (windows are merged) and is normalized.
+    A JobTable (stored upload) is hashed by its columns, without building
+    Jobs; it does not share entries with the same jobs sent as a list.
+    """
+    if isinstance(jobs, JobTable):
+        job_payload: Any = {"columns": [
+            jobs.job_id.tolist(), jobs.product_type.tolist(), [list(options) for options in jobs.machine_options],
+            jobs.processing_time.tolist(), jobs.due_time.tolist(), jobs.rush.tolist()
+        ]}
+    else:
+        job_payload = [job.model_dump(mode="json") for job in jobs]
+    payload = {
+        "jobs": job_payload,
+        "downtimes": sorted(
+            (dt.machine_id, dt.start_time, dt.end_time, dt.reason) for dt in downtimes
+        ),
+        "shift": constraints.model_dump(mode="json")
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate memory footprint of a cached value in bytes."""
+    if isinstance(value, BaseModel):
+        return len(value.model_dump_json())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(item) for item in value)
+    return len(pickle.dumps(value))
+
+
+class ResultCache:
+    """
+    LRU + TTL + byte-budget cache with in-flight request coalescing.
+
+    Example:
+        >>> result = await result_cache.get_or_compute(("batching", fp), compute)
+    """
+
+    def __init__(self, max_entries: int = 128, max_bytes: int = 64 * 1024 * 1024, ttl_seconds: float = 300):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        # key -> (value, size_bytes, expires_at)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, float]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached value for `key`, or None if absent or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, size, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        """Store a value, evicting least recently used entries over budget."""
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return  # Larger than the whole budget: never cache
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, size, time.monotonic() + self.ttl_seconds)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value for `key`, computing it at most once.
+
+        Concurrent callers with the same key share a single computation.
+        Failures are propagated to every waiter and are not cached.
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            # Shield: a disconnecting client must not cancel the shared work
+            return await asyncio.shield(future)
+
+        self.misses += 1
+        future = asyncio.ensure_future(self._compute(key, compute))
+        self._inflight[key] = future
+        return await asyncio.shield(future)
+
+    async def _compute(self, key: Hashable, compute) -> Any:
+        try:
+            value = await compute()
+            self.put(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def _remove(self, key: Hashable):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "inflight": len(self._inflight)
+        }
+
+
+result_cache = ResultCache(
+    max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+    max_bytes=settings.RESULT_CACHE_MAX_BYTES,
+    ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS
+)
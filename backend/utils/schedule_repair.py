@@ -0,0 +1,233 @@
+"""
+Schedule Repair - Incremental repair of a schedule after a machine failure
+
+Re-optimizing from scratch after a breakdown reruns every agent on every
+job and may move jobs the plant has already staged. Repair keeps the
+existing schedule and only touches the jobs the failure hits: the ones
+running on the failed machine during the failure window (displaced) and
+the ones after them that would have to start later because of it
+(pushed). Each of those jobs is re-placed, rush jobs first, at the
+earliest gap of one of its machine options (the failed machine included)
+that fits without moving anything else, or at the end of that machine.
+Nothing starts before the failure: that is "now" for the plant.
+
+Key Features:
+    - All other slots keep their machine, start and end
+    - Gaps found by bisect plus a bounded forward scan (GAP_SCAN_LIMIT),
+      so the work grows with the affected jobs, not the plan
+    - Placement prefers no new violation (overrun, late rush job), then
+      the best plan KPI score, then the earliest end; every candidate is
+      scored as a what-if on a KPIAccumulator (O(log n), no full pass)
+    - The repaired plan's KPIs come from the same accumulator
+    - Changes returned as (job, old machine/slot, new machine/slot) for a diff
+"""
+
+from bisect import bisect_right
+from operator import attrgetter
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from models.schemas import KPIResult
+from models.problem_instance import ProblemInstance, Plan, Slot
+from utils.kpi_accumulator import KPIAccumulator
+
+# Existing slots probed per machine for a gap before appending at its end
+GAP_SCAN_LIMIT = 32
+
+
+class SlotChange(NamedTuple):
+    """A job whose placement the repair changed (new_machine None: left unassigned)."""
+    job: int
+    old_machine: str
+    old: Slot
+    new_machine: Optional[str]
+    new: Optional[Slot]
+
+
+_slot_start = attrgetter("start")
+_slot_end = attrgetter("end")
+
+
+class ScheduleRepair:
+    """
+    Repairs a plan in place, machine by machine, recording every move.
+
+    The instance must already contain the failure as a downtime window, so
+    that earliest_fit keeps jobs out of it.
+
+    Example:
+        >>> repair = ScheduleRepair(instance, plan)
+        >>> changes = repair.machine_failure("M1", 180)
+    """
+
+    def __init__(self, instance: ProblemInstance, plan: Plan):
+        """
+        Args:
+            instance: Compiled request, failure included in its downtimes
+            plan: Existing schedule (its lists are replaced, never mutated)
+        """
+        self.instance = instance
+        self.plan = plan
+        self.rows = instance.setup.rows
+        self.products = instance.product_codes
+        self.processing = instance.processing
+        self._sorted: Dict[str, List[Slot]] = {}
+        self.kpis = KPIAccumulator(instance, plan)  # Follows every change below
+        self._origin: Dict[int, Tuple[str, Slot]] = {}  # First placement of every moved job
+        self._placed: Dict[int, Tuple[str, Slot]] = {}  # Latest placement of every moved job
+
+    def slots(self, machine_id: str) -> List[Slot]:
+        """Working copy of a machine's slots, sorted by start (made on first use)."""
+        slots = self._sorted.get(machine_id)
+        if slots is None:
+            slots = self._sorted[machine_id] = sorted(self.plan.get(machine_id, []), key=_slot_start)
+            self.plan[machine_id] = slots
+        return slots
+
+    def machine_failure(self, machine_id: str, start: int) -> List[SlotChange]:
+        """
+        Re-place the jobs that the failure of `machine_id` starting at
+        `start` displaces or pushes later (its end is in the instance).
+
+        Returns:
+            Changed placements, affected jobs in their original order first
+        """
+        start = max(start, self.instance.shift_start)
+        failed = self.slots(machine_id)
+        fit = self.instance.downtimes.earliest_fit
+
+        # Affected chain: from the first slot still running at `start`, re-time
+        # each slot in order until one keeps its start (the rest then keep theirs)
+        first = bisect_right(failed, start, key=_slot_end)
+        prev = failed[first - 1] if first else None
+        prev_end = prev.end if prev is not None else self.instance.shift_start
+        prev_code = self.products[prev.job] if prev is not None else None
+        last = first
+        while last < len(failed):
+            slot = failed[last]
+            code = self.products[slot.job]
+            setup = self.rows[prev_code][code] if prev_code is not None else 0
+            begin = fit(machine_id, max(slot.start, prev_end + setup), self.processing[slot.job])
+            if begin == slot.start:
+                break
+            prev_end, prev_code = begin + self.processing[slot.job], code
+            last += 1
+
+        affected = failed[first:last]
+        if not affected:
+            return []
+        del failed[first:last]
+        for slot in affected:
+            self._origin[slot.job] = (machine_id, slot)
+            self.kpis.remove(slot.job)
+        self._settle(machine_id, first)
+
+        # Rush jobs first, then in their original order
+        rush = self.instance.rush
+        for slot in sorted(affected, key=lambda s: (not rush[s.job], s.start)):
+            self._place(slot.job, start, prefer=machine_id)
+
+        return [
+            SlotChange(job, old_machine, old, *self._placed.get(job, (None, None)))
+            for job, (old_machine, old) in self._origin.items()
+            if self._placed.get(job) != (old_machine, old)
+        ]
+
+    def _place(self, job: int, t0: int, prefer: str):
+        """Insert `job` at its best gap (or machine end) at or after `t0`."""
+        best = None
+        kpis = self.kpis
+        # The job's own option list: no machine index over the whole table needed
+        for machine_id in dict.fromkeys(self.instance.table.machine_options[job]):
+            pos, slot = self._gap(machine_id, job, t0)
+            # What-if: the slot fits without moving others, so only it changes the KPIs
+            kpis.insert(machine_id, slot)
+            score = kpis.score
+            kpis.remove(job)
+            key = (self._violations(job, slot.end), -score, slot.end, machine_id != prefer)
+            if best is None or key < best[0]:
+                best = (key, machine_id, pos, slot)
+        if best is None:
+            return  # No machine option: the job stays unassigned
+        _, machine_id, pos, slot = best
+        self.slots(machine_id).insert(pos, slot)
+        kpis.insert(machine_id, slot)
+        self._placed[job] = (machine_id, slot)
+        self._settle(machine_id, pos + 1)
+
+    def _gap(self, machine_id: str, job: int, t0: int) -> Tuple[int, Slot]:
+        """First position at or after `t0` where `job` fits between existing slots."""
+        slots = self.slots(machine_id)
+        rows, products = self.rows, self.products
+        code, duration = products[job], self.processing[job]
+        fit = self.instance.downtimes.earliest_fit
+        # Slots starting at or before t0 stay before the job (the last may still be running)
+        pos = bisect_right(slots, t0, key=_slot_start)
+        scan_end = pos + GAP_SCAN_LIMIT
+        while True:
+            prev = slots[pos - 1] if pos else None
+            setup = rows[products[prev.job]][code] if prev is not None else 0
+            begin = fit(machine_id, max(t0, prev.end + setup) if prev is not None else t0, duration)
+            slot = Slot(job, begin, begin + duration, setup)
+            if pos == len(slots):
+                return pos, slot
+            following = slots[pos]
+            if slot.end + rows[code][products[following.job]] <= following.start:
+                return pos, slot
+            pos = pos + 1 if pos < scan_end else len(slots)
+
+    def _settle(self, machine_id: str, pos: int):
+        """
+        Refresh the setup of the slot at `pos` after its predecessor changed,
+        pushing it (and its successors) later only if the setup no longer fits.
+        """
+        slots = self.slots(machine_id)
+        fit = self.instance.downtimes.earliest_fit
+        while pos < len(slots):
+            slot = slots[pos]
+            prev = slots[pos - 1] if pos else None
+            setup = self.rows[self.products[prev.job]][self.products[slot.job]] if prev is not None else 0
+            earliest = max(slot.start, prev.end + setup) if prev is not None else slot.start
+            begin = fit(machine_id, earliest, self.processing[slot.job])
+            if begin == slot.start:
+                slots[pos] = slot._replace(setup=setup)
+                return
+            moved = Slot(slot.job, begin, begin + self.processing[slot.job], setup)
+            slots[pos] = moved
+            self.kpis.move(slot.job, machine_id, moved)
+            self._origin.setdefault(slot.job, (machine_id, slot))
+            self._placed[slot.job] = (machine_id, moved)
+            pos += 1
+
+    def _violations(self, job: int, end: int) -> int:
+        """Violations a placement ending at `end` adds (shift overrun, late rush job)."""
+        instance = self.instance
+        due = instance.due[job]
+        return int(end > instance.shift_end) + int(instance.rush[job] and due is not None and end > due)
+
+
+def repair_plan(
+    instance: ProblemInstance, plan: Plan, machine_id: str, start: int
+) -> Tuple[Plan, List[SlotChange], KPIResult]:
+    """
+    Repair `plan` after `machine_id` fails from `start` (minutes).
+
+    `instance` must include the failure in its downtimes. The input plan is
+    left unchanged; only the machines in the changes hold new lists that
+    differ from it.
+
+    Returns:
+        (repaired plan, changes, its KPIs as calculate_plan_kpis reports them)
+    """
+    repaired = dict(plan)
+    repair = ScheduleRepair(instance, repaired)
+    changes = repair.machine_failure(machine_id, start)
+    return repaired, changes, repair.kpis.kpis()
+
+
+def with_setups(instance: ProblemInstance, slots: List[Slot]) -> List[Slot]:
+    """Slots (sorted by start) with the setup minutes their predecessors imply."""
+    rows, products = instance.setup.rows, instance.product_codes
+    return [
+        slot._replace(setup=rows[products[slots[k - 1].job]][products[slot.job]] if k else 0)
+        for k, slot in enumerate(slots)
+    ]
@@ -0,0 +1,120 @@
+"""
+Upload Store - Parsed CSV uploads kept server-side behind a handle
+
+Upload routes used to echo every parsed job back in the response, so a
+large file existed three times at once (raw bytes, Job objects, JSON).
+Uploads are now parsed in chunks and kept here as a columnar JobTable
+(or a downtime list); the client gets counts and an upload_id, sends the
+upload_id with its optimization requests and pages through the rows only
+if it needs them.
+
+Key Features:
+    - Retention window (UPLOAD_RETENTION_SECONDS) and a cap on stored uploads
+    - Oldest uploads are evicted first once UPLOAD_MAX_STORED is reached
+    - Paged access to the rows (jobs are built only for the requested page)
+    - jobs_table: the stored JobTable itself, compiled by the optimizers
+      without a Job per row
+"""
+
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Union
+
+from config import settings
+from models.job_table import JobTable
+from models.schemas import Job, MachineDowntime
+
+
+class StoredUpload:
+    """One parsed upload: jobs (JobTable) or downtimes (list)."""
+
+    def __init__(self, kind: str, data: Union[JobTable, List[MachineDowntime]], filename: str, size_bytes: int):
+        self.upload_id = uuid.uuid4().hex
+        self.kind = kind
+        self.data = data
+        self.filename = filename
+        self.size_bytes = size_bytes
+        self.created_at = time.time()
+
+    @property
+    def rows(self) -> int:
+        return len(self.data)
+
+    def page(self, offset: int, limit: int) -> List[Union[Job, MachineDowntime]]:
+        """Rows [offset, offset + limit) as Job / MachineDowntime objects."""
+        stop = min(offset + limit, self.rows)
+        if self.kind == "jobs":
+            return [self.data.job(i) for i in range(offset, stop)]
+        return self.data[offset:stop]
+
+    def summary(self) -> Dict[str, Any]:
+        """Counts returned by the upload routes instead of the rows."""
+        summary = {
+            "upload_id": self.upload_id,
+            "kind": self.kind,
+            "filename": self.filename,
+            "rows": self.rows,
+            "size_bytes": self.size_bytes,
+        }
+        if self.kind == "jobs":
+            table = self.data
+            rush = int(table.rush.sum())
+            machine_ids = sorted({m for options in table.machine_options.tolist() for m in options})
+            summary.update(
+                rush_jobs=rush,
+                normal_jobs=self.rows - rush,
+                products=len(set(table.product_type.tolist())),
+                machines=len(machine_ids),
+                machine_ids=machine_ids,
+                total_processing_time=int(table.processing_time.sum())
+            )
+        else:
+            summary["machines"] = len({dt.machine_id for dt in self.data})
+        return summary
+
+
+class UploadStore:
+    """In-memory registry of parsed uploads."""
+
+    def __init__(self, max_stored: int = 32, retention_seconds: float = 900):
+        self.max_stored = max_stored
+        self.retention_seconds = retention_seconds
+        self._uploads: "OrderedDict[str, StoredUpload]" = OrderedDict()
+
+    def put(self, kind: str, data, filename: str, size_bytes: int) -> StoredUpload:
+        self._prune()
+        upload = StoredUpload(kind, data, filename, size_bytes)
+        self._uploads[upload.upload_id] = upload
+        while len(self._uploads) > self.max_stored:
+            self._uploads.popitem(last=False)
+        return upload
+
+    def get(self, upload_id: str) -> Optional[StoredUpload]:
+        self._prune()
+        return self._uploads.get(upload_id)
+
+    def jobs_table(self, upload_id: str) -> Optional[JobTable]:
+        """The JobTable of a stored jobs upload, or None if missing, expired or not jobs."""
+        upload = self.get(upload_id)
+        if upload is None or upload.kind != "jobs":
+            return None
+        return upload.data
+
+    def delete(self, upload_id: str) -> bool:
+        return self._uploads.pop(upload_id, None) is not None
+
+    def _prune(self):
+        """Drop uploads older than the retention window."""
+        cutoff = time.time() - self.retention_seconds
+        while self._uploads:
+            upload = next(iter(self._uploads.values()))
+            if upload.created_at >= cutoff:
+                break
+            self._uploads.popitem(last=False)
+
+
+upload_store = UploadStore(
+    max_stored=settings.UPLOAD_MAX_STORED,
+    retention_seconds=settings.UPLOAD_RETENTION_SECONDS
+)
@@ -2,17 +2,12 @@ import React, { useState } from 'react';
 import { Clock, AlertTriangle, Upload } from 'lucide-react';
 import { dataService } from '../../services/api';
 
-const DowntimePanel = ({ mode, downtimes, setDowntimes, jobs }) => {
+const DowntimePanel = ({ mode, downtimes, setDowntimes, machines }) => {
     const [loading, setLoading] = useState(false);
     const [dtCount, setDtCount] = useState(1);
 
     const getMachineCount = () => {
-        // Get unique machines from jobs
-        const machines = new Set();
-        jobs.forEach(job => {
-            job.machine_options.forEach(m => machines.add(m));
-        });
-        return machines.size || 4; // Default to 4 if no jobs loaded
+        return machines.length || 4; // Default to 4 if no jobs loaded
     };
 
     const handleRandomDowntime = async () => {
@@ -38,9 +33,13 @@ const DowntimePanel = ({ mode, downtimes, setDowntimes, jobs }) => {
 
         try {
             const res = await dataService.uploadDowntime(formData);
-            setDowntimes(res.data);
+            const { upload_id, rows } = res.data;
+            setDowntimes(await dataService.fetchUploadRows(upload_id, rows));
+            // Downtimes are edited client-side; the stored copy is no longer needed
+            dataService.deleteUpload(upload_id).catch(() => {});
         } catch (err) {
-            alert("Upload failed: " + err.message);
+            const detail = err.response?.data?.detail;
+            alert("Upload failed: " + (detail?.message || detail || err.message));
         } finally {
             setLoading(false);
         }
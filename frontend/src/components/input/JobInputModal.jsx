@@ -1,7 +1,7 @@
 import React from 'react';
 import { X } from 'lucide-react';
 
-const JobInputModal = ({ isOpen, onClose, jobs }) => {
+const JobInputModal = ({ isOpen, onClose, jobs, totalJobs }) => {
   if (!isOpen) return null;
 
   return (
@@ -25,6 +25,11 @@ const JobInputModal = ({ isOpen, onClose, jobs }) => {
           <X size={24} />
         </button>
         <h2 style={{ marginBottom: '1rem' }}>Full Job Intake Table</h2>
+        {totalJobs > jobs.length && (
+          <p className="text-sm text-muted" style={{ marginBottom: '1rem' }}>
+            Showing the first {jobs.length} of {totalJobs} uploaded jobs; all of them are optimized.
+          </p>
+        )}
         <table style={{ width: '100%', borderCollapse: 'collapse', fontSize: '0.9rem' }}>
           <thead>
             <tr style={{ textAlign: 'left', background: 'var(--bg-card-hover)' }}>
@@ -2,16 +2,26 @@ import React, { useState } from 'react';
 import { Upload, Shuffle, FileText, CheckCircle } from 'lucide-react';
 import { dataService } from '../../services/api';
 
-const JobInputPanel = ({ mode, jobs, setJobs }) => {
+// Uploaded jobs stay on the server (sent by upload_id); only this many are fetched for the preview
+const PREVIEW_ROWS = 200;
+
+const JobInputPanel = ({ mode, jobs, setJobs, jobUpload, setJobUpload }) => {
     const [loading, setLoading] = useState(false);
     const [jobCount, setJobCount] = useState(20);
     const [machineCount, setMachineCount] = useState(4);
     const [rushProb, setRushProb] = useState(20); // Percentage
 
+    const releaseUpload = () => {
+        // The previous upload is replaced: free it on the server
+        if (jobUpload) dataService.deleteUpload(jobUpload.upload_id).catch(() => {});
+    };
+
     const handleRandomGen = async () => {
         setLoading(true);
         try {
             const res = await dataService.generateRandomData(jobCount, rushProb / 100, 0, machineCount);
+            releaseUpload();
+            setJobUpload(null);
             setJobs(res.data.jobs);
         } catch (err) {
             alert("Error generating data: " + err.message);
@@ -30,9 +40,13 @@ const JobInputPanel = ({ mode, jobs, setJobs }) => {
 
         try {
             const res = await dataService.uploadJobs(formData);
-            setJobs(res.data);
+            const preview = await dataService.getUploadPage(res.data.upload_id, 0, PREVIEW_ROWS);
+            releaseUpload();
+            setJobUpload(res.data);
+            setJobs(preview.data.items);
         } catch (err) {
-            alert("Upload failed: " + err.message);
+            const detail = err.response?.data?.detail;
+            alert("Upload failed: " + (detail?.message || detail || err.message));
         } finally {
             setLoading(false);
         }
@@ -42,7 +56,7 @@ const JobInputPanel = ({ mode, jobs, setJobs }) => {
         <div className="industrial-card">
             <div className="flex-row justify-between mb-4">
                 <h3>Job Intake</h3>
-                <span className="text-xs text-muted">{jobs.length} Jobs Loaded</span>
+                <span className="text-xs text-muted">{jobUpload ? jobUpload.rows : jobs.length} Jobs Loaded</span>
             </div>
 
             <div className="flex-col">
@@ -118,6 +132,9 @@ const JobInputPanel = ({ mode, jobs, setJobs }) => {
                         >
                             Expand Full Table
                         </button>
+                        {jobUpload && jobUpload.rows > jobs.length && (
+                            <p className="text-xs text-muted mb-2">Showing the first {jobs.length} of {jobUpload.rows} jobs</p>
+                        )}
                         <table style={{ width: '100%', borderCollapse: 'collapse', fontSize: '0.8rem' }}>
                             <thead>
                                 <tr className="text-muted" style={{ textAlign: 'left' }}>
@@ -1,23 +1,31 @@
 import React from 'react';
 import { Check, X } from 'lucide-react';
+import { useExplanation } from './ExplanationPanel';
 
 const ComparisonTable = ({ data, onSelectAgent }) => {
     // data matches ComparisonResponse schema: { baseline, batching, bottleneck, orchestrated, summary }
 
-    const agents = ['baseline', 'batching', 'bottleneck', 'orchestrated'];
+    // Extra candidates (e.g. local_search) are only present when registered
+    const extras = data.extra_candidates || {};
+    const getAgentRes = (key) => data[key] || extras[key];
 
-    const getAgentRes = (key) => data[key];
+    // Strategies that missed the portfolio deadline come back empty
+    const agents = ['baseline', 'batching', 'bottleneck', ...Object.keys(extras), 'orchestrated'].filter(getAgentRes);
+
+    const summary = useExplanation(
+        data.summary, data.orchestrated.explanation_id, data.orchestrated.explanation_status
+    );
 
     return (
         <div className="industrial-card">
             <h3>Agent Performance Comparison</h3>
-            <p className="text-muted text-sm mb-4">{data.summary}</p>
+            <p className="text-muted text-sm mb-4">{summary}</p>
 
             <table style={{ width: '100%', borderCollapse: 'collapse' }}>
                 <thead>
                     <tr style={{ background: 'var(--bg-card-hover)', textAlign: 'left' }}>
                         <th className="p-4">Metric</th>
-                        {agents.map(a => <th key={a} className="p-4" style={{ textTransform: 'capitalize' }}>{a}</th>)}
+                        {agents.map(a => <th key={a} className="p-4" style={{ textTransform: 'capitalize' }}>{a.replace('_', ' ')}</th>)}
                     </tr>
                 </thead>
                 <tbody>
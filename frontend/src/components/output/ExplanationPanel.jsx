@@ -1,12 +1,46 @@
-import React from 'react';
-
-const ExplanationPanel = ({ explanation }) => (
-    <div className="industrial-card mt-4">
-        <h3>AI Explanation</h3>
-        <p style={{ whiteSpace: 'pre-line', lineHeight: '1.6', color: '#cbd5e1' }}>
-            {explanation}
-        </p>
-    </div>
-);
+import React, { useEffect, useState } from 'react';
+import { optimizeService } from '../../services/api';
+
+// Explanations are generated in the background; poll until a pending one arrives
+export const useExplanation = (explanation, explanationId, status) => {
+    const [text, setText] = useState(explanation);
+
+    useEffect(() => {
+        setText(explanation);
+        if (status !== 'pending' || !explanationId) return undefined;
+
+        let cancelled = false;
+        const poll = async () => {
+            while (!cancelled) {
+                try {
+                    const res = await optimizeService.getExplanation(explanationId, 30);
+                    if (cancelled) return;
+                    if (res.data.status !== 'pending') {
+                        setText(res.data.text);
+                        return;
+                    }
+                } catch (err) {
+                    return;
+                }
+            }
+        };
+        poll();
+        return () => { cancelled = true; };
+    }, [explanation, explanationId, status]);
+
+    return text;
+};
+
+const ExplanationPanel = ({ explanation, explanationId, status }) => {
+    const text = useExplanation(explanation, explanationId, status);
+    return (
+        <div className="industrial-card mt-4">
+            <h3>AI Explanation</h3>
+            <p style={{ whiteSpace: 'pre-line', lineHeight: '1.6', color: '#cbd5e1' }}>
+                {text}
+            </p>
+        </div>
+    );
+};
 
 export default ExplanationPanel;
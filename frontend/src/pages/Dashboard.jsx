@@ -21,6 +21,7 @@ const Dashboard = () => {
     const navigate = useNavigate();
     const [mode, setMode] = useState('poc');
     const [jobs, setJobs] = useState([]);
+    const [jobUpload, setJobUpload] = useState(null); // Uploaded jobs summary: jobs then holds a preview only
     const [downtimes, setDowntimes] = useState([]);
     const [downtimeModalOpen, setDowntimeModalOpen] = useState(false);
     const [scheduleResult, setScheduleResult] = useState(null); // Single agent result
@@ -47,6 +48,7 @@ const Dashboard = () => {
     };
 
     const getAvailableMachines = () => {
+        if (jobUpload) return jobUpload.machine_ids;
         // Get unique machines from jobs
         const machines = new Set();
         jobs.forEach(job => {
@@ -61,8 +63,9 @@ const Dashboard = () => {
         setViewMode('single');
 
         try {
+            // Uploaded jobs are resolved server-side from the upload_id
             const payload = {
-                jobs,
+                ...(jobUpload ? { upload_id: jobUpload.upload_id } : { jobs }),
                 downtimes,
                 shift: { start_time: "08:00", end_time: "16:00" }
             };
@@ -83,14 +86,16 @@ const Dashboard = () => {
             setScheduleResult(res.data);
         } catch (err) {
             console.error(err);
-            alert("Optimization Failed: " + err.message);
+            // e.g. an expired upload_id (404)
+            const detail = err.response?.data?.detail;
+            alert("Optimization Failed: " + (typeof detail === 'string' ? detail : err.message));
         } finally {
             if (agentType !== 'compare') setLoading(false);
         }
     };
 
     const verifyData = () => {
-        return jobs.length > 0;
+        return jobUpload !== null || jobs.length > 0;
     };
 
     return (
@@ -125,12 +130,14 @@ const Dashboard = () => {
                         mode={mode}
                         jobs={jobs}
                         setJobs={setJobs}
+                        jobUpload={jobUpload}
+                        setJobUpload={setJobUpload}
                     />
                     <DowntimePanel
                         mode={mode}
                         downtimes={downtimes}
                         setDowntimes={setDowntimes}
-                        jobs={jobs}
+                        machines={getAvailableMachines()}
                     />
                 </div>
 
@@ -167,7 +174,11 @@ const Dashboard = () => {
                                     <GanttChart schedules={scheduleResult.schedules} downtimes={downtimes} />
                                     <JobAllocationTable schedules={scheduleResult.schedules} />
                                     <div className="grid-cols-2">
-                                        <ExplanationPanel explanation={scheduleResult.explanation} />
+                                        <ExplanationPanel
+                                            explanation={scheduleResult.explanation}
+                                            explanationId={scheduleResult.explanation_id}
+                                            status={scheduleResult.explanation_status}
+                                        />
                                         <ConstraintReport violations={scheduleResult.violations} />
                                     </div>
                                 </div>
@@ -194,6 +205,7 @@ const Dashboard = () => {
                 isOpen={jobModalOpen}
                 onClose={() => setJobModalOpen(false)}
                 jobs={jobs}
+                totalJobs={jobUpload ? jobUpload.rows : jobs.length}
             />
         </div>
     );
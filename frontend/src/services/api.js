@@ -19,6 +19,18 @@ export const dataService = {
     uploadDowntime: (formData) => api.post('/data/upload-downtime', formData, {
         headers: { 'Content-Type': 'multipart/form-data' }
     }),
+    getUploadPage: (uploadId, offset = 0, limit = 10000) => api.get(`/data/uploads/${uploadId}?offset=${offset}&limit=${limit}`),
+    deleteUpload: (uploadId) => api.delete(`/data/uploads/${uploadId}`),
+    // Uploads return counts and an upload_id; jobs uploads are sent to the
+    // optimizer by upload_id, small ones (downtimes) are fetched page by page
+    fetchUploadRows: async (uploadId, rows, pageSize = 10000) => {
+        const items = [];
+        for (let offset = 0; offset < rows; offset += pageSize) {
+            const res = await dataService.getUploadPage(uploadId, offset, pageSize);
+            items.push(...res.data.items);
+        }
+        return items;
+    },
 };
 
 export const optimizeService = {
@@ -27,10 +39,15 @@ export const optimizeService = {
     runBottleneck: (payload) => api.post('/optimize/bottleneck', payload),
     runOrchestrated: (payload) => api.post('/optimize/orchestrated', payload),
     runComparison: (payload) => api.post('/optimize/compare-all', payload),
+    submitJob: (payload, mode = 'orchestrated') => api.post(`/optimize/jobs?mode=${mode}`, payload),
+    getJob: (jobId, after = 0, wait = 0) => api.get(`/optimize/jobs/${jobId}?after=${after}&wait=${wait}`),
+    jobEvents: (jobId) => new EventSource(`${API_BASE_URL}/optimize/jobs/${jobId}/events`),
+    getExplanation: (explanationId, wait = 0) => api.get(`/optimize/explanations/${explanationId}?wait=${wait}`),
 };
 
 export const simulationService = {
     simulateFailure: (payload, machineId) => api.post(`/simulate/machine-failure?machine_id=${machineId}`, payload),
+    repairSchedule: (payload) => api.post('/simulate/repair', payload),
 };
 
 export default api;